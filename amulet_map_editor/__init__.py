@@ -1,7 +1,11 @@
 experimental_bedrock_resources = False
 
-from ._version import get_versions
+from amulet_map_editor.api import startup_trace
 
-__version__ = get_versions()["version"]
-del get_versions
-from amulet_map_editor.api import config as CONFIG, log, lang
+with startup_trace.phase("get version"):
+    from ._version import get_versions
+
+    __version__ = get_versions()["version"]
+    del get_versions
+with startup_trace.phase("load config, log and lang"):
+    from amulet_map_editor.api import config as CONFIG, log, lang
@@ -9,9 +9,16 @@ if __name__ == "__main__":
 
         import os
         import traceback
-        import wx
+
+        # imported first so that the imports below can be traced
+        from amulet_map_editor.api import startup_trace
+
+        with startup_trace.phase("import wx"):
+            import wx
         from amulet_map_editor import log
-        from amulet_map_editor.api.framework import AmuletApp
+
+        with startup_trace.phase("import AmuletApp"):
+            from amulet_map_editor.api.framework import AmuletApp
 
         if sys.platform == "linux" and wx.VERSION >= (4, 1, 1):
             # bug 247
@@ -34,7 +41,9 @@ if __name__ == "__main__":
         input("Press ENTER to continue.")
     else:
         try:
-            app = AmuletApp(0)
+            with startup_trace.phase("create AmuletApp"):
+                app = AmuletApp(0)
+            startup_trace.write()
             app.MainLoop()
         except Exception as e:
             log.critical(
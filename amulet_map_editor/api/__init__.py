@@ -1 +1,2 @@
+from . import startup_trace
 from .logging import log
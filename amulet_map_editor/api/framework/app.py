@@ -3,12 +3,15 @@ from .amulet_ui import AmuletUI
 import sys
 import locale
 
+from amulet_map_editor.api import startup_trace
+
 
 class AmuletApp(wx.App):
     def OnInit(self):
         self._frame = AmuletUI(None)
         self.SetTopWindow(self._frame)
         self._frame.Show()
+        startup_trace.mark("main window shown")
         return True
 
     def InitLocale(self):
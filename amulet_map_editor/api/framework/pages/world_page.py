@@ -10,6 +10,7 @@ from amulet.api.errors import LoaderNoneMatched
 from amulet import load_level
 
 from amulet_map_editor import programs, log, lang
+from amulet_map_editor.api import startup_trace
 from amulet_map_editor.api.datatypes import MenuData
 from amulet_map_editor.api.framework.pages import BasePageUI
 from amulet_map_editor.api.framework.programs import BaseProgram, AboutProgram
@@ -67,10 +68,16 @@ class WorldPageUI(wx.Notebook, BasePageUI):
         self._path = path
         self._close_self_callback = close_self_callback
         try:
-            self.world = load_level(path)
+            with startup_trace.phase("load level"):
+                self.world = load_level(path)
         except LoaderNoneMatched as e:
             self.Destroy()
             raise e
+        if startup_trace.enabled:
+            # The translation manager is created the first time it is accessed.
+            # Access it here so that the time taken to create it is recorded in the trace.
+            with startup_trace.phase("create translation manager"):
+                _ = self.world.translation_manager
         self.world_name = self.world.level_wrapper.level_name
         self._extensions: List[BaseProgram] = []
         self._active_extension: int = -1
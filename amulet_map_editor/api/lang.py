@@ -3,7 +3,7 @@ import os
 import locale
 
 import amulet_map_editor
-from amulet_map_editor.api import config as CONFIG, log
+from amulet_map_editor.api import config as CONFIG, log, startup_trace
 
 # there might be a proper way to do this but this should be enough for now
 
@@ -102,9 +102,10 @@ def _load_lang_file(lang_path: str) -> Dict[str, str]:
 
 
 # load the normal language directory
-register_lang_directory(
-    os.path.join(os.path.dirname(amulet_map_editor.__file__), "lang")
-)
+with startup_trace.phase("load lang"):
+    register_lang_directory(
+        os.path.join(os.path.dirname(amulet_map_editor.__file__), "lang")
+    )
 
 
 def get(unique_identifier):
@@ -12,6 +12,7 @@ from ..matrix import (
     perspective_matrix,
     displacement_matrix,
     orthographic_matrix,
+    look_vector,
     TransformationMatrixType,
 )
 
@@ -180,6 +181,11 @@ class Camera(CanvasContainer):
             return True
         return False
 
+    @property
+    def look_vector(self) -> numpy.ndarray:
+        """The unit vector for the direction the camera is facing. (x, y, z)"""
+        return look_vector(*self.rotation)
+
     @property
     def location_rotation(self) -> Tuple[CameraLocationType, CameraRotationType]:
         """Get the camera location and rotation in one property."""
@@ -12,11 +12,26 @@ from OpenGL.GL import (
     GL_SRC_ALPHA,
     GL_ONE_MINUS_SRC_ALPHA,
     glDeleteTextures,
+    glGetIntegerv,
+    GL_MAX_TEXTURE_SIZE,
 )
 
+from typing import Optional
 import uuid
 import sys
 
+from amulet_map_editor import log
+from amulet_map_editor.api.opengl.shaders import get_gl_version
+from amulet_map_editor.api.opengl.context_manager import (
+    register_context,
+    unregister_context,
+)
+
+# The first context that was created and its identifier.
+# Later contexts share their textures and buffers with it so that they only need loading once.
+_shared_context: Optional[glcanvas.GLContext] = None
+_shared_context_identifier: Optional[str] = None
+
 
 class BaseCanvas(glcanvas.GLCanvas):
     def __init__(self, parent: wx.Window):
@@ -34,23 +49,66 @@ class BaseCanvas(glcanvas.GLCanvas):
         # create a UUID for the context. Used to get shaders
         self._context_identifier = str(uuid.uuid4())
 
+        global _shared_context, _shared_context_identifier
+        if _shared_context is None:
+            self._context = self._create_context()
+            _shared_context = self._context
+            _shared_context_identifier = self._share_identifier = (
+                self._context_identifier
+            )
+        else:
+            self._context = self._create_context(_shared_context)
+            if self._context.IsOK():
+                self._share_identifier = _shared_context_identifier
+            else:
+                log.warning(
+                    "Could not share textures with the other OpenGL contexts. They will be loaded again."
+                )
+                self._context = self._create_context()
+                self._share_identifier = self._context_identifier
+        register_context(self._context_identifier, self._share_identifier)
+        self.SetCurrent(self._context)
+        self._gl_texture_atlas = glGenTextures(1)  # Create the atlas texture location
+        self._setup_opengl()  # set some OpenGL states
+        # The texture array shaders require OpenGL 3.3
+        if get_gl_version() == "330":
+            self._max_texture_size = int(glGetIntegerv(GL_MAX_TEXTURE_SIZE))
+        else:
+            self._max_texture_size = 0
+
+    def _create_context(
+        self, other: Optional[glcanvas.GLContext] = None
+    ) -> glcanvas.GLContext:
+        """Create the OpenGL context.
+
+        :param other: A context to share textures and buffers with.
+        :return: The new context.
+        """
         if sys.platform == "linux":
             # setup the OpenGL context. This apparently fixes #84
-            self._context = glcanvas.GLContext(self)
+            return glcanvas.GLContext(self, other)
         else:
             context_attributes = wx.glcanvas.GLContextAttrs()
             context_attributes.CoreProfile().Robust().ResetIsolation().EndList()
-            self._context = glcanvas.GLContext(
-                self, ctxAttrs=context_attributes
+            return glcanvas.GLContext(
+                self, other, ctxAttrs=context_attributes
             )  # setup the OpenGL context
-        self.SetCurrent(self._context)
-        self._gl_texture_atlas = glGenTextures(1)  # Create the atlas texture location
-        self._setup_opengl()  # set some OpenGL states
 
     @property
     def context_identifier(self) -> str:
         return self._context_identifier
 
+    @property
+    def share_identifier(self) -> str:
+        """The identifier of the group of contexts that share textures and buffers with this context."""
+        return self._share_identifier
+
+    @property
+    def max_texture_size(self) -> int:
+        """The largest texture the context supports.
+        This is 0 if the context does not support texture arrays."""
+        return self._max_texture_size
+
     def _setup_opengl(self):
         glEnable(GL_DEPTH_TEST)
         glEnable(GL_CULL_FACE)
@@ -60,3 +118,4 @@ class BaseCanvas(glcanvas.GLCanvas):
 
     def close(self):
         glDeleteTextures([self._gl_texture_atlas])
+        unregister_context(self._context_identifier)
@@ -1,3 +1,30 @@
+from typing import Dict
+
+# The identifier of the share group of each open context.
+# Contexts in the same share group can use the same textures and buffers.
+_share_groups: Dict[str, str] = {}
+
+
+def register_context(context_identifier: str, share_identifier: str):
+    """Record that a context has been created.
+
+    :param context_identifier: The uuid of the context.
+    :param share_identifier: The identifier of the group of contexts it shares data with.
+    """
+    _share_groups[context_identifier] = share_identifier
+
+
+def unregister_context(context_identifier: str):
+    """Record that a context has been destroyed."""
+    _share_groups.pop(context_identifier, None)
+
+
+def get_share_identifier(context_identifier: str) -> str:
+    """Get the identifier of the group of contexts that share data with a context.
+    Contexts that have not been registered do not share data with any other context."""
+    return _share_groups.get(context_identifier, context_identifier)
+
+
 class ContextManager:
     """Store the uuid of the context this data applies to."""
 
@@ -56,3 +56,57 @@ def orthographic_matrix(
             [0, 0, 0, 1],
         ]
     )
+
+
+def look_vector(yaw: float, pitch: float) -> numpy.ndarray:
+    """The unit vector a camera with the given rotation is facing.
+
+    :param yaw: Yaw in degrees.
+    :param pitch: Pitch in degrees.
+    :return: (x, y, z) numpy float array ranging from -1 to 1
+    """
+    return numpy.matmul(
+        rotation_matrix_xy(math.radians(pitch), math.radians(-yaw)), (0, 0, 1, 0)
+    )[:3]
+
+
+def frustum_planes(transformation_matrix: TransformationMatrixType) -> numpy.ndarray:
+    """Extract the six clipping planes from a world to projection matrix.
+
+    A point p is on the visible side of a plane if dot(plane[:3], p) + plane[3] >= 0
+
+    :param transformation_matrix: The 4x4 world to projection matrix.
+    :return: A 6x4 array of planes. (left, right, bottom, top, near, far)
+    """
+    m = numpy.asarray(transformation_matrix, dtype=numpy.float64)
+    return numpy.array(
+        [
+            m[3] + m[0],
+            m[3] - m[0],
+            m[3] + m[1],
+            m[3] - m[1],
+            m[3] + m[2],
+            m[3] - m[2],
+        ]
+    )
+
+
+def boxes_in_frustum(
+    planes: numpy.ndarray, box_min: numpy.ndarray, box_max: numpy.ndarray
+) -> numpy.ndarray:
+    """Find which axis aligned boxes are at least partially inside a frustum.
+    This is conservative so some boxes just outside the corners of the frustum may be reported as inside.
+
+    :param planes: The 6x4 array of planes from frustum_planes.
+    :param box_min: An Nx3 array of the minimum point of each box.
+    :param box_max: An Nx3 array of the maximum point of each box.
+    :return: A bool array of length N. True if the box is inside the frustum.
+    """
+    box_min = numpy.asarray(box_min, dtype=numpy.float64).reshape((-1, 3))
+    box_max = numpy.asarray(box_max, dtype=numpy.float64).reshape((-1, 3))
+    normals = planes[:, :3]
+    # the corner of each box furthest along each plane normal
+    corners = numpy.where(normals >= 0, box_max[:, None, :], box_min[:, None, :])
+    return numpy.all(
+        numpy.einsum("nij,ij->ni", corners, normals) + planes[:, 3] >= 0, axis=1
+    )
@@ -0,0 +1,295 @@
+from OpenGL.GL import (
+    glBindTexture,
+    GL_TEXTURE_2D,
+    glGenTextures,
+    glTexParameteri,
+    GL_TEXTURE_MIN_FILTER,
+    GL_TEXTURE_MAG_FILTER,
+    GL_TEXTURE_WRAP_S,
+    GL_TEXTURE_WRAP_T,
+    GL_NEAREST,
+    GL_CLAMP_TO_EDGE,
+    glTexImage2D,
+    glTexSubImage2D,
+    GL_RGBA,
+    GL_RGBA16,
+    GL_UNSIGNED_SHORT,
+    GL_SHORT,
+    GL_FALSE,
+    glActiveTexture,
+    GL_TEXTURE1,
+    GL_TEXTURE2,
+    glUseProgram,
+    glGetUniformLocation,
+    glUniform1i,
+    glVertexAttribPointer,
+    glEnableVertexAttribArray,
+)
+from typing import Dict, Tuple
+import ctypes
+import threading
+import weakref
+import numpy
+
+from amulet_map_editor import log
+from amulet_map_editor.api.opengl.mesh.tri_mesh import TriMesh
+from amulet_map_editor.api.opengl.context_manager import get_share_identifier
+from amulet_map_editor.api.opengl.resource_pack import OpenGLResourcePack
+
+# The compact vertex format stores each vertex as 8 16-bit values (16 bytes)
+#     x, y, z  int16   position in 1/POSITION_SCALE blocks
+#     tint     uint16  index into the tint palette
+#     u, v     int16   texture coordinates in 1/UV_SCALE textures
+#     texture  uint16  index into the texture palette
+#     layer    uint16  the layer of the texture if the atlas is a texture array
+# These values must match the render_chunk_compact shaders.
+COMPACT_VERT_LEN = 8
+POSITION_SCALE = 16
+UV_SCALE = 64
+# The palettes are stored in PALETTE_WIDTH x PALETTE_WIDTH textures.
+PALETTE_WIDTH = 256
+PALETTE_SIZE = PALETTE_WIDTH * PALETTE_WIDTH
+# The tints are stored divided by this so that tints above 1 can be stored.
+TINT_SCALE = 2
+
+
+def height_shade(y: numpy.ndarray) -> numpy.ndarray:
+    """The amount the tint is multiplied by based on the height of the vertex."""
+    shade = (y / 32) % 2
+    shade[shade > 1] = 2 - shade[shade > 1]
+    return 0.9 + 0.2 * shade
+
+
+class VertexPalette:
+    """A palette of RGBA values that vertices in the compact vertex format index into.
+    Values can be added from any thread. The palette is loaded into a texture for each context when bound."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index: Dict[bytes, int] = {}
+        self._values = numpy.zeros((PALETTE_SIZE, 4), dtype=numpy.uint16)
+        self._version = 0
+        self._gl_textures: Dict[str, Tuple[int, int]] = {}
+
+    def __len__(self):
+        return len(self._index)
+
+    def get_indexes(self, values: numpy.ndarray) -> numpy.ndarray:
+        """Get the palette index for each value, adding the values that are not in the palette.
+
+        :param values: An Nx4 uint16 array of RGBA values.
+        :return: An array of N uint16 palette indexes.
+        """
+        unique, inverse = numpy.unique(values, axis=0, return_inverse=True)
+        indexes = numpy.zeros(len(unique), dtype=numpy.uint16)
+        with self._lock:
+            for i, value in enumerate(unique):
+                key = value.tobytes()
+                if key not in self._index:
+                    if len(self._index) >= PALETTE_SIZE:
+                        log.warning("Vertex palette is full. Using the first entry.")
+                        continue
+                    self._index[key] = len(self._index)
+                    self._values[self._index[key]] = value
+                    self._version += 1
+                indexes[i] = self._index[key]
+        return indexes[inverse.reshape(-1)]
+
+    def bind(self, context_identifier: str, texture_unit: int):
+        """Bind the palette texture for the context to a texture unit, updating it if values have been added.
+        This must be run from the thread that owns the context."""
+        # contexts that share textures use the same palette texture
+        share_identifier = get_share_identifier(context_identifier)
+        glActiveTexture(texture_unit)
+        if share_identifier in self._gl_textures:
+            gl_texture, version = self._gl_textures[share_identifier]
+            glBindTexture(GL_TEXTURE_2D, gl_texture)
+        else:
+            gl_texture, version = glGenTextures(1), -1
+            glBindTexture(GL_TEXTURE_2D, gl_texture)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+            glTexImage2D(
+                GL_TEXTURE_2D,
+                0,
+                GL_RGBA16,
+                PALETTE_WIDTH,
+                PALETTE_WIDTH,
+                0,
+                GL_RGBA,
+                GL_UNSIGNED_SHORT,
+                None,
+            )
+        if version != self._version:
+            with self._lock:
+                version = self._version
+                rows = -(-len(self._index) // PALETTE_WIDTH)
+                values = self._values[: rows * PALETTE_WIDTH].copy()
+            if rows:
+                glTexSubImage2D(
+                    GL_TEXTURE_2D,
+                    0,
+                    0,
+                    0,
+                    PALETTE_WIDTH,
+                    rows,
+                    GL_RGBA,
+                    GL_UNSIGNED_SHORT,
+                    values,
+                )
+        self._gl_textures[share_identifier] = (gl_texture, version)
+
+
+# The texture and tint palettes for each resource pack.
+_palettes = weakref.WeakKeyDictionary()
+_palette_lock = threading.Lock()
+
+
+def get_vertex_palettes(
+    resource_pack: OpenGLResourcePack,
+) -> Tuple[VertexPalette, VertexPalette]:
+    """Get the texture palette and tint palette for a resource pack."""
+    with _palette_lock:
+        if resource_pack not in _palettes:
+            _palettes[resource_pack] = (VertexPalette(), VertexPalette())
+        return _palettes[resource_pack]
+
+
+def pack_verts(
+    verts: numpy.ndarray,
+    texture_palette: VertexPalette,
+    tint_palette: VertexPalette,
+) -> numpy.ndarray:
+    """Convert vertices in the TriMesh vertex format to the compact vertex format.
+    The height based shading is removed from the tint because the shader applies it.
+
+    :param verts: A flat float32 array with TriMesh._vert_len values per vertex.
+    :param texture_palette: The palette to store the texture bounds in.
+    :param tint_palette: The palette to store the tints in.
+    :return: A flat int16 array with COMPACT_VERT_LEN values per vertex.
+    """
+    verts = verts.reshape((-1, TriMesh._vert_len))
+    packed = numpy.zeros((len(verts), COMPACT_VERT_LEN), dtype=numpy.int16)
+    if len(verts):
+        packed[:, 0:3] = numpy.clip(
+            numpy.round(verts[:, 0:3] * POSITION_SCALE), -32768, 32767
+        )
+        packed[:, 4:6] = numpy.clip(
+            numpy.round(verts[:, 3:5] * UV_SCALE), -32768, 32767
+        )
+
+        # The layer of a texture array is stored in the integer part of the x bounds.
+        layer = numpy.floor(verts[:, 5])
+        bounds = verts[:, 5:9].copy()
+        bounds[:, 0::2] -= layer[:, None]
+        bounds = numpy.round(numpy.clip(bounds, 0, 1) * 0xFFFF).astype(numpy.uint16)
+        packed[:, 6] = texture_palette.get_indexes(bounds).view(numpy.int16)
+        packed[:, 7] = layer
+
+        tint = numpy.full((len(verts), 4), 0xFFFF, dtype=numpy.uint16)
+        # Tints are quantised to 8 bits so that rounding errors do not create new palette entries.
+        tint[:, :3] = (
+            numpy.round(
+                numpy.clip(
+                    verts[:, 9:12] / height_shade(verts[:, 1])[:, None] / TINT_SCALE,
+                    0,
+                    1,
+                )
+                * 0xFF
+            ).astype(numpy.uint16)
+            * 0x101
+        )
+        packed[:, 3] = tint_palette.get_indexes(tint).view(numpy.int16)
+    return packed.ravel()
+
+
+class ChunkTriMesh(TriMesh):
+    """An indexed TriMesh for chunk geometry that can store its vertices in the compact vertex format.
+    The geometry is created in the TriMesh vertex format and converted with pack_verts.
+    The compact format uses a third of the memory of the TriMesh vertex format."""
+
+    def __init__(
+        self,
+        context_identifier: str,
+        texture: int,
+        resource_pack: OpenGLResourcePack,
+        compact: bool = False,
+    ):
+        super().__init__(context_identifier, texture, resource_pack.texture_array)
+        self._compact = compact
+        self._texture_palette, self._tint_palette = get_vertex_palettes(resource_pack)
+
+    @property
+    def compact(self) -> bool:
+        """Are the vertices stored in the compact vertex format."""
+        return self._compact
+
+    @property
+    def indexed(self) -> bool:
+        return True
+
+    @property
+    def packed_vert_len(self) -> int:
+        """The number of values in the vertex array per vertex."""
+        return COMPACT_VERT_LEN if self._compact else self._vert_len
+
+    @property
+    def packed_vert_dtype(self):
+        """The data type of the vertex array."""
+        return numpy.int16 if self._compact else numpy.float32
+
+    @property
+    def shader_name(self) -> str:
+        if self._compact:
+            if self._texture_array:
+                return "render_chunk_compact_array"
+            return "render_chunk_compact"
+        return super().shader_name
+
+    def _pack_verts(self):
+        """Convert self.verts to the compact vertex format if enabled.
+        Must be called once the geometry has been created."""
+        if self._compact:
+            self.verts = pack_verts(
+                self.verts, self._texture_palette, self._tint_palette
+            )
+
+    def _setup(self):
+        if self._vao is None and self._compact:
+            super()._setup()
+            glUseProgram(self._shader)
+            glUniform1i(glGetUniformLocation(self._shader, "texture_palette"), 1)
+            glUniform1i(glGetUniformLocation(self._shader, "tint_palette"), 2)
+            glUseProgram(0)
+        else:
+            super()._setup()
+
+    def _setup_opengl_attrs(self):
+        if self._compact:
+            stride = COMPACT_VERT_LEN * 2
+            for index, attr_count, attr_type, attr_start in (
+                (0, 3, GL_SHORT, 0),  # position
+                (1, 2, GL_SHORT, 4),  # texture coords
+                (2, 1, GL_UNSIGNED_SHORT, 6),  # texture palette index
+                (3, 1, GL_UNSIGNED_SHORT, 3),  # tint palette index
+                (4, 1, GL_UNSIGNED_SHORT, 7),  # texture array layer
+            ):
+                glVertexAttribPointer(
+                    index,
+                    attr_count,
+                    attr_type,
+                    GL_FALSE,
+                    stride,
+                    ctypes.c_void_p(attr_start * 2),
+                )
+                glEnableVertexAttribArray(index)
+        else:
+            super()._setup_opengl_attrs()
+
+    def _draw(self, transformation_matrix: numpy.ndarray):
+        if self._compact:
+            self._texture_palette.bind(self.context_identifier, GL_TEXTURE1)
+            self._tint_palette.bind(self.context_identifier, GL_TEXTURE2)
+        super()._draw(transformation_matrix)
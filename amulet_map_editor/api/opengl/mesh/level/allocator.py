@@ -0,0 +1,85 @@
+from typing import List, Tuple, Optional
+import bisect
+
+
+class FreeListAllocator:
+    """Allocates ranges from a fixed size buffer.
+    The free ranges are stored in a sorted list and the first free range that is large enough is used.
+    Neighbouring free ranges are merged when a range is freed."""
+
+    def __init__(self, capacity: int):
+        """
+        Create a new FreeListAllocator.
+
+        :param capacity: The number of elements that can be allocated.
+        """
+        self._capacity = capacity
+        # A sorted list of the offset and size of each free range.
+        self._free: List[Tuple[int, int]] = [(0, capacity)] if capacity else []
+        self._used = 0
+
+    def __repr__(self):
+        return f"FreeListAllocator({self._used}/{self._capacity})"
+
+    @property
+    def capacity(self) -> int:
+        """The number of elements in the buffer."""
+        return self._capacity
+
+    @property
+    def used(self) -> int:
+        """The number of elements that are allocated."""
+        return self._used
+
+    @property
+    def end(self) -> int:
+        """The offset after the last allocated element."""
+        if self._free and sum(self._free[-1]) == self._capacity:
+            return self._free[-1][0]
+        return self._capacity
+
+    @property
+    def fragmentation(self) -> float:
+        """The fraction of the buffer up to the last allocated element that is free."""
+        end = self.end
+        if end:
+            return 1 - self._used / end
+        return 0.0
+
+    def allocate(self, size: int) -> Optional[int]:
+        """Allocate a range of elements.
+
+        :param size: The number of elements to allocate.
+        :return: The offset of the range or None if there is no free range large enough.
+        """
+        if size <= 0:
+            return 0
+        for index, (offset, free_size) in enumerate(self._free):
+            if free_size >= size:
+                if free_size == size:
+                    del self._free[index]
+                else:
+                    self._free[index] = (offset + size, free_size - size)
+                self._used += size
+                return offset
+        return None
+
+    def free(self, offset: int, size: int):
+        """Free a range of elements that was previously allocated.
+
+        :param offset: The offset returned by allocate.
+        :param size: The size passed to allocate.
+        """
+        if size <= 0:
+            return
+        self._used -= size
+        index = bisect.bisect(self._free, (offset, size))
+        if index < len(self._free) and offset + size == self._free[index][0]:
+            # merge with the next free range
+            size += self._free.pop(index)[1]
+        if index and sum(self._free[index - 1]) == offset:
+            # merge with the previous free range
+            offset, previous_size = self._free[index - 1]
+            self._free[index - 1] = (offset, previous_size + size)
+        else:
+            self._free.insert(index, (offset, size))
@@ -1,6 +1,7 @@
 import numpy
-from typing import TYPE_CHECKING, Tuple, List, Union
+from typing import TYPE_CHECKING, Tuple, List, Union, Optional
 import weakref
+import threading
 import itertools
 from amulet_map_editor import log
 
@@ -10,12 +11,97 @@ from amulet.api.data_types import Dimension
 from amulet.api.level import BaseLevel
 from amulet.api.selection import SelectionBox
 
-from .chunk_builder import RenderChunkBuilder
+from .chunk_builder import (
+    RenderChunkBuilder,
+    BlockModelManager,
+    Lod1BlockTable,
+    LOD1_SCALE,
+    LOD1_EMPTY,
+)
 from amulet_map_editor.api.opengl.resource_pack import OpenGLResourcePack
+from ..mesh_cache import MeshCache, CachedGeometry, CacheStamp
 
 if TYPE_CHECKING:
     from amulet.api.chunk import Chunk
 
+# The padded sub-chunk buffer, the sub-chunk arrays and block models needed to build the full detail geometry.
+Lod0DataType = Tuple[numpy.ndarray, List[Tuple[numpy.ndarray, int]], BlockModelManager]
+# The heightmap, top blocks and block table needed to build the low detail geometry.
+Lod1DataType = Tuple[numpy.ndarray, numpy.ndarray, Lod1BlockTable]
+
+# The offset of each neighbour chunk and the slice of its sub-chunks that touches this chunk.
+NEIGHBOUR_EDGES = (
+    ((-1, 0), (-1, slice(None), slice(None))),
+    ((1, 0), (0, slice(None), slice(None))),
+    ((0, -1), (slice(None), slice(None), -1)),
+    ((0, 1), (slice(None), slice(None), 0)),
+)
+# The padding of the larger sub-chunk arrays that each neighbour edge is copied into.
+NEIGHBOUR_PADDING_SLICES = (
+    (0, slice(1, -1), slice(1, -1)),
+    (-1, slice(1, -1), slice(1, -1)),
+    (slice(1, -1), slice(1, -1), 0),
+    (slice(1, -1), slice(1, -1), -1),
+)
+# Each face of the padding of a stack of larger sub-chunk arrays.
+PADDING_SLICES = tuple(
+    (slice(None),) + (slice(None),) * axis + (index,)
+    for axis in range(3)
+    for index in (0, -1)
+)
+_EMPTY_EDGES = (
+    numpy.zeros(0, dtype=numpy.int64),
+    numpy.zeros((0, 16, 16), dtype=numpy.uint32),
+)
+# The edges of each chunk that has been a neighbour, the sub-chunk indexes of the edges
+# and the changed time of the chunk when they were found.
+# {chunk: {(dx, dz): (changed_time, sub_chunk_ys, edges)}}
+_neighbour_edges = weakref.WeakKeyDictionary()
+_neighbour_edge_lock = threading.Lock()
+
+
+class PaddedBufferPool:
+    """A pool of buffers to hold the larger sub-chunk arrays of a chunk.
+    The buffer is filled by the thread that loads the chunk data and released once a
+    worker thread has built the geometry so a thread local buffer cannot be used."""
+
+    def __init__(self, max_buffers: int = 16):
+        """
+        Create a new PaddedBufferPool.
+
+        :param max_buffers: The maximum number of released buffers to keep.
+        """
+        self._lock = threading.Lock()
+        self._buffers: List[numpy.ndarray] = []
+        self._max_buffers = max_buffers
+
+    def acquire(self, count: int) -> numpy.ndarray:
+        """Get a buffer that can hold at least count larger sub-chunk arrays.
+        The contents of the buffer are undefined.
+
+        :param count: The number of sub-chunks.
+        :return: A uint32 array of shape (N, 18, 18, 18) where N >= count.
+        """
+        with self._lock:
+            for index, buffer in enumerate(self._buffers):
+                if len(buffer) >= count:
+                    return self._buffers.pop(index)
+        # round up so that the buffers can be reused for chunks with a similar number of sub-chunks
+        return numpy.empty((-(-count // 8) * 8, 18, 18, 18), dtype=numpy.uint32)
+
+    def release(self, buffer: numpy.ndarray):
+        """Return a buffer from acquire to the pool once it is no longer used."""
+        if len(buffer):
+            with self._lock:
+                self._buffers.append(buffer)
+                if len(self._buffers) > self._max_buffers:
+                    # discard the smallest buffer
+                    self._buffers.sort(key=len)
+                    del self._buffers[0]
+
+
+padded_buffer_pool = PaddedBufferPool()
+
 
 class RenderChunk(RenderChunkBuilder):
     def __init__(
@@ -29,10 +115,13 @@ class RenderChunk(RenderChunkBuilder):
         draw_floor: bool = False,
         draw_ceil: bool = False,
         limit_bounds: bool = False,
+        lod: int = 0,
+        compact: bool = False,
+        mesh_cache: MeshCache = None,
     ):
         # the chunk geometry is stored in chunk space (floating point)
         # at shader time it is transformed by the players transform
-        super().__init__(context_identifier, resource_pack)
+        super().__init__(context_identifier, resource_pack, compact)
         self._level_ = weakref.ref(level)
         self._region_size = region_size
         self._coords = chunk_coords
@@ -40,13 +129,16 @@ class RenderChunk(RenderChunkBuilder):
         self._draw_floor = draw_floor
         self._draw_ceil = draw_ceil
         self._limit_bounds = limit_bounds
+        self._lod = lod  # 0 = full detail, 1 = heightmap
         self._chunk_state = 0  # 0 = chunk does not exist, 1 = chunk exists but failed to load, 2 = chunk exists
         self._changed_time = 0
         self._needs_rebuild = True
+        self._mesh_cache = mesh_cache
+        # The stamp from the mesh cache when the chunk data was loaded. None if the geometry should not be cached.
+        self._cache_stamp: Optional[CacheStamp] = None
         self.verts_translucent = (
-            0  # the offset into the above from which the faces can be translucent
+            0  # the offset into the indices from which the faces can be translucent
         )
-        # self.chunk_lod1: numpy.ndarray = self.new_empty_verts()
 
     def __repr__(self):
         return f"RenderChunk({self._coords[0]}, {self._coords[1]})"
@@ -88,6 +180,11 @@ class RenderChunk(RenderChunkBuilder):
     def chunk(self) -> "Chunk":
         return self._level.get_chunk(self.cx, self.cz, self._dimension)
 
+    @property
+    def lod(self) -> int:
+        """The level of detail the geometry is built at. 0 is full detail."""
+        return self._lod
+
     @property
     def chunk_state(self) -> int:
         return self._chunk_state
@@ -106,92 +203,261 @@ class RenderChunk(RenderChunkBuilder):
                 return True
         return chunk_state != self._chunk_state
 
-    def _sub_chunks(self, blocks: Blocks) -> List[Tuple[numpy.ndarray, int]]:
-        """Create sub-chunk arrays that extend into the neighbour sub-chunks by one block.
+    def _neighbour_edges(self) -> List[Tuple[numpy.ndarray, numpy.ndarray]]:
+        """Get the blocks on the edge of each neighbour chunk that touch this chunk.
+        The edges are cached until the neighbour chunk changes.
 
-        :param blocks: The Blocks array for the chunk.
-        :return: A list of tuples containing the larger block array and the location of the sub-chunk
+        :return: The sorted sub-chunk indexes and the stacked 16x16 edge arrays for each neighbour in NEIGHBOUR_EDGES order.
         """
-        sub_chunks = []
-        neighbour_chunks = {}
-        for dx, dz in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+        edges = []
+        for (dx, dz), edge_slice in NEIGHBOUR_EDGES:
             try:
-                neighbour_chunks[(dx, dz)] = self._level.get_chunk(
+                neighbour = self._level.get_chunk(
                     self.cx + dx, self.cz + dz, self.dimension
-                ).blocks
+                )
             except ChunkLoadError:
+                edges.append(_EMPTY_EDGES)
                 continue
-
-        for cy in blocks.sub_chunks:
-            sub_chunk = blocks.get_sub_chunk(cy)
-            larger_blocks = numpy.zeros(
-                sub_chunk.shape + numpy.array((2, 2, 2)), sub_chunk.dtype
-            )
-            sub_chunk_box = SelectionBox.create_sub_chunk_box(self.cx, cy, self.cz)
-            if self._limit_bounds:
-                if self._level.bounds(self.dimension).intersects(sub_chunk_box):
-                    boxes = self._level.bounds(self.dimension).intersection(
-                        sub_chunk_box
-                    )
-                    for box in boxes.selection_boxes:
-                        larger_blocks[1:-1, 1:-1, 1:-1][
-                            box.sub_chunk_slice(self.cx, cy, self.cz)
-                        ] = sub_chunk[box.sub_chunk_slice(self.cx, cy, self.cz)]
-                else:
-                    continue
-            else:
-                larger_blocks[1:-1, 1:-1, 1:-1] = sub_chunk
-            for chunk_offset, neighbour_blocks in neighbour_chunks.items():
-                if cy not in neighbour_blocks:
-                    continue
-                if chunk_offset == (-1, 0):
-                    larger_blocks[0, 1:-1, 1:-1] = neighbour_blocks.get_sub_chunk(cy)[
-                        -1, :, :
-                    ]
-                elif chunk_offset == (1, 0):
-                    larger_blocks[-1, 1:-1, 1:-1] = neighbour_blocks.get_sub_chunk(cy)[
-                        0, :, :
+            with _neighbour_edge_lock:
+                chunk_edges = _neighbour_edges.setdefault(neighbour, {})
+                changed_time, *cached = chunk_edges.get((dx, dz), (None,))
+                if changed_time != neighbour.changed_time:
+                    blocks = neighbour.blocks
+                    sub_chunk_ys = sorted(blocks.sub_chunks)
+                    cached = [
+                        numpy.array(sub_chunk_ys, dtype=numpy.int64),
+                        numpy.array(
+                            [
+                                blocks.get_sub_chunk(cy)[edge_slice]
+                                for cy in sub_chunk_ys
+                            ],
+                            dtype=numpy.uint32,
+                        ).reshape((-1, 16, 16)),
                     ]
-                elif chunk_offset == (0, -1):
-                    larger_blocks[1:-1, 1:-1, 0] = neighbour_blocks.get_sub_chunk(cy)[
-                        :, :, -1
-                    ]
-                elif chunk_offset == (0, 1):
-                    larger_blocks[1:-1, 1:-1, -1] = neighbour_blocks.get_sub_chunk(cy)[
-                        :, :, 0
+                    chunk_edges[(dx, dz)] = (neighbour.changed_time, *cached)
+            edges.append(tuple(cached))
+        return edges
+
+    def _sub_chunks(
+        self, blocks: Blocks
+    ) -> Tuple[numpy.ndarray, List[Tuple[numpy.ndarray, int]]]:
+        """Create sub-chunk arrays that extend into the neighbour sub-chunks by one block.
+        The arrays are views into a buffer from the padded buffer pool.
+        The buffer must be released once the geometry has been built.
+
+        :param blocks: The Blocks array for the chunk.
+        :return: The buffer and a list of tuples containing the larger block array and the location of the sub-chunk
+        """
+        sub_chunk_ys = sorted(blocks.sub_chunks)
+        if self._limit_bounds:
+            bounds = self._level.bounds(self.dimension)
+            sub_chunk_ys = [
+                cy
+                for cy in sub_chunk_ys
+                if bounds.intersects(
+                    SelectionBox.create_sub_chunk_box(self.cx, cy, self.cz)
+                )
+            ]
+        buffer = padded_buffer_pool.acquire(len(sub_chunk_ys))
+        if not sub_chunk_ys:
+            return buffer, []
+        larger_blocks = buffer[: len(sub_chunk_ys)]
+
+        if self._limit_bounds:
+            larger_blocks.fill(0)
+            for larger_sub_chunk, cy in zip(larger_blocks, sub_chunk_ys):
+                sub_chunk = blocks.get_sub_chunk(cy)
+                sub_chunk_box = SelectionBox.create_sub_chunk_box(self.cx, cy, self.cz)
+                for box in bounds.intersection(sub_chunk_box).selection_boxes:
+                    sub_chunk_slice = box.sub_chunk_slice(self.cx, cy, self.cz)
+                    larger_sub_chunk[1:-1, 1:-1, 1:-1][sub_chunk_slice] = sub_chunk[
+                        sub_chunk_slice
                     ]
-            if cy - 1 in blocks:
-                larger_blocks[1:-1, 0, 1:-1] = blocks.get_sub_chunk(cy - 1)[:, -1, :]
-            if cy + 1 in blocks:
-                larger_blocks[1:-1, -1, 1:-1] = blocks.get_sub_chunk(cy + 1)[:, 0, :]
-            sub_chunks.append((larger_blocks, cy * 16))
-        return sub_chunks
+        else:
+            # the padding is overwritten below where there is a neighbour
+            for padding in PADDING_SLICES:
+                larger_blocks[padding] = 0
+            numpy.stack(
+                [blocks.get_sub_chunk(cy) for cy in sub_chunk_ys],
+                out=larger_blocks[:, 1:-1, 1:-1, 1:-1],
+            )
+
+        # copy the neighbouring layers of the sub-chunks above and below
+        sub_chunk_ys_array = numpy.array(sub_chunk_ys, dtype=numpy.int64)
+        below = numpy.flatnonzero(numpy.diff(sub_chunk_ys_array) == 1)
+        larger_blocks[below + 1, 1:-1, 0, 1:-1] = larger_blocks[below, 1:-1, -2, 1:-1]
+        larger_blocks[below, 1:-1, -1, 1:-1] = larger_blocks[below + 1, 1:-1, 1, 1:-1]
+
+        # copy the edges of the neighbouring chunks
+        for (edge_ys, edges), padding in zip(
+            self._neighbour_edges(), NEIGHBOUR_PADDING_SLICES
+        ):
+            if not len(edge_ys):
+                continue
+            index = numpy.minimum(
+                numpy.searchsorted(edge_ys, sub_chunk_ys_array), len(edge_ys) - 1
+            )
+            found = edge_ys[index] == sub_chunk_ys_array
+            larger_blocks[(found,) + padding] = edges[index[found]]
+
+        return buffer, [
+            (larger_sub_chunk, cy * 16)
+            for larger_sub_chunk, cy in zip(larger_blocks, sub_chunk_ys)
+        ]
+
+    @staticmethod
+    def _heightmap(
+        blocks: Blocks, visible: numpy.ndarray
+    ) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Find the highest visible block in each LOD1_SCALE wide column of the chunk.
+
+        :param blocks: The Blocks array for the chunk.
+        :param visible: A bool array that is True for each block in the palette that should be drawn.
+        :return: The y coordinate of the highest block in each column (LOD1_EMPTY if there are no blocks) and the palette index of that block.
+        """
+        heights = numpy.full((16, 16), LOD1_EMPTY, dtype=numpy.int32)
+        top_blocks = numpy.zeros((16, 16), dtype=numpy.uint32)
+        found = numpy.zeros((16, 16), dtype=bool)
+        for cy in sorted(blocks.sub_chunks, reverse=True):
+            sub_chunk = blocks.get_sub_chunk(cy)
+            solid = visible[sub_chunk]
+            columns = solid.any(axis=1) & ~found
+            if columns.any():
+                # the index of the highest visible block in each column
+                top = 15 - numpy.argmax(solid[:, ::-1, :], axis=1)
+                x, z = numpy.nonzero(columns)
+                heights[x, z] = cy * 16 + top[x, z]
+                top_blocks[x, z] = sub_chunk[x, top[x, z], z]
+                found |= columns
+                if found.all():
+                    break
+
+        # merge the columns into LOD1_SCALE x LOD1_SCALE cells using the highest column in each cell
+        cells = 16 // LOD1_SCALE
+        heights = (
+            heights.reshape((cells, LOD1_SCALE, cells, LOD1_SCALE))
+            .transpose((0, 2, 1, 3))
+            .reshape((cells, cells, -1))
+        )
+        top_blocks = (
+            top_blocks.reshape((cells, LOD1_SCALE, cells, LOD1_SCALE))
+            .transpose((0, 2, 1, 3))
+            .reshape((cells, cells, -1))
+        )
+        highest = numpy.argmax(heights, axis=2)[..., None]
+        return (
+            numpy.take_along_axis(heights, highest, 2)[..., 0],
+            numpy.take_along_axis(top_blocks, highest, 2)[..., 0],
+        )
 
     def create_geometry(self):
+        self.build_geometry(self.prepare_geometry())
+
+    def _cache_id(self) -> tuple:
+        """The values the geometry depends on other than the chunk data."""
+        return (
+            self.resource_pack.pack_hash,
+            # the texture bounds are stored in the vertices
+            self.resource_pack.atlas_hash,
+            self._dimension,
+            self._coords,
+            self._region_size,
+            self._lod,
+            self._draw_floor,
+            self._draw_ceil,
+            self._limit_bounds,
+            self.greedy_meshing,
+        )
+
+    def prepare_geometry(
+        self,
+    ) -> Union[Lod0DataType, Lod1DataType, CachedGeometry, None]:
+        """Load the data from the level required to build the geometry for this chunk.
+        This accesses the level so it must be run from the thread that owns the level.
+        The result should be passed to build_geometry which can be run from any thread.
+
+        :return: The data for the level of detail or the cached geometry if the chunk was loaded, otherwise None.
+        """
         try:
             chunk = self.chunk
         except ChunkDoesNotExist:
-            self._create_empty_geometry()
             self._chunk_state = 0
         except ChunkLoadError:
             log.info(f"Error loading chunk {self.coords}", exc_info=True)
-            self._create_error_geometry()
             self._chunk_state = 1
         else:
             self._changed_time = chunk.changed_time
             self._chunk_state = 2
-            chunk_verts, chunk_verts_translucent = self._create_lod0_multi(
-                self._sub_chunks(chunk.blocks)
-            )
-            self._set_verts(chunk_verts, chunk_verts_translucent)
+            if self._mesh_cache is not None:
+                self._cache_stamp = self._mesh_cache.stamp(
+                    self._dimension, self.cx, self.cz, chunk.changed_time
+                )
+                if self._cache_stamp is not None:
+                    geometry = self._mesh_cache.get(self._cache_id(), self._cache_stamp)
+                    if geometry is not None:
+                        self._cache_stamp = None
+                        return geometry
+            if self._lod:
+                block_table = self._get_lod1_table(chunk.block_palette)
+                heights, blocks = self._heightmap(chunk.blocks, block_table.visible)
+                return heights, blocks, block_table
+            else:
+                return (
+                    *self._sub_chunks(chunk.blocks),
+                    self._get_block_models(chunk.block_palette),
+                )
+
+    def build_geometry(
+        self, chunk_data: Union[Lod0DataType, Lod1DataType, CachedGeometry, None]
+    ):
+        """Create the geometry from the data returned by prepare_geometry.
+        This does not access the level so it can be run from a worker thread.
+
+        :param chunk_data: The data returned by prepare_geometry.
+        """
+        if self._chunk_state == 0:
+            self._create_empty_geometry()
+        elif self._chunk_state == 1:
+            self._create_error_geometry()
+        elif isinstance(chunk_data, CachedGeometry):
+            self.verts, self.indices, self.verts_translucent = chunk_data
+            self.draw_count = self.indices.size
+        else:
+            if self._lod:
+                self._set_verts([self._create_lod1(*chunk_data)], [])
+            else:
+                buffer, sub_chunks, block_models = chunk_data
+                try:
+                    chunk_verts, chunk_verts_translucent = self._create_lod0_multi(
+                        sub_chunks, block_models
+                    )
+                finally:
+                    padded_buffer_pool.release(buffer)
+                self._set_verts(chunk_verts, chunk_verts_translucent)
             if self._draw_floor or self._draw_ceil:
                 plane = self._create_grid(
                     "amulet",
                     "amulet_ui/translucent_white",
                     (0.55, 0.5, 0.9) if (self.cx + self.cz) % 2 else (0.4, 0.4, 0.85),
                 )
+                self.indices = numpy.concatenate(
+                    [
+                        self.indices,
+                        numpy.arange(len(plane), dtype=numpy.uint32)
+                        + self.verts.size // self._vert_len,
+                    ]
+                )
                 self.verts = numpy.concatenate([self.verts, plane.ravel()], 0)
-                self.draw_count += len(plane)
+                self.draw_count = self.indices.size
+            if self._cache_stamp is not None:
+                self._mesh_cache.put(
+                    self._cache_id(),
+                    self._cache_stamp,
+                    self.verts,
+                    self.indices,
+                    self.verts_translucent,
+                )
+        self._pack_verts()
         self._needs_rebuild = True
 
     def _create_empty_geometry(self):
@@ -202,9 +468,11 @@ class RenderChunk(RenderChunkBuilder):
                 (0.3, 0.3, 0.3) if (self.cx + self.cz) % 2 else (0.2, 0.2, 0.2),
             )
             self.verts = plane.ravel()
+            self.indices = numpy.arange(len(plane), dtype=numpy.uint32)
             self.draw_count = len(plane)
         else:
             self.verts = numpy.ones(0, numpy.float32)
+            self.indices = self.new_empty_indices()
             self.draw_count = 0
 
     def _create_grid(
@@ -278,17 +546,9 @@ class RenderChunk(RenderChunkBuilder):
                 (1, 0.2, 0.2) if (self.cx + self.cz) % 2 else (0.75, 0.2, 0.2),
             )
             self.verts = plane.ravel()
+            self.indices = numpy.arange(len(plane), dtype=numpy.uint32)
             self.draw_count = len(plane)
         else:
             self.verts = numpy.ones(0, numpy.float32)
+            self.indices = self.new_empty_indices()
             self.draw_count = 0
-
-    def _create_lod1(
-        self,
-        blocks: numpy.ndarray,
-        larger_blocks: numpy.ndarray,
-        unique_blocks: numpy.ndarray,
-    ):
-        # TODO
-        self.verts: numpy.ndarray = self.new_empty_verts()
-        # self.chunk_lod1: numpy.ndarray = self.new_empty_verts()
@@ -1,9 +1,11 @@
 import numpy
 from typing import Tuple, List
+import weakref
 
 from amulet.api.chunk import Chunk
+from amulet.api.registry import BlockManager
 
-from amulet_map_editor.api.opengl.mesh import TriMesh
+from amulet_map_editor.api.opengl.mesh.chunk_tri_mesh import ChunkTriMesh, height_shade
 from amulet_map_editor.api.opengl.resource_pack import (
     OpenGLResourcePackManagerStatic,
     OpenGLResourcePack,
@@ -11,19 +13,111 @@ from amulet_map_editor.api.opengl.resource_pack import (
 
 
 try:
-    from .chunk_builder_cy import create_lod0_chunk
+    from .chunk_builder_cy import (
+        create_lod0_chunk_geometry,
+        get_block_model_manager,
+        BlockModelManager,
+    )
 except:
     raise Exception(
         "Could not import cython chunk mesher. The cython code must be compiled first."
     )
 
+# A flat array of vertices and the indices of the vertices for each triangle.
+GeometryType = Tuple[numpy.ndarray, numpy.ndarray]
+
+# The number of blocks in the x and z axis that are merged into one column in the LOD1 geometry.
+LOD1_SCALE = 4
+# The height of the columns in the LOD1 heightmap that do not contain any blocks.
+LOD1_EMPTY = numpy.iinfo(numpy.int32).min
+# How far the walls on the edge of a LOD1 chunk extend below the lowest column.
+# This hides the gaps between chunks of different heights.
+LOD1_SKIRT = 4
+
+# Look up tables to convert the min and max point of an Nx6 array of boxes into quads.
+# The values index into [min_x, min_y, min_z, max_x, max_y, max_z]
+# These match the winding order of the faces in minecraft_model_reader.
+_lod1_face_lut = {
+    "up": numpy.array([[0, 4, 5], [3, 4, 5], [3, 4, 2], [0, 4, 2]]),
+    "north": numpy.array([[3, 1, 2], [0, 1, 2], [0, 4, 2], [3, 4, 2]]),
+    "east": numpy.array([[3, 1, 5], [3, 1, 2], [3, 4, 2], [3, 4, 5]]),
+    "south": numpy.array([[0, 1, 5], [3, 1, 5], [3, 4, 5], [0, 4, 5]]),
+    "west": numpy.array([[0, 1, 2], [0, 1, 5], [0, 4, 5], [0, 4, 2]]),
+}
+_lod1_brightness = {
+    "up": 1.0,
+    "north": 0.85,
+    "east": 0.7,
+    "south": 0.85,
+    "west": 0.7,
+}
+# The UV of each corner of the quad as a multiple of the width and height of the face.
+_lod1_uv = numpy.array([[0, 1], [1, 1], [1, 0], [0, 0]], dtype=numpy.float32)
+_tri_face = numpy.array([0, 1, 2, 0, 2, 3], numpy.uint32)
+
+
+class Lod1BlockTable:
+    """The textures and tints needed to draw each block in a block palette in the LOD1 geometry.
+    The arrays are replaced rather than modified when the palette grows
+    so they can be safely read from another thread."""
+
+    def __init__(self):
+        # Does the block have a top face that should be drawn.
+        self.visible = numpy.zeros(0, dtype=bool)
+        # The texture bounds of the top and side faces.
+        self.texture_bounds = numpy.zeros((0, 2, 4), dtype=numpy.float32)
+        # The tint of the top and side faces.
+        self.tint = numpy.zeros((0, 2, 3), dtype=numpy.float32)
+
+    def __len__(self):
+        return len(self.visible)
+
+    def extend(self, resource_pack: OpenGLResourcePack, block_palette: BlockManager):
+        """Add the data for the blocks that have been added to the palette since the last call."""
+        start = len(self)
+        end = len(block_palette)
+        if start >= end:
+            return
+        visible = numpy.zeros(end - start, dtype=bool)
+        texture_bounds = numpy.zeros((end - start, 2, 4), dtype=numpy.float32)
+        tint = numpy.ones((end - start, 2, 3), dtype=numpy.float32)
+        models = resource_pack.get_block_models(
+            block_palette[block_id] for block_id in range(start, end)
+        )
+        for index, model in enumerate(models):
+            if "up" in model.faces:
+                visible[index] = True
+                for face_index, face in enumerate(("up", "north")):
+                    if face not in model.faces:
+                        face = "up"
+                    texture_bounds[index, face_index] = resource_pack.texture_bounds(
+                        model.textures[model.texture_index[face][0]]
+                    )
+                    tint[index, face_index] = model.tint_verts[face].reshape((-1, 3))[0]
+        self.visible = numpy.concatenate([self.visible, visible])
+        self.texture_bounds = numpy.concatenate([self.texture_bounds, texture_bounds])
+        self.tint = numpy.concatenate([self.tint, tint])
 
-class RenderChunkBuilder(TriMesh, OpenGLResourcePackManagerStatic):
+
+# The LOD1 tables for each block palette and resource pack.
+# {block_palette: {resource_pack: Lod1BlockTable}}
+_lod1_tables = weakref.WeakKeyDictionary()
+
+
+class RenderChunkBuilder(ChunkTriMesh, OpenGLResourcePackManagerStatic):
     """A class to define the logic to generate geometry from a block array"""
 
-    def __init__(self, context_identifier: str, resource_pack: OpenGLResourcePack):
+    # Merge the opaque full faces of neighbouring blocks into larger quads.
+    greedy_meshing = True
+
+    def __init__(
+        self,
+        context_identifier: str,
+        resource_pack: OpenGLResourcePack,
+        compact: bool = False,
+    ):
         texture = resource_pack.get_atlas_id(context_identifier)
-        TriMesh.__init__(self, context_identifier, texture)
+        ChunkTriMesh.__init__(self, context_identifier, texture, resource_pack, compact)
         OpenGLResourcePackManagerStatic.__init__(self, resource_pack)
 
     @property
@@ -48,33 +142,162 @@ class RenderChunkBuilder(TriMesh, OpenGLResourcePackManagerStatic):
 
     def _set_verts(
         self,
-        chunk_verts: List[numpy.ndarray],
-        chunk_verts_translucent: List[numpy.ndarray],
+        chunk_verts: List[GeometryType],
+        chunk_verts_translucent: List[GeometryType],
     ):
-        if chunk_verts:
-            self.verts = numpy.concatenate(chunk_verts, None)
-            self.verts_translucent = self.verts.size
-        else:
-            self.verts = self.new_empty_verts()
+        """Merge the opaque and translucent geometry into self.verts and self.indices.
+        The translucent indices are put after the opaque indices so that they are drawn last.
+
+        :param chunk_verts: A list of opaque vertices and indices.
+        :param chunk_verts_translucent: A list of translucent vertices and indices.
+        """
+        verts = [self.new_empty_verts()]
+        indices = [self.new_empty_indices()]
+        vert_count = 0
+        for geometry in (chunk_verts, chunk_verts_translucent):
+            for geometry_verts, geometry_indices in geometry:
+                verts.append(numpy.asarray(geometry_verts, dtype=numpy.float32))
+                indices.append(
+                    numpy.asarray(geometry_indices, dtype=numpy.uint32) + vert_count
+                )
+                vert_count += len(geometry_verts) // self._vert_len
+            if geometry is chunk_verts:
+                self.verts_translucent = sum(index.size for index in indices)
 
-        if chunk_verts_translucent:
-            chunk_verts_translucent.insert(0, self.verts)
-            self.verts = numpy.concatenate(chunk_verts_translucent, None)
+        self.verts = numpy.concatenate(verts)
+        self.indices = numpy.concatenate(indices)
+        self.draw_count = self.indices.size
 
-        self.draw_count = int(self.verts.size // self._vert_len)
+    def _get_block_models(self, block_palette: BlockManager) -> BlockModelManager:
+        """Get the block models for every block in the block palette.
+        This reads the block palette so must be run from the thread that owns the level.
+
+        :param block_palette: The block palette the block arrays index into.
+        :return: The block models to pass to _create_lod0_multi.
+        """
+        return get_block_model_manager(self.resource_pack, block_palette)
+
+    def _get_lod1_table(self, block_palette: BlockManager) -> Lod1BlockTable:
+        """Get the LOD1 data for every block in the block palette.
+        This reads the block palette so must be run from the thread that owns the level.
+
+        :param block_palette: The block palette the block arrays index into.
+        :return: The table to pass to _create_lod1.
+        """
+        tables = _lod1_tables.setdefault(block_palette, weakref.WeakKeyDictionary())
+        table = tables.get(self.resource_pack)
+        if table is None:
+            table = tables[self.resource_pack] = Lod1BlockTable()
+        table.extend(self.resource_pack, block_palette)
+        return table
+
+    def _create_lod1(
+        self,
+        heights: numpy.ndarray,
+        blocks: numpy.ndarray,
+        block_table: Lod1BlockTable,
+    ) -> GeometryType:
+        """Create the low detail geometry for a chunk from a heightmap.
+        Each column is drawn as a box from the top block down to the neighbouring columns.
+        This does not access the level so can be run from any thread.
+
+        :param heights: A 2D int array of the y coordinate of the top block in each LOD1_SCALE wide column. LOD1_EMPTY if the column has no blocks.
+        :param blocks: The block palette index of the top block in each column.
+        :param block_table: The table returned by _get_lod1_table.
+        :return: The vertices and indices for the chunk.
+        """
+        filled = heights != LOD1_EMPTY
+        if not filled.any():
+            return self.new_empty_verts(), self.new_empty_indices()
+        tops = heights.astype(numpy.float32) + 1
+        skirt = tops[filled].min() - LOD1_SKIRT
+        tops[~filled] = skirt
+
+        # the top of the neighbouring columns. The columns outside of the chunk use the skirt height.
+        padded = numpy.pad(tops, 1, constant_values=skirt)
+        neighbour_tops = {
+            "north": padded[1:-1, :-2],
+            "east": padded[2:, 1:-1],
+            "south": padded[1:-1, 2:],
+            "west": padded[:-2, 1:-1],
+        }
+
+        x, z = numpy.meshgrid(
+            numpy.arange(tops.shape[0], dtype=numpy.float32) * LOD1_SCALE,
+            numpy.arange(tops.shape[1], dtype=numpy.float32) * LOD1_SCALE,
+            indexing="ij",
+        )
+
+        quads = []
+        for face, face_lut in _lod1_face_lut.items():
+            if face == "up":
+                mask = filled
+                bottoms = tops
+            else:
+                bottoms = neighbour_tops[face]
+                mask = filled & (bottoms < tops)
+            if not mask.any():
+                continue
+            boxes = numpy.stack(
+                [
+                    x[mask],
+                    bottoms[mask],
+                    z[mask],
+                    x[mask] + LOD1_SCALE,
+                    tops[mask],
+                    z[mask] + LOD1_SCALE,
+                ],
+                -1,
+            )
+            face_index = 0 if face == "up" else 1
+            face_blocks = blocks[mask]
+
+            quad = numpy.empty((len(boxes), 4, self._vert_len), dtype=numpy.float32)
+            quad[:, :, :3] = boxes[:, face_lut] + self.offset
+            # the texture is repeated once per block
+            if face == "up":
+                uv_scale = numpy.full((len(boxes), 2), LOD1_SCALE, numpy.float32)
+            else:
+                uv_scale = numpy.stack(
+                    [
+                        numpy.full(len(boxes), LOD1_SCALE, numpy.float32),
+                        boxes[:, 4] - boxes[:, 1],
+                    ],
+                    -1,
+                )
+            quad[:, :, 3:5] = _lod1_uv * uv_scale[:, None, :]
+            quad[:, :, 5:9] = block_table.texture_bounds[face_blocks, face_index][
+                :, None, :
+            ]
+            quad[:, :, 9:12] = (
+                block_table.tint[face_blocks, face_index][:, None, :]
+                * _lod1_brightness[face]
+            )
+            quads.append(quad.reshape((-1, self._vert_len)))
+
+        verts = numpy.concatenate(quads)
+        # apply the same height based shading as the LOD0 geometry
+        verts[:, 9:12] *= height_shade(verts[:, 1])[:, None]
+        indices = (
+            _tri_face + numpy.arange(0, len(verts), 4, dtype=numpy.uint32)[:, None]
+        ).ravel()
+        return verts.ravel(), indices
 
     def _create_lod0_multi(
-        self, blocks: List[Tuple[numpy.ndarray, int]]
-    ) -> Tuple[List[numpy.ndarray], List[numpy.ndarray]]:
+        self,
+        blocks: List[Tuple[numpy.ndarray, int]],
+        block_models: BlockModelManager,
+    ) -> Tuple[List[GeometryType], List[GeometryType]]:
         """Create LOD0 geometry data for every sub-chunk in a given chunk.
+        This does not access the level so can be run from any thread.
 
         :param blocks: A list of tuples containing block arrays extending one block outside the sub-chunk in each direction.
-        :return: Opaque block vertices, translucent block vertices.
+        :param block_models: The block models returned by _get_block_models.
+        :return: Opaque block vertices and indices, translucent block vertices and indices.
         """
-        return create_lod0_chunk(
-            self.resource_pack,
+        return create_lod0_chunk_geometry(
+            block_models,
             self.offset,
             blocks,
-            self.chunk.block_palette,
-            self._vert_len,
+            self.greedy_meshing,
         )
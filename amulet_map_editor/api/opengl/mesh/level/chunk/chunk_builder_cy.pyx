@@ -12,6 +12,9 @@ cdef extern from "stdlib.h":
 
 from cpython cimport array
 import array
+import threading
+import weakref
+from collections import OrderedDict
 from cython.parallel import prange
 
 cdef float _brightness_step = 0.15
@@ -44,9 +47,34 @@ CULL_MAP[4][:] = (1, 0, 0)
 CULL_MAP[5][:] = (0, 0, 1)
 CULL_MAP[6][:] = (-1, 0, 0)
 
+# The axis normal to each culled face followed by the two axes in the plane of the face.
+FACE_AXES = {
+    "up": (1, 0, 2),
+    "down": (1, 0, 2),
+    "north": (2, 0, 1),
+    "east": (0, 2, 1),
+    "south": (2, 0, 1),
+    "west": (0, 2, 1),
+}
+# The position of each culled face along its normal axis.
+FACE_PLANE = {
+    "up": 1,
+    "down": 0,
+    "north": 0,
+    "east": 1,
+    "south": 1,
+    "west": 0,
+}
+
+cdef int FACE_AXES_MAP[7][3]
+FACE_AXES_MAP[0][:] = (0, 0, 0)
+for _cull_dir, _axes in FACE_AXES.items():
+    FACE_AXES_MAP[CULL_STR_INDEX[_cull_dir]][:] = _axes
+
 DEF ARRAY_VERT_COUNT = 10_008  # The number of vertices in the table
 DEF ATTR_COUNT = 12  # The number of float attributes per vertex
 DEF ARRAY_SIZE = ARRAY_VERT_COUNT * ATTR_COUNT
+DEF ARRAY_INDEX_SIZE = ARRAY_VERT_COUNT * 3  # The number of indices in the table
 
 cdef struct BlockArray:
     unsigned int* arr  # pointer to the array
@@ -92,43 +120,68 @@ cdef void BlockArray_free(BlockArray* self) nogil:
 cdef struct VertArray:
     float* arr  # pointer to the array
     int size  # the number of floats in the array
+    unsigned int* indices  # pointer to the array of vertex indices
+    int index_size  # the number of indices in the index array
 
-cdef VertArray* VertArray_new(unsigned long size) nogil:
+cdef VertArray* VertArray_new(unsigned long size, unsigned long index_size) nogil:
     # assert size and size % (ATTR_COUNT*3) == 0, "arr must have a multiple of 36 values"
     vert_array = <VertArray*>calloc(1, sizeof(VertArray))
     vert_array.arr = <float*>malloc(size * sizeof(float))
     vert_array.size = size
+    vert_array.indices = <unsigned int*>malloc(index_size * sizeof(unsigned int))
+    vert_array.index_size = index_size
     return vert_array
 
-cdef VertArray* VertArray_init(float* arr, unsigned long size) nogil:
-    vert_array = VertArray_new(size)
+cdef VertArray* VertArray_init(float* arr, unsigned long size, unsigned int* indices, unsigned long index_size) nogil:
+    vert_array = VertArray_new(size, index_size)
     memcpy(vert_array.arr, arr, size * sizeof(float))
+    memcpy(vert_array.indices, indices, index_size * sizeof(unsigned int))
+    return vert_array
+
+cdef VertArray* VertArray_new_table() nogil:
+    # create an empty table to write faces into
+    vert_array = VertArray_new(ARRAY_SIZE, ARRAY_INDEX_SIZE)
+    vert_array.size = 0
+    vert_array.index_size = 0
     return vert_array
 
 cdef void VertArray_free(VertArray* vert_array) nogil:
     free(vert_array.arr)
+    free(vert_array.indices)
     free(vert_array)
 
-cdef VertArray* VertArray_from_py(array.array arr):
+cdef VertArray* VertArray_from_py(array.array arr, array.array indices):
     assert arr.typecode == "f", "arr must be a float array"
-    return VertArray_init(&arr.data.as_floats[0], len(arr))
+    assert indices.typecode == "I", "indices must be an unsigned int array"
+    return VertArray_init(&arr.data.as_floats[0], len(arr), &indices.data.as_uints[0], len(indices))
 
 
 cdef struct BlockModel:
     VertArray* faces[7]
     char is_transparent
+    int merge_key[7]  # faces with the same key can be greedy merged. -1 if the face cannot be merged
+    float merge_uv[7][4]  # the change in texture coordinates along the two face axes
 
-cdef BlockModel* BlockModel_init(dict face_data, char is_transparent):
+cdef BlockModel* BlockModel_init(dict face_data, char is_transparent, dict merge_keys, dict merge_data):
     block_model = <BlockModel*>calloc(1, sizeof(BlockModel))
     block_model.is_transparent = is_transparent
-    cdef Py_ssize_t index
+    cdef Py_ssize_t index, i
     for cull_id, index in CULL_STR_INDEX.items():
+        block_model.merge_key[index] = -1
         if cull_id in face_data:
-            arr = face_data[cull_id]
+            arr, indices = face_data[cull_id]
+            if cull_id in merge_data:
+                block_model.merge_key[index] = merge_keys.setdefault(
+                    (cull_id, arr.tobytes(), indices.tobytes()), len(merge_keys)
+                )
+                for i in range(4):
+                    block_model.merge_uv[index][i] = merge_data[cull_id][i]
             if isinstance(arr, numpy.ndarray):
                 arr = array.array("f", arr.ravel())
+            if isinstance(indices, numpy.ndarray):
+                indices = array.array("I", indices.astype(numpy.uint32).ravel())
             if isinstance(arr, array.array) and arr.typecode == "f":
-                block_model.faces[index] = VertArray_from_py(arr)
+                block_model.faces[index] = VertArray_from_py(arr, indices)
         else:
             block_model.faces[index] = NULL
     return block_model
@@ -141,10 +194,37 @@ cdef void BlockModel_free(BlockModel* block_model) nogil:
     free(block_model)
 
 
+cdef class BlockModelEntry:
+    """The geometry for one block. This owns the BlockModel struct and frees it when it is destroyed.
+    An entry can be used by many BlockModelManagers."""
+    cdef BlockModel* model
+
+    def __cinit__(self):
+        self.model = NULL
+
+    def __init__(self, dict face_data, int is_transparent, dict merge_keys, dict merge_data=None):
+        """Create the geometry for a block.
+
+        :param face_data: A dictionary mapping cull direction to the vertex table and vertex indices for those faces.
+        :param is_transparent: 0 for opaque, 1 for full transparent blocks, 2 for other transparent blocks.
+        :param merge_keys: A map from the face data to the merge key. Faces can only be merged with faces created with the same dictionary.
+        :param merge_data: A dictionary mapping cull direction to the change in texture coordinates along the two face axes for the faces that can be greedy merged.
+        """
+        self.model = BlockModel_init(
+            face_data, is_transparent, merge_keys, merge_data or {}
+        )
+
+    def __dealloc__(self):
+        if self.model:
+            BlockModel_free(self.model)
+
+
 cdef class BlockModelManager:
+    """The geometry for each block in a block palette."""
     cdef BlockModel** blocks  # A pointer to an array of pointers to BlockModel structs
     cdef unsigned long block_size  # The size of the blocks array
     cdef unsigned long block_count  # The amount of the blocks array that is used
+    cdef list entries  # The BlockModelEntry that owns each BlockModel. This keeps the models alive.
 
     def __cinit__(self):
         self.blocks = NULL
@@ -154,10 +234,9 @@ cdef class BlockModelManager:
     def __init__(self):
         self.blocks = <BlockModel**>calloc(100, sizeof(BlockModel*))
         self.block_size = 100
+        self.entries = []
 
     def __dealloc__(self):
-        for i in range(self.block_count):
-            BlockModel_free(self.blocks[i])
         free(self.blocks)
 
     cdef _extend(self):
@@ -168,9 +247,11 @@ cdef class BlockModelManager:
             self.blocks = blocks_temp
             self.block_size += 100
 
-    cpdef add_block(self, dict face_data, int is_transparent):
+    cpdef add_block(self, BlockModelEntry entry):
+        """Add the geometry for the next block in the block palette."""
         self._extend()
-        self.blocks[self.block_count] = BlockModel_init(face_data, is_transparent)
+        self.entries.append(entry)
+        self.blocks[self.block_count] = entry.model
         self.block_count += 1
 
     def __len__(self):
@@ -233,24 +314,156 @@ cdef unsigned int get_block(
 ) nogil:
     return block_array.arr[x * block_array.sz * block_array.sy + y * block_array.sz + z]
 
+cdef VertArray* append_face(
+    VertArrayContainer* container,
+    VertArray* vert_table,
+    VertArray* face,
+) nogil:
+    # Copy the vertices and indices of a face to the end of vert_table.
+    # If vert_table is full it is moved into container and a new table is started.
+    # Returns the table the face was written to. The face vertices are the last face.size values in the table.
+    cdef int i
+    cdef unsigned int vert_offset
+    if vert_table.size + face.size > ARRAY_SIZE or vert_table.index_size + face.index_size > ARRAY_INDEX_SIZE:
+        VertArrayContainer_append(container, vert_table)
+        vert_table = VertArray_new_table()
+    vert_offset = vert_table.size // ATTR_COUNT
+    memcpy(&vert_table.arr[vert_table.size], face.arr, face.size * sizeof(float))
+    for i in range(face.index_size):
+        vert_table.indices[vert_table.index_size + i] = face.indices[i] + vert_offset
+    vert_table.size += face.size
+    vert_table.index_size += face.index_size
+    return vert_table
+
+cdef inline void shade_vertex(float* vertex) nogil:
+    # darken the vertex tint based on its height
+    cdef float shade = ((vertex[1] / 32) % 2)
+    if shade > 1:
+        shade = - shade + 2
+    shade = 0.9 + 0.2 * shade
+    vertex[9] *= shade
+    vertex[10] *= shade
+    vertex[11] *= shade
+
+cdef inline unsigned int merge_mask_index(int* size, int* pos) nogil:
+    return pos[0] * size[1] * size[2] + pos[1] * size[2] + pos[2]
+
+cdef inline int merge_mask_key(
+    unsigned int* merge_mask,
+    BlockModel** block_models,
+    unsigned int cull_id,
+) nogil:
+    # the merge key of the face stored in the mask or -1 if there is no face
+    if merge_mask[0]:
+        return block_models[merge_mask[0] - 1].merge_key[cull_id]
+    return -1
+
+cdef VertArray* greedy_merge_sub_chunk(
+    BlockArray* block_array,
+    BlockModel** block_models,
+    unsigned int* merge_mask,
+    VertArrayContainer* container,
+    VertArray* vert_table,
+) nogil:
+    """Merge the faces stored in the merge mask into the largest quads possible.
+    Faces are added to vert_table and full tables are moved into container.
+    Returns the vert table currently being filled."""
+    cdef int size[3]
+    cdef int pos[3]
+    size[0] = block_array.sx - 2
+    size[1] = block_array.sy - 2
+    size[2] = block_array.sz - 2
+    cdef unsigned int volume = size[0] * size[1] * size[2]
+
+    cdef int normal, u_axis, v_axis, layer, u, v, w, h, i, j, merge_key
+    cdef bint row_matches
+    cdef unsigned int cull_id, block_id, vertex
+    cdef unsigned int* cull_mask
+    cdef BlockModel* block_model
+    cdef VertArray* vert_array
+    cdef float du, dv
+
+    for cull_id in range(1, 7):
+        normal = FACE_AXES_MAP[cull_id][0]
+        u_axis = FACE_AXES_MAP[cull_id][1]
+        v_axis = FACE_AXES_MAP[cull_id][2]
+        cull_mask = &merge_mask[(cull_id - 1) * volume]
+        for layer in range(size[normal]):
+            pos[normal] = layer
+            for v in range(size[v_axis]):
+                for u in range(size[u_axis]):
+                    pos[u_axis] = u
+                    pos[v_axis] = v
+                    block_id = cull_mask[merge_mask_index(size, pos)]
+                    if not block_id:
+                        continue
+                    block_model = block_models[block_id - 1]
+                    merge_key = block_model.merge_key[cull_id]
+
+                    # extend the quad along the u axis as far as possible
+                    w = 1
+                    while u + w < size[u_axis]:
+                        pos[u_axis] = u + w
+                        if merge_mask_key(&cull_mask[merge_mask_index(size, pos)], block_models, cull_id) != merge_key:
+                            break
+                        w += 1
+
+                    # then extend it along the v axis while the whole row matches
+                    h = 1
+                    row_matches = True
+                    while row_matches and v + h < size[v_axis]:
+                        pos[v_axis] = v + h
+                        for i in range(w):
+                            pos[u_axis] = u + i
+                            if merge_mask_key(&cull_mask[merge_mask_index(size, pos)], block_models, cull_id) != merge_key:
+                                row_matches = False
+                                break
+                        if row_matches:
+                            h += 1
+
+                    # remove the merged faces from the mask
+                    for j in range(h):
+                        pos[v_axis] = v + j
+                        for i in range(w):
+                            pos[u_axis] = u + i
+                            cull_mask[merge_mask_index(size, pos)] = 0
+
+                    pos[u_axis] = u
+                    pos[v_axis] = v
+                    vert_array = block_model.faces[cull_id]
+                    vert_table = append_face(container, vert_table, vert_array)
+                    for vertex in range(vert_table.size - vert_array.size, vert_table.size, ATTR_COUNT):
+                        # stretch the face over the merged area and tile the texture to match
+                        du = vert_table.arr[vertex + u_axis] * (w - 1)
+                        dv = vert_table.arr[vertex + v_axis] * (h - 1)
+                        vert_table.arr[vertex + u_axis] += du
+                        vert_table.arr[vertex + v_axis] += dv
+                        vert_table.arr[vertex + 3] += block_model.merge_uv[cull_id][0] * du + block_model.merge_uv[cull_id][2] * dv
+                        vert_table.arr[vertex + 4] += block_model.merge_uv[cull_id][1] * du + block_model.merge_uv[cull_id][3] * dv
+                        vert_table.arr[vertex + 0] += block_array.dx + pos[0]
+                        vert_table.arr[vertex + 1] += block_array.dy + pos[1]
+                        vert_table.arr[vertex + 2] += block_array.dz + pos[2]
+                        shade_vertex(&vert_table.arr[vertex])
+
+    return vert_table
+
 cdef VertArrayContainerTuple* create_lod0_sub_chunk(
     BlockArray* block_array,
-    BlockModelManager block_model_manager,
+    BlockModel** block_models,
+    bint greedy,
 ) nogil:
     cdef int x, y, z, x_, y_, z_, dx, dy, dz  # location variables
 
     # float counters
-    cdef unsigned int vert_count, vert_end, vertex, vertex_attr
+    cdef unsigned int vertex
 
-    cdef float shade
     cdef unsigned int block_id, cull_id
     cdef BlockModel* block_model
     cdef VertArray* vert_array
+    cdef VertArray* table
 
-    cdef VertArray* vert_table = VertArray_new(ARRAY_SIZE)
-    vert_table.size = 0
-    cdef VertArray* trans_vert_table = VertArray_new(ARRAY_SIZE)
-    trans_vert_table.size = 0
+    cdef VertArray* vert_table = VertArray_new_table()
+    cdef VertArray* trans_vert_table = VertArray_new_table()
 
     cdef int size_x = block_array.sx - 2
     cdef int size_y = block_array.sy - 2
@@ -258,6 +471,12 @@ cdef VertArrayContainerTuple* create_lod0_sub_chunk(
 
     cdef VertArrayContainerTuple* verts = VertArrayContainerTuple_init()
 
+    # The faces that can be greedy merged are stored here and merged once all blocks have been visited.
+    # One block array for each cull direction storing the block id + 1 of the face or 0 if there is no face.
+    cdef unsigned int* merge_mask = NULL
+    if greedy:
+        merge_mask = <unsigned int*>calloc(6 * size_x * size_y * size_z, sizeof(unsigned int))
+
     for x in range(size_x):
         for y in range(size_y):
             for z in range(size_z):
@@ -265,7 +484,7 @@ cdef VertArrayContainerTuple* create_lod0_sub_chunk(
                 y_ = y + 1
                 z_ = z + 1
                 block_id = get_block(block_array, x_, y_, z_)
-                block_model = block_model_manager.blocks[block_id]
+                block_model = block_models[block_id]
                 for cull_id in range(7):
                     if block_model.faces[cull_id]:
                         # iterate through each cull direction
@@ -274,51 +493,30 @@ cdef VertArrayContainerTuple* create_lod0_sub_chunk(
                             dy = y_ + CULL_MAP[cull_id][1]
                             dz = z_ + CULL_MAP[cull_id][2]
                             # If the next block is opaque or both blocks are full transparent blocks, do nothing
-                            if block_model_manager.blocks[get_block(block_array, dx, dy, dz)].is_transparent == 0 or \
-                               block_model_manager.blocks[get_block(block_array, dx, dy, dz)].is_transparent == block_model_manager.blocks[get_block(block_array, x_, y_, z_)].is_transparent == 1:
+                            if block_models[get_block(block_array, dx, dy, dz)].is_transparent == 0 or \
+                               block_models[get_block(block_array, dx, dy, dz)].is_transparent == block_models[get_block(block_array, x_, y_, z_)].is_transparent == 1:
                                 continue
 
-                        vert_array = block_model.faces[cull_id]
-                        vert_count = vert_array.size
+                        if merge_mask and block_model.merge_key[cull_id] >= 0:
+                            merge_mask[(cull_id - 1) * size_x * size_y * size_z + x * size_y * size_z + y * size_z + z] = block_id + 1
+                            continue
 
+                        vert_array = block_model.faces[cull_id]
                         if block_model.is_transparent == 1:
-                            vert_end = trans_vert_table.size+vert_count
-                            if vert_end > ARRAY_SIZE:
-                                VertArrayContainer_append(verts.verts_translucent, trans_vert_table)
-                                trans_vert_table = VertArray_new(ARRAY_SIZE)
-                                trans_vert_table.size = 0
-                                vert_end = vert_count
-                            memcpy(&trans_vert_table.arr[trans_vert_table.size], vert_array.arr, vert_count * sizeof(float))
-                            for vertex in range(trans_vert_table.size, vert_end, ATTR_COUNT):
-                                trans_vert_table.arr[vertex + 0] += block_array.dx + x
-                                trans_vert_table.arr[vertex + 1] += block_array.dy + y
-                                trans_vert_table.arr[vertex + 2] += block_array.dz + z
-                                shade = ((trans_vert_table.arr[vertex + 1] / 32) % 2)
-                                if shade > 1:
-                                    shade = - shade + 2
-                                shade = 0.9 + 0.2 * shade
-                                for vertex_attr in range(9, 12):
-                                    trans_vert_table.arr[vertex + vertex_attr] *= shade
-                            trans_vert_table.size += vert_count
+                            trans_vert_table = append_face(verts.verts_translucent, trans_vert_table, vert_array)
+                            table = trans_vert_table
                         else:
-                            vert_end = vert_table.size+vert_count
-                            if vert_end > ARRAY_SIZE:
-                                VertArrayContainer_append(verts.verts, vert_table)
-                                vert_table = VertArray_new(ARRAY_SIZE)
-                                vert_table.size = 0
-                                vert_end = vert_count
-                            memcpy(&vert_table.arr[vert_table.size], vert_array.arr, vert_count * sizeof(float))
-                            for vertex in range(vert_table.size, vert_end, ATTR_COUNT):
-                                vert_table.arr[vertex + 0] += block_array.dx + x
-                                vert_table.arr[vertex + 1] += block_array.dy + y
-                                vert_table.arr[vertex + 2] += block_array.dz + z
-                                shade = ((vert_table.arr[vertex + 1] / 32) % 2)
-                                if shade > 1:
-                                    shade = - shade + 2
-                                shade = 0.9 + 0.2 * shade
-                                for vertex_attr in range(9, 12):
-                                    vert_table.arr[vertex + vertex_attr] *= shade
-                            vert_table.size += vert_count
+                            vert_table = append_face(verts.verts, vert_table, vert_array)
+                            table = vert_table
+                        for vertex in range(table.size - vert_array.size, table.size, ATTR_COUNT):
+                            table.arr[vertex + 0] += block_array.dx + x
+                            table.arr[vertex + 1] += block_array.dy + y
+                            table.arr[vertex + 2] += block_array.dz + z
+                            shade_vertex(&table.arr[vertex])
+
+    if merge_mask:
+        vert_table = greedy_merge_sub_chunk(block_array, block_models, merge_mask, verts.verts, vert_table)
+        free(merge_mask)
 
     if vert_table.size:
         VertArrayContainer_append(verts.verts, vert_table)
@@ -335,7 +533,8 @@ cdef VertArrayContainerTuple* create_lod0_sub_chunk(
 cdef tuple _create_lod0_chunk(
     BlockModelManager block_model_manager,
     list blocks,
-    long[:] chunk_offset
+    long[:] chunk_offset,
+    bint greedy,
 ):
     cdef int i, j
     cdef long sub_chunk_y
@@ -344,6 +543,13 @@ cdef tuple _create_lod0_chunk(
     block_array_list = <BlockArray**>calloc(sub_chunk_count, sizeof(BlockArray*))
     sub_chunk_verts = <VertArrayContainerTuple**>calloc(sub_chunk_count, sizeof(VertArrayContainerTuple*))
 
+    # Take a copy of the model pointers while we hold the GIL.
+    # Another thread may extend the manager (which reallocates the pointer array) while we are meshing.
+    # The models themselves are kept alive by the manager.
+    cdef unsigned long block_count = block_model_manager.block_count
+    block_models = <BlockModel**>malloc(block_count * sizeof(BlockModel*))
+    memcpy(block_models, block_model_manager.blocks, block_count * sizeof(BlockModel*))
+
     for i in range(sub_chunk_count):
         block_array, sub_chunk_y = blocks[i]
         block_array_list[i] = BlockArray_init(
@@ -360,102 +566,264 @@ cdef tuple _create_lod0_chunk(
     # for i in range(sub_chunk_count):
         sub_chunk_verts[i] = create_lod0_sub_chunk(
             block_array_list[i],
-            block_model_manager,
+            block_models,
+            greedy,
         )
 
     for i in range(sub_chunk_count):
         BlockArray_free(block_array_list[i])
     free(block_array_list)
+    free(block_models)
+
+    geometry = (
+        _merge_vert_arrays(sub_chunk_verts, sub_chunk_count, False),
+        _merge_vert_arrays(sub_chunk_verts, sub_chunk_count, True),
+    )
 
+    for i in range(sub_chunk_count):
+        VertArrayContainerTuple_free(sub_chunk_verts[i])
+    free(sub_chunk_verts)
+
+    return [geometry[0]], [geometry[1]]
+
+
+cdef tuple _merge_vert_arrays(
+    VertArrayContainerTuple** sub_chunk_verts,
+    int sub_chunk_count,
+    bint translucent,
+):
+    # Merge the opaque or translucent vertex tables of every sub-chunk into one vertex and index array.
+    cdef int i, j, k
     cdef unsigned long vert_size = 0
-    cdef unsigned long vert_size_translucent = 0
-    cdef VertArrayContainerTuple* vert_array_container_tuple
+    cdef unsigned long index_size = 0
+    cdef unsigned int vert_offset
     cdef VertArrayContainer* vert_array_container
     cdef VertArray* vert_array
 
     for i in range(sub_chunk_count):
-        vert_array_container_tuple = sub_chunk_verts[i]
-        vert_array_container = vert_array_container_tuple.verts
+        if translucent:
+            vert_array_container = sub_chunk_verts[i].verts_translucent
+        else:
+            vert_array_container = sub_chunk_verts[i].verts
         for j in range(vert_array_container.used):
             vert_array = vert_array_container.arrays[j]
             vert_size += vert_array.size
-        vert_array_container = vert_array_container_tuple.verts_translucent
-        for j in range(vert_array_container.used):
-            vert_array = vert_array_container.arrays[j]
-            vert_size_translucent += vert_array.size
+            index_size += vert_array.index_size
 
     chunk_verts = array.clone(array.array("f"), vert_size, zero=False)
-    chunk_verts_translucent = array.clone(array.array("f"), vert_size_translucent, zero=False)
+    chunk_indices = array.clone(array.array("I"), index_size, zero=False)
 
     vert_size = 0
-    vert_size_translucent = 0
+    index_size = 0
 
     for i in range(sub_chunk_count):
-        vert_array_container_tuple = sub_chunk_verts[i]
-        vert_array_container = vert_array_container_tuple.verts
+        if translucent:
+            vert_array_container = sub_chunk_verts[i].verts_translucent
+        else:
+            vert_array_container = sub_chunk_verts[i].verts
         for j in range(vert_array_container.used):
             vert_array = vert_array_container.arrays[j]
             memcpy(&chunk_verts.data.as_floats[vert_size], vert_array.arr, vert_array.size * sizeof(float))
+            # the indices are relative to the start of the table
+            vert_offset = vert_size // ATTR_COUNT
+            for k in range(vert_array.index_size):
+                chunk_indices.data.as_uints[index_size + k] = vert_array.indices[k] + vert_offset
             vert_size += vert_array.size
-        vert_array_container = vert_array_container_tuple.verts_translucent
-        for j in range(vert_array_container.used):
-            vert_array = vert_array_container.arrays[j]
-            memcpy(&chunk_verts_translucent.data.as_floats[vert_size_translucent], vert_array.arr, vert_array.size * sizeof(float))
-            vert_size_translucent += vert_array.size
-
-    for i in range(sub_chunk_count):
-        VertArrayContainerTuple_free(sub_chunk_verts[i])
-    free(sub_chunk_verts)
+            index_size += vert_array.index_size
+
+    return chunk_verts, chunk_indices
+
+
+_block_model_lock = threading.RLock()
+
+
+def _get_merge_data(py_cull_dir, py_vert_table):
+    """Find if a face covers the whole side of the block so that it can be greedy merged with its neighbours.
+
+    :param py_cull_dir: The cull direction of the face.
+    :param py_vert_table: The vertex table for the face.
+    :return: The change in texture coordinates along the two face axes or None if the face cannot be merged.
+    """
+    if py_vert_table.shape[0] != 6:
+        # the face must be one quad
+        return None
+    if not numpy.all(py_vert_table[:, 5:] == py_vert_table[0, 5:]):
+        # the texture and tint must be the same across the quad
+        return None
+    normal, u_axis, v_axis = FACE_AXES[py_cull_dir]
+    verts = numpy.round(py_vert_table[:, :3], 4)
+    if not numpy.all(verts[:, normal] == FACE_PLANE[py_cull_dir]):
+        return None
+    corners = {}
+    for vert, uv in zip(verts, py_vert_table[:, 3:5]):
+        corner = (vert[u_axis], vert[v_axis])
+        if corner not in ((0, 0), (1, 0), (0, 1), (1, 1)):
+            return None
+        if not numpy.array_equal(corners.setdefault(corner, uv), uv):
+            return None
+    if len(corners) != 4:
+        return None
+    # The texture coordinates must change by a whole texture along each axis so that they can be tiled.
+    du = corners[(1, 0)] - corners[(0, 0)]
+    dv = corners[(0, 1)] - corners[(0, 0)]
+    if not (
+        numpy.allclose(corners[(1, 1)], corners[(0, 0)] + du + dv)
+        and numpy.allclose(du, numpy.round(du))
+        and numpy.allclose(dv, numpy.round(dv))
+    ):
+        return None
+    return (*numpy.round(du), *numpy.round(dv))
+
+
+class BlockModelCache:
+    """A least recently used cache of the geometry for each block.
+    The geometry depends on the resource pack and the texture atlas so the key must identify both.
+    The entries are shared by the BlockModelManagers of every block palette using the same resource pack.
+    A BlockModelManager keeps its entries alive so entries can be evicted while they are in use."""
+
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        # Faces with the same key can be greedy merged.
+        # This is shared by all entries so that faces of different entries can be merged.
+        self.merge_keys = {}
 
-    return [chunk_verts], [chunk_verts_translucent]
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Get an entry and mark it as recently used.
+
+        :param key: The key the entry was stored with.
+        :return: The BlockModelEntry or None if it is not cached.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, BlockModelEntry entry):
+        """Store an entry, evicting the least recently used entries if the cache is full."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries. The merge keys are kept because entries in use still refer to them."""
+        self._entries.clear()
+
+
+# The number of block models stored in the cache.
+BLOCK_MODEL_CACHE_SIZE = 8192
+block_model_cache = BlockModelCache(BLOCK_MODEL_CACHE_SIZE)
+
+# The BlockModelManager for each block palette and resource pack.
+# {block_palette: {resource_pack: BlockModelManager}}
+_block_model_managers = weakref.WeakKeyDictionary()
+
+
+def _create_block_model(resource_pack, model) -> BlockModelEntry:
+    """Create the geometry for a block model from the resource pack."""
+    vert_map = {}
+    merge_map = {}
+    for py_cull_dir in model.faces.keys():
+        if py_cull_dir in CULL_STR_INDEX:
+            # the vertices in model space
+            verts = model.verts[py_cull_dir].reshape((-1, 3))
+            tverts = model.texture_coords[py_cull_dir].reshape((-1, 2))
+            faces = model.faces[py_cull_dir]
+
+            py_vert_table = numpy.zeros(
+                (faces.size, ATTR_COUNT), dtype=numpy.float32
+            )
+            py_vert_table[:, :3] = verts[faces]
+            py_vert_table[:, 3:5] = tverts[faces]
+
+            vert_index = 0
+            for texture_index in model.texture_index[py_cull_dir]:
+                py_vert_table[vert_index : vert_index + 3, 5:9] = resource_pack.texture_bounds(model.textures[texture_index])
+                vert_index += 3
+
+            py_vert_table[:, 9:12] = (
+                model.tint_verts[py_cull_dir].reshape((-1, 3))[faces]
+                * _brightness_multiplier[py_cull_dir]
+            )
+            if py_cull_dir is not None and model.is_transparent == 0:
+                merge_data = _get_merge_data(py_cull_dir, py_vert_table)
+                if merge_data is not None:
+                    merge_map[py_cull_dir] = merge_data
+            # share the vertices that are identical between triangles
+            py_vert_table, py_indices = numpy.unique(
+                py_vert_table, axis=0, return_inverse=True
+            )
+            vert_map[py_cull_dir] = (
+                py_vert_table,
+                py_indices.reshape(-1).astype(numpy.uint32),
+            )
+    return BlockModelEntry(
+        vert_map, model.is_transparent, block_model_cache.merge_keys, merge_map
+    )
 
 
 def _extend_blocks(resource_pack, block_palette):
-    # TODO: This is kind of janky
-    #  set up a proper location for these
-    #  This needs to be cached somewhere so that the geometry does not need recreating each time.
-    #  The issue is that the cache is dependent on the resource pack being used and the block palette it is applied to
-    if not hasattr(resource_pack, "block_model_manager"):
-        resource_pack.block_model_manager = {}
-    if id(block_palette) not in resource_pack.block_model_manager:
-        resource_pack.block_model_manager[id(block_palette)] = BlockModelManager()
-
-    block_model_manager = resource_pack.block_model_manager[id(block_palette)]
+    managers = _block_model_managers.setdefault(
+        block_palette, weakref.WeakKeyDictionary()
+    )
+    block_model_manager = managers.get(resource_pack)
+    if block_model_manager is None:
+        block_model_manager = managers[resource_pack] = BlockModelManager()
 
     done_count = len(block_model_manager)
     state_count = len(block_palette)
-
-    for block_id in range(done_count, state_count):
+    if done_count < state_count:
         # more block states have been added
-
-        model = resource_pack.get_block_model(
-            block_palette[block_id]
+        pack_key = (resource_pack.pack_hash, resource_pack.atlas_hash)
+        keys = [
+            (pack_key, block_palette[block_id])
+            for block_id in range(done_count, state_count)
+        ]
+        entries = [block_model_cache.get(key) for key in keys]
+        # load the models of the blocks that are not cached in one batch
+        missing = [key for key, entry in zip(keys, entries) if entry is None]
+        models = dict(
+            zip(
+                missing,
+                resource_pack.get_block_models([block for _, block in missing]),
+            )
         )
-        vert_map = {}
-        for py_cull_dir in model.faces.keys():
-            if py_cull_dir in CULL_STR_INDEX:
-                # the vertices in model space
-                verts = model.verts[py_cull_dir].reshape((-1, 3))
-                tverts = model.texture_coords[py_cull_dir].reshape((-1, 2))
-                faces = model.faces[py_cull_dir]
-
-                py_vert_table = numpy.zeros(
-                    (faces.size, ATTR_COUNT), dtype=numpy.float32
-                )
-                py_vert_table[:, :3] = verts[faces]
-                py_vert_table[:, 3:5] = tverts[faces]
+        for key, entry in zip(keys, entries):
+            if entry is None:
+                entry = _create_block_model(resource_pack, models[key])
+                block_model_cache.put(key, entry)
+            block_model_manager.add_block(entry)
 
-                vert_index = 0
-                for texture_index in model.texture_index[py_cull_dir]:
-                    py_vert_table[vert_index : vert_index + 3, 5:9] = resource_pack.texture_bounds(model.textures[texture_index])
-                    vert_index += 3
+    return block_model_manager
 
-                py_vert_table[:, 9:12] = (
-                    model.tint_verts[py_cull_dir].reshape((-1, 3))[faces]
-                    * _brightness_multiplier[py_cull_dir]
-                )
-                vert_map[py_cull_dir] = py_vert_table
-        block_model_manager.add_block(vert_map, model.is_transparent)
+
+def get_block_model_manager(resource_pack, block_palette) -> BlockModelManager:
+    """Get the BlockModelManager for a block palette with geometry for every block in the palette.
+    This reads the block palette so it must not be called while the palette is being modified."""
+    with _block_model_lock:
+        return _extend_blocks(resource_pack, block_palette)
+
+
+def create_lod0_chunk_geometry(
+    BlockModelManager block_model_manager,
+    chunk_offset: numpy.ndarray,
+    blocks,
+    greedy=True,
+):
+    """Create the geometry for a chunk from a BlockModelManager returned by get_block_model_manager.
+    This does not touch the level or the resource pack so it is safe to call from a worker thread.
+    If greedy is True the opaque full faces of neighbouring blocks are merged into larger quads.
+    Returns a list of opaque (vertices, indices) tuples and a list of translucent (vertices, indices) tuples."""
+    return _create_lod0_chunk(
+        block_model_manager,
+        blocks,
+        chunk_offset,
+        greedy,
+    )
 
 
 def create_lod0_chunk(
@@ -464,10 +832,11 @@ def create_lod0_chunk(
     blocks,
     block_palette,
     vert_len,  # should be 12
+    greedy=True,
 ):
-    _extend_blocks(resource_pack, block_palette)
-    return _create_lod0_chunk(
-        resource_pack.block_model_manager[id(block_palette)],
+    return create_lod0_chunk_geometry(
+        get_block_model_manager(resource_pack, block_palette),
+        chunk_offset,
         blocks,
-        chunk_offset
+        greedy,
     )
@@ -1,18 +1,25 @@
-from typing import TYPE_CHECKING, Generator, Optional, Any
+from typing import TYPE_CHECKING, Generator, Optional, Any, Dict, Set, Tuple
 import numpy
 import time
+from concurrent.futures import ThreadPoolExecutor, Future
 
 from amulet.api.data_types import Dimension, ChunkCoordinates
 
 from amulet_map_editor import log
 from .chunk import RenderChunk
 from .region import ChunkManager
+from .mesh_cache import MeshCache
 from .selection import GreenRenderSelectionGroup
 from amulet_map_editor.api.opengl.data_types import (
     CameraLocationType,
     CameraRotationType,
     TransformationMatrix,
 )
+from amulet_map_editor.api.opengl.matrix import (
+    look_vector,
+    frustum_planes,
+    boxes_in_frustum,
+)
 from amulet_map_editor.api.opengl.resource_pack import (
     OpenGLResourcePackManager,
     OpenGLResourcePack,
@@ -56,6 +63,12 @@ class RenderLevel(OpenGLResourcePackManager, Drawable, ThreadedObject, ContextMa
         self._dimension: Dimension = level.dimensions[0]
         self._render_distance = 5
         self._garbage_distance = 10
+        # chunks further than this many chunks from the camera are drawn at a lower level of detail
+        self._lod1_distance: Optional[int] = 8
+        # store the chunk geometry in the compact vertex format
+        self._compact_vertices = False
+        # store the chunk geometry on disk so that it can be loaded when the level is next opened
+        self._mesh_cache: Optional[MeshCache] = None
         self._draw_box = draw_box
         self._draw_floor = draw_floor
         self._draw_ceil = draw_ceil
@@ -68,11 +81,29 @@ class RenderLevel(OpenGLResourcePackManager, Drawable, ThreadedObject, ContextMa
         self._last_rebuild_camera_location: Optional[
             numpy.ndarray
         ] = None  # x, z camera location
+        self._last_rebuild_camera_rotation: Optional[CameraRotationType] = None
+        # The transformation matrix used in the last draw call. Used to find the chunks in view.
+        self._view_matrix: Optional[TransformationMatrix] = None
         self._needs_rebuild = (
             True  # Should we go back to the beginning and re-find chunks to rebuild
         )
         self._chunk_rebuilds = self._rebuild_generator()
-        self._rebuild_time = 0
+
+        # The chunk data is loaded from the level on the generator thread
+        # and the geometry is built on a pool of worker threads.
+        self._mesh_workers = 1
+        self._mesh_pool: Optional[ThreadPoolExecutor] = None
+        self._mesh_pool_size = 0
+        # The chunks currently being meshed by the worker pool.
+        self._meshing: Dict[ChunkCoordinates, Future] = {}
+        # Incremented when the loaded chunks are discarded so that stale results are thrown away.
+        self._mesh_generation = 0
+
+        # Time to fill view metric.
+        # The chunks in view that were not loaded when the chunk order was last computed.
+        self._view_pending: Set[ChunkCoordinates] = set()
+        self._fill_start: Optional[float] = None
+        self._fill_view_time: Optional[float] = None
 
     @property
     def level(self) -> "BaseLevel":
@@ -95,9 +126,17 @@ class RenderLevel(OpenGLResourcePackManager, Drawable, ThreadedObject, ContextMa
                 chunk_rebuilt = set()
                 chunk_not_loaded = []  # a list of chunks that have not been loaded
 
-                for chunk_coords in self.chunk_coords():
+                chunks, _, in_view = self._prioritised_chunks()
+                self._start_fill_timer(chunks[in_view])
+
+                for chunk_coords in map(tuple, chunks.tolist()):
                     # for all chunks within radius of the player
-                    if self.chunk_manager.render_chunk_needs_rebuild(chunk_coords):
+                    if chunk_coords in self._meshing:
+                        # the chunk is already being built
+                        continue
+                    elif self.chunk_manager.render_chunk_needs_rebuild(
+                        chunk_coords, self._chunk_lod(chunk_coords)
+                    ):
                         # if the render chunk exists and the state has changed
                         # rebuild that chunk
                         chunk_rebuilt.add(chunk_coords)
@@ -112,7 +151,7 @@ class RenderLevel(OpenGLResourcePackManager, Drawable, ThreadedObject, ContextMa
                                 chunk_coords_ not in chunk_rebuilt
                                 and chunk_coords in self.chunk_manager
                                 and not self.chunk_manager.render_chunk_needs_rebuild(
-                                    chunk_coords_
+                                    chunk_coords_, self._chunk_lod(chunk_coords_)
                                 )
                             ):
                                 # if the chunk has not already been rebuilt and it exists
@@ -149,35 +188,102 @@ class RenderLevel(OpenGLResourcePackManager, Drawable, ThreadedObject, ContextMa
             self._needs_rebuild = True
             self._last_rebuild_camera_location = camera
 
-        chunk_coords = next(self._chunk_rebuilds)
-        if chunk_coords is not None:
-            # generate the chunk
-            chunk = RenderChunk(
-                self.context_identifier,
-                self.resource_pack,
-                self.level,
-                self.chunk_manager.region_size,
-                chunk_coords,
-                self.dimension,
-                draw_floor=self.draw_floor,
-                draw_ceil=self.draw_ceil,
-                limit_bounds=self._limit_bounds,
+        yaw, pitch = self.camera_rotation
+        if self._last_rebuild_camera_rotation is None or (
+            abs((yaw - self._last_rebuild_camera_rotation[0] + 180) % 360 - 180) > 15
+            or abs(pitch - self._last_rebuild_camera_rotation[1]) > 15
+        ):
+            # if the camera has turned more than 15 degrees re-prioritise the chunks
+            self._needs_rebuild = True
+            self._last_rebuild_camera_rotation = (yaw, pitch)
+
+        # Keep a short queue in front of the workers.
+        # The chunks are submitted in priority order and a short queue
+        # means that changes in the camera location are picked up quickly.
+        while len(self._meshing) < self._mesh_workers * 2:
+            chunk_coords = next(self._chunk_rebuilds)
+            if chunk_coords is None:
+                break
+            if chunk_coords not in self._meshing:
+                self._submit_chunk(chunk_coords)
+
+        if self._fill_start is not None and not self._view_pending:
+            self._fill_view_time = time.time() - self._fill_start
+            self._fill_start = None
+            log.debug(f"{self} filled the view in {self._fill_view_time:.3f} seconds")
+
+    def _submit_chunk(self, chunk_coords: ChunkCoordinates):
+        """Load the data for a chunk and submit it to the worker pool to be meshed."""
+        chunk = RenderChunk(
+            self.context_identifier,
+            self.resource_pack,
+            self.level,
+            self.chunk_manager.region_size,
+            chunk_coords,
+            self.dimension,
+            draw_floor=self.draw_floor,
+            draw_ceil=self.draw_ceil,
+            limit_bounds=self._limit_bounds,
+            lod=self._chunk_lod(chunk_coords),
+            compact=self._compact_vertices,
+            mesh_cache=self._mesh_cache,
+        )
+
+        try:
+            chunk_data = chunk.prepare_geometry()
+        except:
+            log.error(
+                f"Failed loading chunk data for chunk {chunk_coords}",
+                exc_info=True,
+            )
+            self.chunk_manager.add_render_chunk(chunk)
+            self._view_pending.discard(chunk_coords)
+            return
+
+        if self._mesh_pool is None or self._mesh_pool_size != self._mesh_workers:
+            if self._mesh_pool is not None:
+                self._mesh_pool.shutdown(wait=False)
+            self._mesh_pool = ThreadPoolExecutor(
+                self._mesh_workers, thread_name_prefix="ChunkMesher"
             )
+            self._mesh_pool_size = self._mesh_workers
 
-            try:
-                chunk.create_geometry()
-            except:
+        generation = self._mesh_generation
+        future = self._mesh_pool.submit(chunk.build_geometry, chunk_data)
+        self._meshing[chunk_coords] = future
+        future.add_done_callback(lambda f: self._on_chunk_built(chunk, generation, f))
+
+    def _on_chunk_built(self, chunk: RenderChunk, generation: int, future: Future):
+        """Called from the worker thread when a chunk has finished meshing."""
+        if not future.cancelled():
+            if future.exception() is not None:
                 log.error(
-                    f"Failed generating chunk geometry for chunk {chunk_coords}",
-                    exc_info=True,
+                    f"Failed generating chunk geometry for chunk {chunk.coords}",
+                    exc_info=future.exception(),
                 )
+            if generation == self._mesh_generation:
+                self.chunk_manager.add_render_chunk(chunk)
+                self._view_pending.discard(chunk.coords)
+        if self._meshing.get(chunk.coords) is future:
+            del self._meshing[chunk.coords]
+
+    def _cancel_meshing(self):
+        """Discard all chunks that are queued or being meshed."""
+        self._mesh_generation += 1
+        for future in list(self._meshing.values()):
+            future.cancel()
+        self._meshing.clear()
 
-            self.chunk_manager.add_render_chunk(chunk)
+    @property
+    def mesh_workers(self) -> int:
+        """The number of threads used to build chunk geometry."""
+        return self._mesh_workers
 
-        t = time.time()
-        if t > self._rebuild_time + 1:
-            self._rebuild_time = t
-            self.chunk_manager.rebuild()
+    @mesh_workers.setter
+    def mesh_workers(self, val: int):
+        assert isinstance(val, int) and val >= 1, "Mesh workers must be an int >= 1"
+        # The pool is recreated on the generator thread.
+        self._mesh_workers = val
 
     def enable(self):
         """Enable chunk generation in a new thread."""
@@ -189,6 +295,9 @@ class RenderLevel(OpenGLResourcePackManager, Drawable, ThreadedObject, ContextMa
 
     def close(self):
         self.unload()
+        if self._mesh_pool is not None:
+            self._mesh_pool.shutdown(wait=False)
+            self._mesh_pool = None
 
     @property
     def camera_location(self) -> CameraLocationType:
@@ -236,6 +345,58 @@ class RenderLevel(OpenGLResourcePackManager, Drawable, ThreadedObject, ContextMa
         self._garbage_distance = val + 5
         self._needs_rebuild = True
 
+    @property
+    def lod1_distance(self) -> Optional[int]:
+        """Chunks further than this many chunks from the camera are drawn at a lower level of detail.
+        If None all chunks are drawn at full detail."""
+        return self._lod1_distance
+
+    @lod1_distance.setter
+    def lod1_distance(self, val: Optional[int]):
+        assert val is None or isinstance(
+            val, int
+        ), "LOD1 distance must be an int or None"
+        self._lod1_distance = val
+        self._needs_rebuild = True
+
+    @property
+    def compact_vertices(self) -> bool:
+        """Is the chunk geometry stored in the compact vertex format.
+        This uses a third of the memory but some precision is lost."""
+        return self._compact_vertices
+
+    @compact_vertices.setter
+    def compact_vertices(self, val: bool):
+        assert isinstance(val, bool), "compact_vertices must be a bool"
+        if val != self._compact_vertices:
+            self._compact_vertices = val
+            self._chunk_manager.compact = val
+            self._rebuild()
+
+    @property
+    def mesh_cache(self) -> bool:
+        """Is the chunk geometry stored on disk so that it does not need building when the level is next opened."""
+        return self._mesh_cache is not None
+
+    @mesh_cache.setter
+    def mesh_cache(self, val: bool):
+        assert isinstance(val, bool), "mesh_cache must be a bool"
+        if val != self.mesh_cache:
+            self._mesh_cache = MeshCache(self.level) if val else None
+
+    def _chunk_lod(self, chunk_coords: ChunkCoordinates) -> int:
+        """The level of detail a chunk should be built at based on its distance from the camera.
+
+        :param chunk_coords: The coordinates of the chunk.
+        :return: 0 for full detail, 1 for low detail.
+        """
+        if self._limit_bounds or self._lod1_distance is None:
+            # levels limited to their bounds are small so are always drawn at full detail.
+            return 0
+        dx = chunk_coords[0] * 16 + 8 - self.camera_location[0]
+        dz = chunk_coords[1] * 16 + 8 - self.camera_location[2]
+        return int(dx * dx + dz * dz > (self._lod1_distance * 16) ** 2)
+
     @property
     def draw_box(self):
         """Should the selection box around the level be drawn."""
@@ -252,24 +413,84 @@ class RenderLevel(OpenGLResourcePackManager, Drawable, ThreadedObject, ContextMa
         return self._draw_ceil
 
     def chunk_coords(self) -> Generator[ChunkCoordinates, None, None]:
-        """Get all of the chunks to draw/load"""
-        # This yield chunk coordinates in a spiral around the camera
-        # TODO: Perhaps redesign this to prioritise chunks in front of the camera
+        """Get all of the chunks to draw/load in the order they should be loaded."""
+        chunks, _, _ = self._prioritised_chunks()
+        yield from map(tuple, chunks.tolist())
+
+    def _prioritised_chunks(
+        self,
+    ) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """Get all of the chunks within the render distance sorted by priority.
+
+        Chunks in the view frustum are loaded first, nearest first.
+        Chunks outside of the view frustum are deferred more the further they are from the look direction.
+
+        :return: An Nx2 int array of chunk coordinates, the priority of each chunk (lower is sooner) and a bool array that is True if the chunk is in view.
+        """
         cx, cz = int(self.camera_location[0]) >> 4, int(self.camera_location[2]) >> 4
+        offsets = numpy.arange(-self.render_distance, self.render_distance + 1)
+        chunks = numpy.stack(
+            numpy.meshgrid(offsets + cx, offsets + cz, indexing="ij"), -1
+        ).reshape(-1, 2)
+
+        # the horizontal vector from the camera to the centre of each chunk
+        delta = chunks * 16 + 8 - numpy.asarray(self.camera_location)[[0, 2]]
+        distance = numpy.hypot(delta[:, 0], delta[:, 1])
+
+        # how closely each chunk lines up with the look direction. 1 is straight ahead, -1 is behind.
+        look = look_vector(*self.camera_rotation)[[0, 2]]
+        look_length = numpy.hypot(*look)
+        if look_length > 0.01:
+            alignment = numpy.matmul(delta, look) / (
+                numpy.maximum(distance, 1) * look_length
+            )
+        else:
+            # looking straight up or down. All directions are equal.
+            alignment = numpy.ones(len(chunks))
+        # chunks behind the camera are deferred up to 4 times as much as those in front
+        penalty = 2.5 - 1.5 * alignment
+
+        view_matrix = self._view_matrix
+        if view_matrix is None:
+            in_view = numpy.zeros(len(chunks), dtype=bool)
+        else:
+            bounds = self.level.bounds(self.dimension)
+            box_min = numpy.empty((len(chunks), 3))
+            box_min[:, [0, 2]] = chunks * 16
+            box_min[:, 1] = bounds.min_y
+            box_max = box_min + 16
+            box_max[:, 1] = bounds.max_y
+            in_view = boxes_in_frustum(frustum_planes(view_matrix), box_min, box_max)
+            penalty[in_view] = 1
+
+        priority = distance * penalty
+        order = numpy.argsort(priority, kind="stable")
+        return chunks[order], priority[order], in_view[order]
+
+    def _start_fill_timer(self, view_chunks: numpy.ndarray):
+        """Start timing how long it takes to load all the chunks that are in view.
+
+        :param view_chunks: The chunks in the view frustum.
+        """
+        self._view_pending = {
+            chunk_coords
+            for chunk_coords in map(tuple, view_chunks.tolist())
+            if chunk_coords not in self.chunk_manager
+        }
+        if self._view_pending:
+            if self._fill_start is None:
+                self._fill_start = time.time()
+        else:
+            self._fill_start = None
 
-        sign = 1
-        length = 1
-        for _ in range(self.render_distance * 2 + 1):
-            for _ in range(length):
-                yield cx, cz
-                cx += sign
-            for _ in range(length):
-                yield cx, cz
-                cz += sign
-            sign *= -1
-            length += 1
+    @property
+    def fill_view_time(self) -> Optional[float]:
+        """The time in seconds it took to load all the chunks in view the last time the view needed filling.
+        None if it has not been measured yet."""
+        return self._fill_view_time
 
     def draw(self, camera_matrix: TransformationMatrix):
+        self._view_matrix = camera_matrix
         self._chunk_manager.draw(camera_matrix, self.camera_location)
         if self._draw_box:
             self._selection.draw(
@@ -279,6 +500,7 @@ class RenderLevel(OpenGLResourcePackManager, Drawable, ThreadedObject, ContextMa
 
     def run_garbage_collector(self, remove_all=False):
         if remove_all:
+            self._cancel_meshing()
             self._chunk_manager.unload()
             self._level.unload()
         else:
@@ -294,6 +516,7 @@ class RenderLevel(OpenGLResourcePackManager, Drawable, ThreadedObject, ContextMa
 
     def _rebuild(self):
         """Unload all the chunks so they can be rebuilt."""
+        self._cancel_meshing()
         self._chunk_manager.unload()
         self._needs_rebuild = True
 
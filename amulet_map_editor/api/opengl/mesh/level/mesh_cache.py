@@ -0,0 +1,173 @@
+from typing import TYPE_CHECKING, NamedTuple, Optional, Tuple, Hashable, Dict
+import hashlib
+import os
+import threading
+import numpy
+
+from amulet.api.data_types import Dimension
+from amulet.level.formats.anvil_world.format import OVERWORLD, THE_NETHER, THE_END
+
+from amulet_map_editor import log
+
+if TYPE_CHECKING:
+    from amulet.api.level import BaseLevel
+
+# Increment this when the geometry created by the chunk builder changes.
+MESH_CACHE_VERSION = 2
+# The directory of each vanilla Java dimension relative to the level directory.
+JAVA_DIMENSION_DIRECTORIES = {OVERWORLD: "", THE_NETHER: "DIM-1", THE_END: "DIM1"}
+
+# The modification time of the file the chunk data was loaded from and the time the chunk was last changed.
+CacheStamp = Tuple[float, float]
+
+
+class CachedGeometry(NamedTuple):
+    """Chunk geometry loaded from the mesh cache."""
+
+    verts: numpy.ndarray
+    indices: numpy.ndarray
+    verts_translucent: int
+
+
+class MeshCache:
+    """Stores chunk geometry on disk so that it does not need building again when the level is next opened.
+    The geometry for each chunk is stored in a compressed file in the cache directory.
+    The cache is not used while the level has unsaved changes and a file is ignored if
+    the level file the chunk is stored in has been modified since it was written."""
+
+    def __init__(self, level: "BaseLevel", cache_dir: str = None):
+        """
+        Create a new MeshCache.
+
+        :param level: The level the geometry is created from.
+        :param cache_dir: The directory to store the geometry in. Defaults to ./cache/mesh
+        """
+        self._level = level
+        level_path = os.path.abspath(level.level_path) if level.level_path else ""
+        self._cache_dir = os.path.join(
+            cache_dir or os.path.join(".", "cache", "mesh"),
+            hashlib.sha1(level_path.encode("utf-8")).hexdigest()[:16],
+        )
+        # The modification time of the level files that have been checked.
+        self._file_times: Dict[str, Optional[float]] = {}
+
+    def _file_time(self, path: str) -> Optional[float]:
+        """The modification time of a file in the level. This is cached until the level is changed."""
+        if path not in self._file_times:
+            try:
+                self._file_times[path] = os.stat(path).st_mtime
+            except OSError:
+                self._file_times[path] = None
+        return self._file_times[path]
+
+    def _chunk_file(self, dimension: Dimension, cx: int, cz: int) -> Optional[str]:
+        """The path of the file the chunk data is stored in.
+        For Java worlds this is the region file the chunk is in.
+        Other levels store all the chunks in one database so level.dat, which is written every time
+        the level is saved, is used instead of the database files, which are modified when the level is opened.
+        Levels that are a single file use that file.
+        This is None if the level is not stored on disk."""
+        path = self._level.level_path
+        if not path:
+            return None
+        elif os.path.isfile(path):
+            return path
+        elif os.path.isdir(os.path.join(path, "region")):
+            if dimension in JAVA_DIMENSION_DIRECTORIES:
+                dimension_path = JAVA_DIMENSION_DIRECTORIES[dimension]
+            elif ":" in dimension:
+                dimension_path = os.path.join("dimensions", *dimension.split(":", 1))
+            else:
+                dimension_path = dimension
+            return os.path.join(
+                path, dimension_path, "region", f"r.{cx >> 5}.{cz >> 5}.mca"
+            )
+        return os.path.join(path, "level.dat")
+
+    def stamp(
+        self, dimension: Dimension, cx: int, cz: int, changed_time: float
+    ) -> Optional[CacheStamp]:
+        """Get the value that the cached geometry for a chunk must have been stored with to be valid.
+        This is None if the cache should not be used because the level has unsaved changes.
+        This accesses the level so it must be run from the thread that owns the level.
+
+        :param dimension: The dimension the chunk is in.
+        :param cx: The x coordinate of the chunk.
+        :param cz: The z coordinate of the chunk.
+        :param changed_time: The changed_time of the chunk.
+        :return: The stamp to pass to get and put.
+        """
+        if self._level.changed:
+            # The level files will change when the level is saved.
+            self._file_times.clear()
+            return None
+        path = self._chunk_file(dimension, cx, cz)
+        if path is None:
+            return None
+        file_time = self._file_time(path)
+        if file_time is None:
+            return None
+        return file_time, changed_time
+
+    def _paths(self, chunk_id: Hashable, stamp: CacheStamp) -> Tuple[str, str]:
+        """The path of the cache file and the key that must be stored in it for it to be valid."""
+        chunk_key = repr(chunk_id)
+        path = os.path.join(
+            self._cache_dir,
+            f"{hashlib.sha1(chunk_key.encode('utf-8')).hexdigest()}.npz",
+        )
+        return path, repr((MESH_CACHE_VERSION, stamp, chunk_key))
+
+    def get(self, chunk_id: Hashable, stamp: CacheStamp) -> Optional[CachedGeometry]:
+        """Load the geometry for a chunk.
+
+        :param chunk_id: The values the geometry depends on other than the chunk data.
+        :param stamp: The value returned by stamp.
+        :return: The geometry if it was cached and is still valid, otherwise None.
+        """
+        path, key = self._paths(chunk_id, stamp)
+        if not os.path.isfile(path):
+            return None
+        try:
+            with numpy.load(path) as data:
+                if str(data["key"]) != key:
+                    return None
+                return CachedGeometry(
+                    data["verts"], data["indices"], int(data["verts_translucent"])
+                )
+        except Exception:
+            log.debug(f"Failed loading cached geometry {path}", exc_info=True)
+            return None
+
+    def put(
+        self,
+        chunk_id: Hashable,
+        stamp: CacheStamp,
+        verts: numpy.ndarray,
+        indices: numpy.ndarray,
+        verts_translucent: int,
+    ):
+        """Store the geometry for a chunk.
+        This can be run from any thread.
+
+        :param chunk_id: The values the geometry depends on other than the chunk data.
+        :param stamp: The value returned by stamp when the chunk data was loaded.
+        :param verts: The vertices in the TriMesh vertex format.
+        :param indices: The indices of the vertices.
+        :param verts_translucent: The offset into the indices from which the faces can be translucent.
+        """
+        path, key = self._paths(chunk_id, stamp)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            with open(temp_path, "wb") as f:
+                numpy.savez_compressed(
+                    f,
+                    key=numpy.array(key),
+                    verts=verts,
+                    indices=indices,
+                    verts_translucent=numpy.array(verts_translucent),
+                )
+            os.replace(temp_path, path)
+        except OSError:
+            log.debug(f"Failed caching geometry {path}", exc_info=True)
@@ -1,34 +1,61 @@
 from OpenGL.GL import (
     GL_DYNAMIC_DRAW,
-    glBindVertexArray,
-    glBindBuffer,
     GL_ARRAY_BUFFER,
+    GL_ELEMENT_ARRAY_BUFFER,
+    GL_UNSIGNED_INT,
+    glGenBuffers,
+    glDeleteBuffers,
+    glBindBuffer,
+    glBufferData,
     glBufferSubData,
+    glMultiDrawElements,
 )
-from typing import Dict, Tuple, Optional
+from typing import Dict, Tuple, Optional, List
+import ctypes
+import bisect
 import numpy
 import queue
+from amulet_map_editor import log
 from .chunk import RenderChunk
-from amulet_map_editor.api.opengl.mesh.tri_mesh import TriMesh
+from .allocator import FreeListAllocator
+from amulet_map_editor.api.opengl.mesh.chunk_tri_mesh import (
+    ChunkTriMesh,
+    POSITION_SCALE,
+)
 from amulet_map_editor.api.opengl.resource_pack import OpenGLResourcePack
-from amulet_map_editor.api.opengl.matrix import displacement_matrix
+from amulet_map_editor.api.opengl.matrix import (
+    displacement_matrix,
+    frustum_planes,
+    boxes_in_frustum,
+)
 from amulet_map_editor.api.opengl.data_types import TransformationMatrix
 
 
 class ChunkManager:
     def __init__(
-        self, context_identifier: str, resource_pack: OpenGLResourcePack, region_size=16
+        self,
+        context_identifier: str,
+        resource_pack: OpenGLResourcePack,
+        region_size=16,
+        compact=False,
     ):
         self.context_identifier = context_identifier
         self._resource_pack = resource_pack
         self.region_size = region_size
+        # Should the regions store their geometry in the compact vertex format.
+        # This must match the RenderChunks added to this manager.
+        self.compact = compact
         self._regions: Dict[Tuple[int, int], RenderRegion] = {}
         # added chunks are put in here and then processed on the next call of draw
         # This is because add_render_chunk can be called from a different thread to draw
         # which causes issues due to dictionaries resizing
         self._chunk_temp: queue.Queue = queue.Queue()
         self._chunk_temp_set = set()
-        self._rebuild_regions = []
+        # The regions sorted furthest first from the region the camera was in when they were sorted.
+        # This is kept up to date as regions are added and only resorted when the camera changes region.
+        self._region_order: List[RenderRegion] = []
+        self._region_order_keys: List[int] = []
+        self._region_order_camera: Optional[Tuple[int, int]] = None
 
     def add_render_chunk(self, render_chunk: RenderChunk):
         """Add a RenderChunk to the database.
@@ -38,12 +65,22 @@ class ChunkManager:
         chunk_coords = (render_chunk.cx, render_chunk.cz)
         self._chunk_temp_set.add(chunk_coords)
 
-    def render_chunk_needs_rebuild(self, chunk_coords: Tuple[int, int]) -> bool:
-        return (
-            chunk_coords not in self._chunk_temp_set
-            and self.render_chunk_in_main_database(chunk_coords)
-            and self.get_render_chunk(chunk_coords).needs_rebuild()
-        )
+    def render_chunk_needs_rebuild(
+        self, chunk_coords: Tuple[int, int], lod: int = 0
+    ) -> bool:
+        """Does the RenderChunk need rebuilding.
+
+        :param chunk_coords: The coordinates of the chunk.
+        :param lod: The level of detail the chunk should be at.
+        :return: True if the chunk data has changed or the chunk is at a different level of detail.
+        """
+        if (
+            chunk_coords in self._chunk_temp_set
+            or not self.render_chunk_in_main_database(chunk_coords)
+        ):
+            return False
+        render_chunk = self.get_render_chunk(chunk_coords)
+        return render_chunk.lod != lod or render_chunk.needs_rebuild()
 
     def get_render_chunk(self, chunk_coords: Tuple[int, int]) -> RenderChunk:
         """Get a RenderChunk from the database.
@@ -57,13 +94,19 @@ class ChunkManager:
             render_chunk = self._chunk_temp.get()
             region_coords = self.region_coords(render_chunk.cx, render_chunk.cz)
             if region_coords not in self._regions:
-                self._regions[region_coords] = RenderRegion(
+                region = self._regions[region_coords] = RenderRegion(
                     region_coords[0],
                     region_coords[1],
                     self.region_size,
                     self.context_identifier,
                     self._resource_pack,
+                    self.compact,
                 )
+                if self._region_order_camera is not None:
+                    key = self._region_order_key(region, self._region_order_camera)
+                    index = bisect.bisect(self._region_order_keys, key)
+                    self._region_order_keys.insert(index, key)
+                    self._region_order.insert(index, region)
             self._regions[region_coords].add_render_chunk(render_chunk)
         self._chunk_temp_set.clear()
 
@@ -83,17 +126,32 @@ class ChunkManager:
     def region_coords(self, cx, cz):
         return cx // self.region_size, cz // self.region_size
 
+    @staticmethod
+    def _region_order_key(region: "RenderRegion", camera_region: Tuple[int, int]):
+        """The sort key of a region. Further regions have smaller keys so that they are drawn first."""
+        return -(abs(region.rx - camera_region[0]) + abs(region.rz - camera_region[1]))
+
+    def _sort_regions(self, camera_region: Tuple[int, int]):
+        """Sort the regions furthest first from the camera region."""
+        keys = [
+            (self._region_order_key(region, camera_region), region_coords)
+            for region_coords, region in self._regions.items()
+        ]
+        keys.sort()
+        self._region_order_keys = [key for key, _ in keys]
+        self._region_order = [self._regions[region_coords] for _, region_coords in keys]
+        self._region_order_camera = camera_region
+
     def draw(self, camera_matrix: TransformationMatrix, camera):
-        cam_rx, cam_rz = numpy.floor(
-            numpy.array(camera)[[0, 2]] / (16 * self.region_size)
+        camera_region = tuple(
+            numpy.floor(numpy.array(camera)[[0, 2]] / (16 * self.region_size))
+            .astype(int)
+            .tolist()
         )
-        cam_cx, cam_cz = numpy.floor(numpy.array(camera)[[0, 2]] / 16)
-        for region in sorted(
-            self._regions.values(),
-            key=lambda x: abs(x.rx - cam_rx) + abs(x.rz - cam_rz),
-            reverse=True,
-        ):
-            region.draw(camera_matrix, cam_cx, cam_cz)
+        if camera_region != self._region_order_camera:
+            self._sort_regions(camera_region)
+        for region in self._region_order:
+            region.draw(camera_matrix)
         self._merge_chunk_temp()
 
     def unload(self, safe_area: Tuple[int, int, int, int] = None):
@@ -104,6 +162,7 @@ class ChunkManager:
             for region in self._regions.values():
                 region.unload()
             self._regions.clear()
+            self._region_order_camera = None
         else:
             min_rx, min_rz = self.region_coords(*safe_area[:2])
             max_rx, max_rz = self.region_coords(*safe_area[2:])
@@ -117,25 +176,24 @@ class ChunkManager:
 
             for region in delete_regions:
                 del self._regions[region]
+            if delete_regions:
+                self._region_order_camera = None
 
-    def rebuild(self):
-        """Rebuild a single region which was last rebuild the longest ago.
-        Put this on a semi-fast clock to rebuild all regions."""
-        if not self._rebuild_regions:
-            self._rebuild_regions = list(self._regions.keys())
 
-        if self._rebuild_regions:
-            region = self._rebuild_regions.pop(0)
-            if region in self._regions:
-                self._regions[region].rebuild()
+# The vertex offset, vertex count, opaque index offset, opaque index count,
+# translucent index offset and translucent index count of each chunk in the region buffers.
+MergedChunkLocationsType = Dict[Tuple[int, int], Tuple[int, int, int, int, int, int]]
 
+# The minimum number of elements in each region buffer.
+MIN_BUFFER_SIZE = 4096
+# Compact the region buffers when more than this fraction of the used part of a buffer is free.
+COMPACT_FRAGMENTATION = 0.5
+# The buffers are made this much larger than the data when compacting so that chunks can change size without growing them.
+COMPACT_HEADROOM = 1.5
 
-MergedChunkLocationsType = Dict[Tuple[int, int], Tuple[int, int, int, int]]
 
-
-class RenderRegion(TriMesh):
+class RenderRegion(ChunkTriMesh):
     _merged_chunk_locations: MergedChunkLocationsType
-    _temp_data: Optional[Tuple[numpy.ndarray, MergedChunkLocationsType]]
 
     def __init__(
         self,
@@ -144,20 +202,38 @@ class RenderRegion(TriMesh):
         region_size: int,
         context_identifier: str,
         resource_pack: OpenGLResourcePack,
+        compact: bool = False,
     ):
-        """A group of RenderChunks to minimise the number of draw calls"""
+        """A group of RenderChunks to minimise the number of draw calls.
+        The geometry for each chunk is written into a range of the region buffers when it is added.
+        The buffers are only rebuilt when they run out of space or become too fragmented."""
         super().__init__(
-            context_identifier, resource_pack.get_atlas_id(context_identifier)
+            context_identifier,
+            resource_pack.get_atlas_id(context_identifier),
+            resource_pack,
+            compact,
         )
         self.rx = rx
         self.rz = rz
         self._chunks: Dict[Tuple[int, int], RenderChunk] = {}
         self._merged_chunk_locations: MergedChunkLocationsType = {}
-        self._manual_chunks: Dict[Tuple[int, int], RenderChunk] = {}
-
-        # Merging is done on a new thread which can't modify the opengl state.
-        # This stores the created data and the main thread loads it when drawing.
-        self._temp_data = None
+        # Chunks that have been added but not written to the buffers yet.
+        # These are written by the main thread when drawing.
+        self._pending_chunks: Dict[Tuple[int, int], RenderChunk] = {}
+
+        # The opaque indices are stored in the element buffer from TriMesh and the translucent indices here.
+        # This allows the translucent faces to be drawn after the opaque faces.
+        self._translucent_ebo = None
+        self._vertex_allocator = FreeListAllocator(0)
+        self._index_allocator = FreeListAllocator(0)
+        self._translucent_allocator = FreeListAllocator(0)
+
+        # The bounding box of the geometry of each chunk in region coordinates.
+        self._chunk_boxes: Dict[Tuple[int, int], numpy.ndarray] = {}
+        # The arrays used to cull and draw the chunks. Created from the above when needed.
+        self._draw_arrays: Optional[Tuple[numpy.ndarray, ...]] = None
+        # The chunks that were in the view frustum during the last draw.
+        self._visible_chunks = numpy.zeros(0, dtype=bool)
 
         self.region_transform = displacement_matrix(
             rx * region_size * 16, 0, rz * region_size * 16
@@ -178,105 +254,283 @@ class RenderRegion(TriMesh):
         chunk_coords = (render_chunk.cx, render_chunk.cz)
         if chunk_coords in self._chunks:
             self._chunks[chunk_coords].unload()
-        self._disable_merged_chunk(chunk_coords)
         self._chunks[chunk_coords] = render_chunk
-        self._manual_chunks[chunk_coords] = render_chunk
+        self._pending_chunks[chunk_coords] = render_chunk
 
     def get_render_chunk(self, chunk_coords: Tuple[int, int]):
         return self._chunks[chunk_coords]
 
-    def _disable_merged_chunk(self, chunk_coords: Tuple[int, int]):
-        """Zero out the region of memory in the merged chunks related to a given chunk"""
+    def _setup(self):
+        if self._vao is None:
+            super()._setup()
+            self._translucent_ebo = glGenBuffers(1)
+            # The buffers are empty so all the chunks need writing again.
+            self._merged_chunk_locations.clear()
+            self._pending_chunks.update(self._chunks)
+            self._draw_arrays = None
+            self._visible_chunks = numpy.zeros(0, dtype=bool)
+            self._vertex_allocator = FreeListAllocator(0)
+            self._index_allocator = FreeListAllocator(0)
+            self._translucent_allocator = FreeListAllocator(0)
+
+    def _update_geometry(self):
+        """Write the chunks that have been added since the last call into the region buffers.
+        Each chunk is written into free space in the buffers and its old range is freed.
+        If there is not enough free space or the buffers are too fragmented they are rebuilt."""
+        if not self._pending_chunks:
+            return
+        self._setup()
+        pending_chunks = self._pending_chunks
+        self._pending_chunks = {}
+        self._draw_arrays = None
+        for chunk_coords, chunk in pending_chunks.items():
+            self._free_chunk(chunk_coords)
+            self._chunk_boxes[chunk_coords] = self._geometry_box(chunk)
+        for chunk_coords, chunk in pending_chunks.items():
+            location = self._allocate_chunk(chunk)
+            if location is None:
+                # The remaining chunks are written by the compaction.
+                self._compact_buffers()
+                break
+            self._merged_chunk_locations[chunk_coords] = location
+            self._write_chunk(chunk, location)
+        else:
+            if any(
+                allocator.end > MIN_BUFFER_SIZE
+                and allocator.fragmentation > COMPACT_FRAGMENTATION
+                for allocator in (
+                    self._vertex_allocator,
+                    self._index_allocator,
+                    self._translucent_allocator,
+                )
+            ):
+                self._compact_buffers()
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def _allocate_chunk(self, chunk: RenderChunk) -> Optional[Tuple[int, ...]]:
+        """Allocate space in the region buffers for a chunk.
+
+        :param chunk: The chunk to allocate space for.
+        :return: The location of the chunk in the buffers or None if there is not enough space.
+        """
+        sizes = (
+            chunk.verts.size // self.packed_vert_len,
+            chunk.verts_translucent,
+            chunk.indices.size - chunk.verts_translucent,
+        )
+        allocators = (
+            self._vertex_allocator,
+            self._index_allocator,
+            self._translucent_allocator,
+        )
+        offsets = []
+        for allocator, size in zip(allocators, sizes):
+            offset = allocator.allocate(size)
+            if offset is None:
+                for allocator_, size_, offset_ in zip(allocators, sizes, offsets):
+                    allocator_.free(offset_, size_)
+                return None
+            offsets.append(offset)
+        return (
+            offsets[0],
+            sizes[0],
+            offsets[1],
+            sizes[1],
+            offsets[2],
+            sizes[2],
+        )
+
+    def _write_chunk(self, chunk: RenderChunk, location: Tuple[int, ...]):
+        """Write the geometry for a chunk to its location in the region buffers."""
+        (
+            vert_offset,
+            vert_size,
+            offset,
+            size,
+            translucent_offset,
+            translucent_size,
+        ) = location
+        indices = chunk.indices + numpy.uint32(vert_offset)
+        self._buffer_sub_data(
+            self._vbo,
+            vert_offset * self.packed_vert_len * chunk.verts.itemsize,
+            chunk.verts,
+        )
+        self._buffer_sub_data(self._ebo, offset * 4, indices[: chunk.verts_translucent])
+        self._buffer_sub_data(
+            self._translucent_ebo,
+            translucent_offset * 4,
+            indices[chunk.verts_translucent :],
+        )
+
+    def _free_chunk(self, chunk_coords: Tuple[int, int]):
+        """Free the space used by a chunk in the region buffers.
+        The freed ranges are not drawn so their contents do not need clearing."""
         if chunk_coords in self._merged_chunk_locations:
             (
+                vert_offset,
+                vert_size,
                 offset,
                 size,
                 translucent_offset,
                 translucent_size,
             ) = self._merged_chunk_locations.pop(chunk_coords)
-            glBindVertexArray(self._vao)
-            glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
-            glBufferSubData(
-                GL_ARRAY_BUFFER,
-                offset * 4,
-                size * 4,
-                numpy.zeros(size, dtype=numpy.float32),
+            self._vertex_allocator.free(vert_offset, vert_size)
+            self._index_allocator.free(offset, size)
+            self._translucent_allocator.free(translucent_offset, translucent_size)
+
+    def _geometry_box(self, chunk: RenderChunk) -> numpy.ndarray:
+        """The bounding box of the geometry of a chunk.
+
+        :param chunk: The chunk to find the bounding box of.
+        :return: A 2x3 array of the minimum and maximum point.
+        """
+        positions = chunk.verts.reshape((-1, self.packed_vert_len))[:, :3]
+        if not len(positions):
+            return numpy.zeros((2, 3))
+        box = numpy.array([positions.min(axis=0), positions.max(axis=0)], dtype=float)
+        if self.compact:
+            box /= POSITION_SCALE
+        return box
+
+    def _get_draw_arrays(self) -> Tuple[numpy.ndarray, ...]:
+        """Get the arrays used to cull and draw the chunks.
+
+        :return: The minimum and maximum point of each chunk, the opaque index byte offsets and counts and the translucent index byte offsets and counts.
+        """
+        if self._draw_arrays is None:
+            chunk_coords = list(self._merged_chunk_locations)
+            boxes = numpy.array(
+                [self._chunk_boxes[coords] for coords in chunk_coords]
+            ).reshape((-1, 2, 3))
+            locations = numpy.array(
+                [self._merged_chunk_locations[coords] for coords in chunk_coords],
+                dtype=numpy.int64,
+            ).reshape((-1, 6))
+            self._draw_arrays = (
+                boxes[:, 0],
+                boxes[:, 1],
+                locations[:, 2] * 4,
+                locations[:, 3].astype(numpy.int32),
+                locations[:, 4] * 4,
+                locations[:, 5].astype(numpy.int32),
             )
-            glBufferSubData(
-                GL_ARRAY_BUFFER,
-                translucent_offset * 4,
-                translucent_size * 4,
-                numpy.zeros(translucent_size, dtype=numpy.float32),
+        return self._draw_arrays
+
+    @staticmethod
+    def _buffer_sub_data(buffer: int, offset: int, data: numpy.ndarray):
+        """Write data to part of a buffer.
+        The buffers are bound to GL_ARRAY_BUFFER so that the vertex array object state is not modified."""
+        if data.size:
+            glBindBuffer(GL_ARRAY_BUFFER, buffer)
+            glBufferSubData(GL_ARRAY_BUFFER, offset, data.nbytes, data)
+
+    def _compact_buffers(self):
+        """Rebuild the region buffers with the geometry for every chunk packed at the start of the buffers."""
+        log.debug(f"Compacting {self}")
+        merged_locations: MergedChunkLocationsType = {}
+        region_verts = []
+        region_indices = []
+        region_indices_translucent = []
+        vert_count = 0
+        offset = 0
+        translucent_offset = 0
+        for chunk_location, chunk in self._chunks.items():
+            chunk_vert_count = chunk.verts.size // self.packed_vert_len
+            translucent_size = chunk.indices.size - chunk.verts_translucent
+            merged_locations[chunk_location] = (
+                vert_count,
+                chunk_vert_count,
+                offset,
+                chunk.verts_translucent,
+                translucent_offset,
+                translucent_size,
             )
-            glBindVertexArray(0)
-            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            region_verts.append(chunk.verts)
+            indices = chunk.indices + numpy.uint32(vert_count)
+            region_indices.append(indices[: chunk.verts_translucent])
+            region_indices_translucent.append(indices[chunk.verts_translucent :])
+            vert_count += chunk_vert_count
+            offset += chunk.verts_translucent
+            translucent_offset += translucent_size
+
+        self._merged_chunk_locations = merged_locations
+        self._vertex_allocator = self._upload_buffer(
+            self._vbo, region_verts, self.packed_vert_dtype, self.packed_vert_len
+        )
+        self._index_allocator = self._upload_buffer(
+            self._ebo, region_indices, numpy.uint32, 1
+        )
+        self._translucent_allocator = self._upload_buffer(
+            self._translucent_ebo, region_indices_translucent, numpy.uint32, 1
+        )
 
-    def rebuild(self):
-        """Merges chunk geometry for the region into one large array.
-        As each chunk is added it is drawn individually.
-        After not too long the individual draw calls for each chunk will reach the bottleneck for python.
-        To solve this we take the geometry for each chunk and merge them into one large array that only requires one draw call.
+    def _upload_buffer(
+        self, buffer: int, arrays: List[numpy.ndarray], dtype, item_len: int
+    ) -> FreeListAllocator:
+        """Replace the contents of a buffer with the arrays followed by free space.
 
-        :return:
+        :param buffer: The buffer to write to.
+        :param arrays: The arrays to write to the start of the buffer.
+        :param dtype: The data type of the buffer.
+        :param item_len: The number of values in each allocated element.
+        :return: An allocator for the buffer with the data allocated.
         """
-        if self._manual_chunks:
-            region_verts = []
-            region_verts_translucent = []
-            merged_locations: MergedChunkLocationsType = {}
-            offset = 0
-            translucent_offset = 0
-            for chunk_location, chunk in self._chunks.items():
-                region_verts.append(chunk.verts[: chunk.verts_translucent])
-                region_verts_translucent.append(chunk.verts[chunk.verts_translucent :])
-                merged_locations[chunk_location] = [
-                    offset,
-                    chunk.verts_translucent,
-                    translucent_offset,
-                    chunk.verts.size - chunk.verts_translucent,
-                ]
-                offset += chunk.verts_translucent
-                translucent_offset += chunk.verts.size - chunk.verts_translucent
-
-            for val in merged_locations.values():
-                val[2] += offset
-
-            region_verts += region_verts_translucent
-
-            if region_verts:
-                verts = numpy.concatenate(region_verts)
-            else:
-                verts = self.new_empty_verts()
-            self._temp_data = verts, merged_locations
-
-    def _create_geometry(self):
-        """Load the temporary vertex data into opengl."""
-        if self._temp_data is not None:
-            self._setup()
-            verts, merged_locations = self._temp_data
-            self._temp_data = None
-            self.draw_count = int(verts.size // self._vert_len)
-            self._merged_chunk_locations = merged_locations
-
-            self.change_verts(verts)
-            for coord in merged_locations:
-                chunk = self._manual_chunks.pop(coord, None)
-                if chunk is not None:
-                    chunk.unload()
+        data = numpy.concatenate([numpy.zeros(0, dtype=dtype)] + arrays)
+        used = data.size // item_len
+        capacity = max(MIN_BUFFER_SIZE, int(used * COMPACT_HEADROOM))
+        data = numpy.concatenate(
+            [data, numpy.zeros((capacity - used) * item_len, dtype=dtype)]
+        )
+        glBindBuffer(GL_ARRAY_BUFFER, buffer)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, self.vertex_usage)
+        allocator = FreeListAllocator(capacity)
+        allocator.allocate(used)
+        return allocator
 
     def unload(self):
         """Unload all opengl data"""
         super().unload()
+        if self._translucent_ebo is not None:
+            glDeleteBuffers(1, int(self._translucent_ebo))
+            self._translucent_ebo = None
         for chunk in self._chunks.values():
             chunk.unload()
         self._chunks.clear()
+        self._pending_chunks.clear()
+        self._merged_chunk_locations.clear()
+        self._chunk_boxes.clear()
+        self._draw_arrays = None
+
+    def _draw_geometry(self):
+        # Draw the opaque faces and then the translucent faces of the visible chunks.
+        _, _, offsets, counts, translucent_offsets, translucent_counts = (
+            self._get_draw_arrays()
+        )
+        for ebo, ebo_offsets, ebo_counts in (
+            (self._ebo, offsets, counts),
+            (self._translucent_ebo, translucent_offsets, translucent_counts),
+        ):
+            draw = self._visible_chunks & (ebo_counts > 0)
+            draw_count = int(numpy.count_nonzero(draw))
+            if draw_count:
+                glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ebo)
+                glMultiDrawElements(
+                    self.draw_mode,
+                    ebo_counts[draw],
+                    GL_UNSIGNED_INT,
+                    (ctypes.c_void_p * draw_count)(*ebo_offsets[draw].tolist()),
+                    draw_count,
+                )
 
-    def draw(self, camera_matrix: TransformationMatrix, cam_cx, cam_cz):
-        self._create_geometry()
+    def draw(self, camera_matrix: TransformationMatrix):
+        self._update_geometry()
+        if not self._merged_chunk_locations:
+            return
         transformation_matrix = numpy.matmul(camera_matrix, self.region_transform)
-        super().draw(transformation_matrix)
-        for chunk in sorted(
-            self._manual_chunks.values(),
-            key=lambda x: abs(x.cx - cam_cx) + abs(x.cz - cam_cz),
-            reverse=True,
-        ):
-            chunk.draw(transformation_matrix)
+        box_min, box_max, *_ = self._get_draw_arrays()
+        self._visible_chunks = boxes_in_frustum(
+            frustum_planes(transformation_matrix), box_min, box_max
+        )
+        if self._visible_chunks.any():
+            super().draw(transformation_matrix)
@@ -34,7 +34,10 @@ class RenderSelection(TriMesh, OpenGLResourcePackManagerStatic):
     def __init__(self, context_identifier: str, resource_pack: OpenGLResourcePack):
         OpenGLResourcePackManagerStatic.__init__(self, resource_pack)
         TriMesh.__init__(
-            self, context_identifier, resource_pack.get_atlas_id(context_identifier)
+            self,
+            context_identifier,
+            resource_pack.get_atlas_id(context_identifier),
+            resource_pack.texture_array,
         )
         self._points: numpy.ndarray = numpy.zeros(
             (2, 3), dtype=numpy.int64
@@ -19,6 +19,11 @@ class RenderSelectionHighlightable(RenderSelection):
     def highlight_colour(self) -> RGBColour:
         return colours.get("box_highlight", (0.5, 0.5, 1.0))
 
+    @property
+    def highlight_edges(self) -> numpy.ndarray:
+        """A 2x3 bool array of which edges are highlighted."""
+        return self._highlight_edges.copy()
+
     def reset_highlight_edges(self):
         if numpy.any(self._highlight_edges):
             self.set_highlight_edges(False)
@@ -1,2 +1,3 @@
+from .render_selection_instances import RenderSelectionInstances
 from .render_selection_group import RenderSelectionGroup
 from .render_selection_group_highlightable import RenderSelectionGroupHighlightable
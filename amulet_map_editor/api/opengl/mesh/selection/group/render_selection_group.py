@@ -1,7 +1,8 @@
 import numpy
-from typing import List
+from typing import Dict, Set, Optional
 
 from amulet_map_editor.api.opengl import Drawable, ContextManager
+from amulet_map_editor.api.opengl.shaders import get_gl_version
 from amulet_map_editor.api.opengl.resource_pack import (
     OpenGLResourcePack,
     OpenGLResourcePackManagerStatic,
@@ -9,10 +10,13 @@ from amulet_map_editor.api.opengl.resource_pack import (
 from amulet.api.selection import SelectionGroup, SelectionBox
 from amulet.api.data_types import PointCoordinatesAny
 from amulet_map_editor.api.opengl.mesh.selection import RenderSelection
+from .render_selection_instances import RenderSelectionInstances
 
 
 class RenderSelectionGroup(Drawable, ContextManager, OpenGLResourcePackManagerStatic):
-    """A group of selection boxes to be drawn"""
+    """A group of selection boxes to be drawn.
+    If the context supports it all the boxes are drawn with one instanced draw call.
+    The boxes the camera is inside are drawn separately so that their inside faces are drawn."""
 
     def __init__(
         self,
@@ -23,44 +27,100 @@ class RenderSelectionGroup(Drawable, ContextManager, OpenGLResourcePackManagerSt
         ContextManager.__init__(self, context_identifier)
         OpenGLResourcePackManagerStatic.__init__(self, resource_pack)
 
-        self._boxes: List[RenderSelection] = []
+        # The point1 and point2 of each box.
+        self._points = numpy.zeros((0, 2, 3), dtype=numpy.int64)
+        # The boxes that are drawn separately. These are created when needed.
+        self._boxes: Dict[int, RenderSelection] = {}
+        self._instances = RenderSelectionInstances(
+            self.context_identifier,
+            self.resource_pack,
+            self._new_render_selection().box_tint,
+        )
+        # Can the context draw instanced geometry. None until the first draw.
+        self._instanced: Optional[bool] = None
 
         if selection:
             self.selection_group = selection
 
     def __len__(self):
-        return len(self._boxes)
+        return len(self._points)
 
     def __bool__(self):
-        return bool(self._boxes)
+        return bool(len(self._points))
 
     def _new_render_selection(self):
         return RenderSelection(self.context_identifier, self.resource_pack)
 
+    def _get_box(self, box_index: int) -> RenderSelection:
+        """Get the RenderSelection to draw a box on its own."""
+        if box_index not in self._boxes:
+            render_box = self._new_render_selection()
+            render_box.points = self._points[box_index]
+            self._boxes[box_index] = render_box
+        return self._boxes[box_index]
+
     @property
     def selection_group(self) -> SelectionGroup:
         return SelectionGroup(
-            [SelectionBox(box.point1, box.point2) for box in self._boxes]
+            [SelectionBox(point1, point2) for point1, point2 in self._points]
         )
 
     @selection_group.setter
     def selection_group(self, selection_group: SelectionGroup):
         if not isinstance(selection_group, SelectionGroup):
             raise TypeError("selection_group must be a SelectionGroup.")
-        self.unload()
-        for box in selection_group.selection_boxes:
-            render_box = self._new_render_selection()
-            render_box.point1 = numpy.array(box.point_1)
-            render_box.point2 = numpy.array(box.point_2)
-            self._boxes.append(render_box)
+        points = numpy.floor(
+            numpy.array(
+                [[box.point_1, box.point_2] for box in selection_group.selection_boxes],
+                dtype=numpy.float64,
+            ).reshape((-1, 2, 3))
+        ).astype(numpy.int64)
+        # Only the boxes that have changed need recreating.
+        count = min(len(points), len(self._points))
+        changed = set(
+            numpy.flatnonzero(
+                numpy.any(points[:count] != self._points[:count], axis=(1, 2))
+            ).tolist()
+        )
+        for box_index in list(self._boxes):
+            if box_index in changed or box_index >= len(points):
+                self._boxes.pop(box_index).unload()
+        self._points = points
+        self._instances.set_boxes(numpy.sort(points, 1))
+
+    def _separate_boxes(self, camera_position: PointCoordinatesAny = None) -> Set[int]:
+        """The indexes of the boxes that must be drawn separately.
+
+        :param camera_position: The position of the camera.
+        :return: The indexes of the boxes containing the camera.
+        """
+        if camera_position is None or not len(self._points):
+            return set()
+        bounds = numpy.sort(self._points, 1)
+        camera_position = numpy.asarray(camera_position)
+        return set(
+            numpy.flatnonzero(
+                numpy.all(bounds[:, 0] <= camera_position, axis=1)
+                & numpy.all(camera_position < bounds[:, 1], axis=1)
+            ).tolist()
+        )
 
     def draw(
         self, camera_matrix: numpy.ndarray, camera_position: PointCoordinatesAny = None
     ):
-        for box in self._boxes:
-            box.draw(camera_matrix, camera_position)
+        if self._instanced is None:
+            self._instanced = get_gl_version() == "330"
+        if self._instanced:
+            separate_boxes = self._separate_boxes(camera_position)
+            self._instances.set_hidden(separate_boxes)
+            self._instances.draw(camera_matrix)
+        else:
+            separate_boxes = range(len(self._points))
+        for box_index in sorted(separate_boxes):
+            self._get_box(box_index).draw(camera_matrix, camera_position)
 
     def unload(self):
         while self._boxes:
-            box = self._boxes.pop()
+            _, box = self._boxes.popitem()
             box.unload()
+        self._instances.unload()
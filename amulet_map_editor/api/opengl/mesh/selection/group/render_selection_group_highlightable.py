@@ -1,26 +1,42 @@
-from typing import List, Union
+from typing import Dict, Set, Union
 import numpy
 from .render_selection_group import (
     RenderSelectionGroup,
 )
+from amulet.api.data_types import PointCoordinatesAny
 from amulet_map_editor.api.opengl.mesh.selection import RenderSelectionHighlightable
 
 
 class RenderSelectionGroupHighlightable(RenderSelectionGroup):
-    """A group of selection boxes to be drawn with an added editable box."""
+    """A group of selection boxes to be drawn with an added editable box.
+    The highlighted boxes are drawn separately."""
 
     def _new_render_selection(self):
         return RenderSelectionHighlightable(
             self._context_identifier, self.resource_pack
         )
 
+    def _highlighted_boxes(self) -> Set[int]:
+        self._boxes: Dict[int, RenderSelectionHighlightable]
+        return {
+            box_index
+            for box_index, box in self._boxes.items()
+            if numpy.any(box.highlight_edges)
+        }
+
     def reset_highlight_edges(self):
-        self._boxes: List[RenderSelectionHighlightable]
-        for box in self._boxes:
+        self._boxes: Dict[int, RenderSelectionHighlightable]
+        for box in self._boxes.values():
             box.reset_highlight_edges()
 
     def set_highlight_edges(
         self, box_index: int, highlight_edges: Union[numpy.ndarray, bool]
     ):
-        self._boxes: List[RenderSelectionHighlightable]
-        self._boxes[box_index].set_highlight_edges(highlight_edges)
+        if not -len(self) <= box_index < len(self):
+            raise IndexError("box_index is out of range.")
+        box_index %= len(self)
+        box: RenderSelectionHighlightable = self._get_box(box_index)
+        box.set_highlight_edges(highlight_edges)
+
+    def _separate_boxes(self, camera_position: PointCoordinatesAny = None) -> Set[int]:
+        return super()._separate_boxes(camera_position) | self._highlighted_boxes()
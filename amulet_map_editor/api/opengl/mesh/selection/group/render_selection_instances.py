@@ -0,0 +1,264 @@
+import numpy
+from OpenGL.GL import (
+    GL_TRIANGLES,
+    GL_LINE_STRIP,
+    GL_ARRAY_BUFFER,
+    GL_DYNAMIC_DRAW,
+    GL_FLOAT,
+    GL_FALSE,
+    GL_DEPTH_TEST,
+    glGenBuffers,
+    glBindBuffer,
+    glBufferData,
+    glBufferSubData,
+    glDeleteBuffers,
+    glVertexAttribPointer,
+    glEnableVertexAttribArray,
+    glVertexAttribDivisor,
+    glGetUniformLocation,
+    glUniform3f,
+    glUniform4f,
+    glDrawArraysInstanced,
+    glGetBooleanv,
+    glDisable,
+    glEnable,
+)
+import ctypes
+from typing import Iterable
+
+from amulet_map_editor.api.opengl.mesh.tri_mesh import TriMesh
+from amulet_map_editor.api.opengl.mesh.selection import RenderSelection
+from amulet_map_editor.api.opengl.resource_pack import (
+    OpenGLResourcePack,
+    OpenGLResourcePackManagerStatic,
+)
+from amulet_map_editor.api.opengl.matrix import displacement_matrix
+from amulet_map_editor.api.opengl.data_types import RGBColour
+
+# The distance the faces are drawn outside the box. This must match the render_selection_instanced shaders.
+BOX_PADDING = 0.005
+
+
+def _box_template() -> numpy.ndarray:
+    """The vertices of the unit cube drawn for each box.
+    Each vertex is the position in the unit cube followed by the axis the u and v texture coordinates are read from.
+    """
+    positions, _ = RenderSelection._create_box_faces(
+        (0, 0, 0), (1, 1, 1), True, True, True, True, True, True
+    )
+    # Find the axis each texture coordinate is taken from using a box with a different value on each axis.
+    box_min, box_max = numpy.array([1, 2, 3]), numpy.array([4, 5, 6])
+    box_positions, uvs = RenderSelection._create_box_faces(
+        box_min, box_max, True, True, True, True, True, True
+    )
+    verts = numpy.zeros((len(positions), 9), dtype=numpy.float32)
+    verts[:, :3] = positions
+    verts[:, 3:6] = box_positions == uvs[:, 0:1]
+    verts[:, 6:9] = box_positions == uvs[:, 1:2]
+    return verts
+
+
+class RenderSelectionInstances(TriMesh, OpenGLResourcePackManagerStatic):
+    """Draws every box in an array of boxes with one instanced draw call.
+    The boxes look the same as RenderSelection.
+    This requires OpenGL 3.3."""
+
+    _vertex_attrs = (
+        3,  # position in the unit cube
+        3,  # the axis of the u texture coordinate
+        3,  # the axis of the v texture coordinate
+    )
+    _vert_len = sum(_vertex_attrs)
+    _instance_attrs = (
+        3,  # box min
+        3,  # box max
+        1,  # is the box hidden
+    )
+    _instance_len = sum(_instance_attrs)
+
+    def __init__(
+        self,
+        context_identifier: str,
+        resource_pack: OpenGLResourcePack,
+        box_tint: RGBColour,
+    ):
+        OpenGLResourcePackManagerStatic.__init__(self, resource_pack)
+        TriMesh.__init__(
+            self,
+            context_identifier,
+            resource_pack.get_atlas_id(context_identifier),
+            resource_pack.texture_array,
+        )
+        self._box_tint = box_tint
+        self._texture_bounds = resource_pack.texture_bounds(
+            resource_pack.get_texture_path("amulet", "amulet_ui/selection")
+        )
+        self.verts = _box_template()
+        self.draw_count = len(self.verts)
+        self._draw_mode = GL_TRIANGLES
+        self._tint_location = None
+        self._texture_bounds_location = None
+
+        # The min and max point of each box.
+        self._bounds = numpy.zeros((0, 2, 3), dtype=numpy.int64)
+        # The vertex data of each box relative to self._origin
+        self._instances = numpy.zeros((0, self._instance_len), dtype=numpy.float32)
+        # The boxes are stored relative to this so that the floats keep their precision.
+        self._origin = numpy.zeros(3, dtype=numpy.int64)
+        self._ibo = None  # instance buffer object
+        self._ibo_size = 0  # the number of boxes the instance buffer can hold
+        # The indexes of the boxes that need uploading. None if the whole buffer needs uploading.
+        self._changed_instances = None
+
+    def __len__(self):
+        return len(self._bounds)
+
+    @property
+    def shader_name(self) -> str:
+        if self._texture_array:
+            return "render_selection_instanced_array"
+        return "render_selection_instanced"
+
+    @property
+    def draw_mode(self):
+        return self._draw_mode
+
+    def set_boxes(self, bounds: numpy.ndarray):
+        """Set the boxes to draw.
+        If the number of boxes has not changed only the boxes that changed are uploaded.
+
+        :param bounds: An Nx2x3 int array of the min and max point of each box.
+        """
+        bounds = numpy.asarray(bounds, dtype=numpy.int64).reshape((-1, 2, 3))
+        if bounds.shape == self._bounds.shape and self._changed_instances is not None:
+            changed = numpy.flatnonzero(numpy.any(bounds != self._bounds, axis=(1, 2)))
+            self._bounds = bounds
+            self._instances[changed, :6] = (bounds[changed] - self._origin).reshape(
+                (-1, 6)
+            )
+            self._changed_instances.update(changed.tolist())
+        else:
+            self._bounds = bounds
+            if len(bounds):
+                self._origin = bounds[0, 0] - bounds[0, 0] % 16
+            self._instances = numpy.zeros(
+                (len(bounds), self._instance_len), dtype=numpy.float32
+            )
+            self._instances[:, :6] = (bounds - self._origin).reshape((-1, 6))
+            self._changed_instances = None
+
+    def set_hidden(self, indexes: Iterable[int]):
+        """Set which boxes are not drawn. The others are drawn.
+
+        :param indexes: The indexes of the boxes to hide.
+        """
+        hidden = numpy.zeros(len(self._instances), dtype=numpy.float32)
+        hidden[list(indexes)] = 1
+        changed = numpy.flatnonzero(self._instances[:, 6] != hidden)
+        if len(changed):
+            self._instances[:, 6] = hidden
+            if self._changed_instances is not None:
+                self._changed_instances.update(changed.tolist())
+
+    def _setup(self):
+        if self._vao is None:
+            super()._setup()
+            self._tint_location = glGetUniformLocation(self._shader, "tint")
+            self._texture_bounds_location = glGetUniformLocation(
+                self._shader, "texture_bounds"
+            )
+
+    def _setup_opengl_attrs(self):
+        super()._setup_opengl_attrs()
+        self._ibo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self._ibo)
+        attr_start = 0
+        for index, attr_count in enumerate(
+            self._instance_attrs, len(self._vertex_attrs)
+        ):
+            glVertexAttribPointer(
+                index,
+                attr_count,
+                GL_FLOAT,
+                GL_FALSE,
+                self._instance_len * 4,
+                ctypes.c_void_p(attr_start * 4),
+            )
+            glEnableVertexAttribArray(index)
+            glVertexAttribDivisor(index, 1)
+            attr_start += attr_count
+        self._ibo_size = 0
+        self._changed_instances = None
+        # the vertices are uploaded to the bound buffer
+        glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
+
+    def _upload_instances(self):
+        """Upload the boxes that have changed since the last upload."""
+        if self._changed_instances is not None and not self._changed_instances:
+            return
+        glBindBuffer(GL_ARRAY_BUFFER, self._ibo)
+        stride = self._instance_len * 4
+        if self._changed_instances is None or len(self._instances) > self._ibo_size:
+            # Leave space for boxes to be added.
+            self._ibo_size = max(len(self._instances), 2 * self._ibo_size, 16)
+            glBufferData(
+                GL_ARRAY_BUFFER, self._ibo_size * stride, None, GL_DYNAMIC_DRAW
+            )
+            if len(self._instances):
+                glBufferSubData(
+                    GL_ARRAY_BUFFER, 0, self._instances.nbytes, self._instances
+                )
+        else:
+            # upload each run of consecutive changed boxes
+            changed = numpy.array(sorted(self._changed_instances), dtype=numpy.int64)
+            run_starts = numpy.flatnonzero(numpy.diff(changed, prepend=-2) != 1)
+            run_ends = numpy.append(run_starts[1:], len(changed))
+            for start, end in zip(changed[run_starts], changed[run_ends - 1] + 1):
+                data = numpy.ascontiguousarray(self._instances[start:end])
+                glBufferSubData(GL_ARRAY_BUFFER, int(start) * stride, data.nbytes, data)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self._changed_instances = set()
+
+    def unload(self):
+        super().unload()
+        if self._ibo is not None:
+            glDeleteBuffers(1, int(self._ibo))
+            self._ibo = None
+        self._ibo_size = 0
+        self._changed_instances = None
+
+    def _draw_geometry(self):
+        glUniform3f(self._tint_location, *self._box_tint)
+        glUniform4f(self._texture_bounds_location, *self._texture_bounds)
+        glDrawArraysInstanced(
+            self.draw_mode, self.draw_start, self.draw_count, len(self._instances)
+        )
+
+    def draw(self, camera_matrix: numpy.ndarray):
+        """
+        Draw the selection boxes.
+        The boxes that the camera is in should be hidden and drawn with RenderSelection
+        so that the inside faces are drawn.
+        :param camera_matrix: 4x4 transformation matrix for the camera
+        :return:
+        """
+        if not len(self._instances):
+            return
+        self._setup()
+        self._upload_instances()
+
+        transformation_matrix = numpy.matmul(
+            camera_matrix, displacement_matrix(*self._origin)
+        )
+
+        self._draw_mode = GL_TRIANGLES
+        self._draw(transformation_matrix)
+
+        # draw the lines around the boxes
+        depth_state = glGetBooleanv(GL_DEPTH_TEST)
+        if depth_state:
+            glDisable(GL_DEPTH_TEST)
+        self._draw_mode = GL_LINE_STRIP
+        self._draw(transformation_matrix)
+        if depth_state:
+            glEnable(GL_DEPTH_TEST)
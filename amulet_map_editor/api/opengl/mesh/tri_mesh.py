@@ -1,10 +1,12 @@
 from OpenGL.GL import (
     glBindTexture,
     GL_TEXTURE_2D,
+    GL_TEXTURE_2D_ARRAY,
     GL_TRIANGLES,
     glBindVertexArray,
     glBindBuffer,
     GL_ARRAY_BUFFER,
+    GL_ELEMENT_ARRAY_BUFFER,
     GL_STATIC_DRAW,
     glUseProgram,
     glGetUniformLocation,
@@ -22,6 +24,8 @@ from OpenGL.GL import (
     glActiveTexture,
     GL_TEXTURE0,
     glDrawArrays,
+    glDrawElements,
+    GL_UNSIGNED_INT,
 )
 from OpenGL.error import GLError
 import ctypes
@@ -43,27 +47,48 @@ class TriMesh(Drawable, ContextManager):
     )
     _vert_len = sum(_vertex_attrs)
 
-    def __init__(self, context_identifier: str, texture: int):
+    def __init__(
+        self, context_identifier: str, texture: int, texture_array: bool = False
+    ):
         """Create a new TriMesh.
         The object can be created from another thread so OpenGL
-        variables cannot be set from here"""
+        variables cannot be set from here
+
+        :param context_identifier: The identifier of the context the mesh is drawn in.
+        :param texture: The OpenGL texture to draw the mesh with.
+        :param texture_array: Is the texture a GL_TEXTURE_2D_ARRAY. See OpenGLResourcePack.texture_array
+        """
         ContextManager.__init__(self, context_identifier)
         self._vao = None  # vertex array object
         self._vbo = None  # vertex buffer object
+        self._ebo = None  # element buffer object. Only used if indexed is True
         self._shader = None  # the shader program
         self._transform_location = (
             None  # the reference within the shader program of the transformation matrix
         )
         self._texture_location = None  # the location of the texture in the shader
         self._texture = texture
+        self._texture_array = texture_array
         self.verts = self.new_empty_verts()  # the vertices to draw
+        # the indices of the vertices to draw. Only used if indexed is True
+        self.indices = self.new_empty_indices()
         self.draw_start = 0
-        self.draw_count = 0  # the number of vertices to draw
+        self.draw_count = 0  # the number of vertices (or indices if indexed) to draw
 
     @staticmethod
     def new_empty_verts() -> numpy.ndarray:
         return numpy.zeros(0, dtype=numpy.float32)
 
+    @staticmethod
+    def new_empty_indices() -> numpy.ndarray:
+        return numpy.zeros(0, dtype=numpy.uint32)
+
+    @property
+    def indexed(self) -> bool:
+        """If True the vertices are drawn in the order given by self.indices.
+        This allows triangles to share vertices."""
+        return False
+
     @property
     def vertex_usage(self):
         return GL_STATIC_DRAW
@@ -74,7 +99,7 @@ class TriMesh(Drawable, ContextManager):
 
     @property
     def shader_name(self) -> str:
-        return "render_chunk"
+        return "render_chunk_array" if self._texture_array else "render_chunk"
 
     def _setup(self):
         """Setup OpenGL attributes if required"""
@@ -89,6 +114,10 @@ class TriMesh(Drawable, ContextManager):
             glBindVertexArray(self._vao)
             self._vbo = glGenBuffers(1)  # and the buffer
             glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
+            if self.indexed:
+                # the element buffer binding is stored in the vertex array object
+                self._ebo = glGenBuffers(1)
+                glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self._ebo)
             self._setup_opengl_attrs()
             self._change_verts()
             glBindVertexArray(0)
@@ -110,8 +139,8 @@ class TriMesh(Drawable, ContextManager):
             glEnableVertexAttribArray(index)
             attr_start += attr_count
 
-    def change_verts(self, verts=None):
-        """Modify the vertices in OpenGL."""
+    def change_verts(self, verts=None, indices=None):
+        """Modify the vertices (and indices if indexed) in OpenGL."""
         log.debug(f"change_verts {self}")
         try:
             glBindVertexArray(self._vao)
@@ -126,17 +155,23 @@ class TriMesh(Drawable, ContextManager):
                 return
             glBindVertexArray(self._vao)
             glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
-        self._change_verts(verts)
+        self._change_verts(verts, indices)
         glBindVertexArray(0)
         glBindBuffer(GL_ARRAY_BUFFER, 0)
 
-    def _change_verts(self, verts=None):
-        """Modify the vertices in OpenGL. Requires binding and unbinding."""
+    def _change_verts(self, verts=None, indices=None):
+        """Modify the vertices (and indices if indexed) in OpenGL. Requires binding and unbinding."""
         if verts is not None:
-            glBufferData(GL_ARRAY_BUFFER, verts.size * 4, verts, self.vertex_usage)
+            glBufferData(GL_ARRAY_BUFFER, verts.nbytes, verts, self.vertex_usage)
         else:
             glBufferData(
-                GL_ARRAY_BUFFER, self.verts.size * 4, self.verts, self.vertex_usage
+                GL_ARRAY_BUFFER, self.verts.nbytes, self.verts, self.vertex_usage
+            )
+        if self.indexed:
+            if indices is None:
+                indices = self.indices
+            glBufferData(
+                GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, self.vertex_usage
             )
 
     def unload(self):
@@ -145,6 +180,9 @@ class TriMesh(Drawable, ContextManager):
         if self._vbo is not None:
             glDeleteBuffers(1, int(self._vbo))
             self._vbo = None
+        if self._ebo is not None:
+            glDeleteBuffers(1, int(self._ebo))
+            self._ebo = None
         if self._vao is not None:
             glDeleteVertexArrays(1, int(self._vao))
             self._vao = None
@@ -172,9 +210,24 @@ class TriMesh(Drawable, ContextManager):
             self._setup()
             glBindVertexArray(self._vao)
         glActiveTexture(GL_TEXTURE0)
-        glBindTexture(GL_TEXTURE_2D, self._texture)
+        glBindTexture(
+            GL_TEXTURE_2D_ARRAY if self._texture_array else GL_TEXTURE_2D,
+            self._texture,
+        )
 
-        glDrawArrays(self.draw_mode, self.draw_start, self.draw_count)
+        self._draw_geometry()
 
         glBindVertexArray(0)
         glUseProgram(0)
+
+    def _draw_geometry(self):
+        """Issue the draw call. The shader and vertex array object are bound when this is called."""
+        if self.indexed:
+            glDrawElements(
+                self.draw_mode,
+                self.draw_count,
+                GL_UNSIGNED_INT,
+                ctypes.c_void_p(self.draw_start * 4),
+            )
+        else:
+            glDrawArrays(self.draw_mode, self.draw_start, self.draw_count)
@@ -1,4 +1,4 @@
-from .resource_pack import OpenGLResourcePack
+from .resource_pack import OpenGLResourcePack, get_opengl_resource_pack
 from .resource_pack_manager import (
     OpenGLResourcePackManager,
     OpenGLResourcePackManagerStatic,
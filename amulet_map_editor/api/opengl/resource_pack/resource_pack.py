@@ -12,13 +12,20 @@ from OpenGL.GL import (
     GL_TEXTURE_MAG_FILTER,
     GL_TEXTURE_WRAP_S,
     GL_TEXTURE_WRAP_T,
+    GL_TEXTURE_2D_ARRAY,
+    GL_TEXTURE_MAX_LEVEL,
+    GL_NEAREST_MIPMAP_NEAREST,
+    GL_RGBA8,
+    glTexImage3D,
+    glGenerateMipmap,
+    glDeleteTextures,
 )
-from typing import Generator, Any, Tuple, Dict, Optional
-import struct
+from typing import Generator, Any, Tuple, Dict, Optional, Set, Iterable, List
 import hashlib
 import os
 import json
-from PIL import Image
+import threading
+import weakref
 import numpy
 import glob
 
@@ -29,6 +36,29 @@ from amulet.api.block import Block
 
 from amulet_map_editor import log
 from amulet_map_editor.api.opengl import textureatlas
+from amulet_map_editor.api.opengl.context_manager import get_share_identifier
+
+# Increment this when the atlas layout changes.
+ATLAS_CACHE_VERSION = 2
+# The file in the atlas cache directory that the signature and texture hash of each resource pack is stored in.
+PACK_MANIFEST_NAME = "pack_manifest.json"
+# Increment this when the format of the translation cache changes.
+TRANSLATION_CACHE_VERSION = 1
+
+
+def _block_key(block: Block) -> str:
+    """A string that uniquely identifies a block and its extra blocks."""
+    return "\n".join(layer.snbt_blockstate for layer in block.block_tuple)
+
+
+def _block_from_key(key: str) -> Block:
+    """Create the block from a string created by _block_key."""
+    base_block, *extra_blocks = (
+        Block.from_snbt_blockstate(layer) for layer in key.split("\n")
+    )
+    for extra_block in extra_blocks:
+        base_block += extra_block
+    return base_block
 
 
 class OpenGLResourcePack:
@@ -37,41 +67,103 @@ class OpenGLResourcePack:
 
     _translator: PyMCTranslate.Version
     _block_models: Dict[Block, BlockMesh]
+    # the version block key for each universal block key. Loaded from the translation cache
+    _translations: Optional[Dict[str, str]]
     _texture_bounds: Dict[Any, Tuple[float, float, float, float]]
+    # the flat RGBA atlas. May be mapped from the cache file
     _image: Optional[numpy.ndarray]
     _image_width: int
     _image_height: int
+    # the number of layers in the texture array or 0 if it is a 2D texture
+    _image_layers: int
+    _mip_levels: int
+    # the path of the cached atlas the image can be loaded from if it is released
+    _image_path: Optional[str]
+    # the texture for each group of contexts that share textures
     _gl_textures: Dict[str, int]
+    # the contexts using each texture
+    _gl_texture_contexts: Dict[str, Set[str]]
 
     def __init__(
-        self, resource_pack: BaseResourcePackManager, translator: PyMCTranslate.Version
+        self,
+        resource_pack: BaseResourcePackManager,
+        translator: PyMCTranslate.Version,
+        max_texture_size: int = 0,
     ):
+        """
+        Create a new OpenGLResourcePack.
+
+        :param resource_pack: The resource pack to load the textures and block models from.
+        :param translator: The translator to convert the blocks to the version the resource pack is for.
+        :param max_texture_size: The largest texture the OpenGL contexts support.
+            If the atlas would be larger than this the textures are loaded into a texture array instead.
+            This should be 0 if the contexts do not support texture arrays.
+        """
         self._resource_pack = resource_pack
         self._translator = translator
+        self._max_texture_size = max_texture_size
         self._block_models: Dict[Block, BlockMesh] = {}
+        self._translations: Optional[Dict[str, str]] = None
+        self._translations_changed = False
+        self._block_model_lock = threading.RLock()
 
         self._texture_bounds: Dict[str, Tuple[float, float, float, float]] = {}
-        self._image: Optional[Image.Image] = None
+        self._image: Optional[numpy.ndarray] = None
         self._image_width: int = 0
         self._image_height: int = 0
+        self._image_layers: int = 0
+        self._mip_levels: int = 0
+        self._image_path: Optional[str] = None
+        self._setup_lock = threading.Lock()
 
         self._gl_textures: Dict[str, int] = {}
+        self._gl_texture_contexts: Dict[str, Set[str]] = {}
+        self._pack_hash: Optional[str] = None
+        self._atlas_hash: Optional[str] = None
 
     def get_atlas_id(self, context_id: str) -> int:
-        """Get the opengl texture id of the atlas for a given context."""
-        if context_id not in self._gl_textures:
-            if self._image is None:
+        """Get the opengl texture id of the atlas for a given context.
+        Contexts that share textures use the same texture so it is only loaded once.
+        This is a GL_TEXTURE_2D_ARRAY texture if texture_array is True otherwise a GL_TEXTURE_2D texture.
+        """
+        share_id = get_share_identifier(context_id)
+        if share_id not in self._gl_textures:
+            if self._atlas_hash is None:
                 raise Exception(
                     "OpenGLResourcePack.setup() needs to be run before accessing a texture."
                 )
-            self._setup_texture(context_id)
-        return self._gl_textures[context_id]
+            self._setup_texture(share_id)
+            self._gl_texture_contexts[share_id] = {context_id}
+            self._release_image()
+            self._log_memory()
+        else:
+            self._gl_texture_contexts[share_id].add(context_id)
+        return self._gl_textures[share_id]
+
+    def unload(self, context_id: str):
+        """Release the texture used by a context.
+        The texture is destroyed once no contexts are using it.
+        This must be run with the context current."""
+        share_id = get_share_identifier(context_id)
+        contexts = self._gl_texture_contexts.get(share_id)
+        if contexts is not None:
+            contexts.discard(context_id)
+            if not contexts:
+                glDeleteTextures([self._gl_textures.pop(share_id)])
+                del self._gl_texture_contexts[share_id]
+                self._log_memory()
 
     def get_texture_path(self, namespace: Optional[str], relative_path: str):
         """Get the absolute path of the image from the relative components.
         Useful for getting the id of textures for hard coded textures not connected to a resource pack."""
         return self._resource_pack.get_texture_path(namespace, relative_path)
 
+    @property
+    def texture_array(self) -> bool:
+        """Is the atlas stored in the layers of a texture array.
+        If True the layer of each texture is added to the x values of its bounding box."""
+        return bool(self._image_layers)
+
     def texture_bounds(self, texture_path: str) -> Tuple[float, float, float, float]:
         """Get the bounding box of a given texture path."""
         if texture_path in self._texture_bounds:
@@ -79,66 +171,279 @@ class OpenGLResourcePack:
         else:
             return self._texture_bounds[self._resource_pack.missing_no]
 
+    @property
+    def pack_hash(self) -> Optional[str]:
+        """A hash of the textures, the resource pack signatures and the translator version.
+        This changes if the textures or block models may have changed. It is None until setup has been run.
+        """
+        return self._pack_hash
+
+    @property
+    def atlas_hash(self) -> Optional[str]:
+        """A hash of the textures and the atlas layout.
+        This changes if the texture bounds may have changed. It is None until setup has been run.
+        """
+        return self._atlas_hash
+
     @property
     def translator(self) -> PyMCTranslate.Version:
         """The translator used to convert the universal blocks into the required version for the resource pack."""
         return self._translator
 
+    @staticmethod
+    def _stat_values(path: str) -> Optional[List[int]]:
+        """The size and modification time of a file or None if it does not exist.
+        This is a list so that it is the same after it is stored as JSON."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    @classmethod
+    def _textures_hash(cls, texture_paths: List[str]) -> str:
+        """A hash of the path, size and modification time of each texture."""
+        textures_hash = hashlib.sha1()
+        for path in texture_paths:
+            textures_hash.update(repr((path, cls._stat_values(path))).encode("utf-8"))
+        return textures_hash.hexdigest()
+
+    @classmethod
+    def _pack_signature(cls, pack_path: str) -> list:
+        """A value that changes when a resource pack is replaced or updated.
+        This only checks the top of the pack so it does not need to find every file in the pack."""
+        return [
+            cls._stat_values(os.path.join(pack_path, *path))
+            for path in ((), ("pack.mcmeta",), ("assets",))
+        ]
+
+    def _manifest_hash(self, cache_dir: str) -> str:
+        """A hash of the path, size and modification time of every texture in the atlas.
+
+        The hash of the textures in each resource pack is stored in a manifest with the signature of the pack.
+        The textures in a pack are only checked again if its signature or list of textures has changed.
+
+        :param cache_dir: The directory the manifest is stored in.
+        :return: The hash of the textures.
+        """
+        manifest_path = os.path.join(cache_dir, PACK_MANIFEST_NAME)
+        try:
+            with open(manifest_path) as f:
+                pack_manifest = json.load(f)
+        except Exception:
+            pack_manifest = {}
+        manifest_changed = False
+
+        pack_paths = [
+            os.path.join(os.path.normpath(pack_path), "")
+            for pack_path in self._resource_pack.pack_paths
+        ]
+        pack_textures: Dict[str, List[str]] = {
+            pack_path: [] for pack_path in pack_paths
+        }
+        # textures that are not in one of the resource packs
+        other_textures: List[str] = []
+        texture_paths = list(self._resource_pack.textures)
+        for path in texture_paths:
+            for pack_path in pack_paths:
+                if os.path.normpath(path).startswith(pack_path):
+                    pack_textures[pack_path].append(path)
+                    break
+            else:
+                other_textures.append(path)
+
+        manifest = hashlib.sha1(
+            repr((ATLAS_CACHE_VERSION, self._max_texture_size, texture_paths)).encode(
+                "utf-8"
+            )
+        )
+        for pack_path, textures in pack_textures.items():
+            signature = self._pack_signature(pack_path)
+            paths_hash = hashlib.sha1(repr(textures).encode("utf-8")).hexdigest()
+            entry = pack_manifest.get(pack_path)
+            if (
+                not isinstance(entry, dict)
+                or entry.get("signature") != signature
+                or entry.get("paths") != paths_hash
+            ):
+                entry = pack_manifest[pack_path] = {
+                    "signature": signature,
+                    "paths": paths_hash,
+                    "textures": self._textures_hash(textures),
+                }
+                manifest_changed = True
+            manifest.update(entry["textures"].encode("utf-8"))
+        manifest.update(self._textures_hash(other_textures).encode("utf-8"))
+
+        if manifest_changed:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                with open(f"{manifest_path}.tmp", "w") as f:
+                    json.dump(pack_manifest, f)
+                os.replace(f"{manifest_path}.tmp", manifest_path)
+            except OSError:
+                log.warning("Failed writing the resource pack manifest", exc_info=True)
+        return manifest.hexdigest()
+
     def setup(self) -> Generator[float, None, None]:
-        """Create and bind the atlas texture."""
-        if self._image is None:
-            cache_id = struct.unpack(
-                "H",
-                hashlib.sha1(
-                    "".join(self._resource_pack.pack_paths).encode("utf-8")
-                ).digest()[:2],
-            )[0]
-
-            atlas: Image.Image
-
-            mod_time = max(
-                os.stat(path).st_mtime
-                for pack in self._resource_pack.pack_paths
-                for path in glob.glob(os.path.join(pack, "**", "*.*"), recursive=True)
+        """Create the atlas. The atlas is loaded into OpenGL by get_atlas_id."""
+        with self._setup_lock:
+            if self._atlas_hash is None:
+                yield from self._setup()
+                self._log_memory()
+
+    def _setup(self) -> Generator[float, None, None]:
+        """Load the atlas from the cache or create it."""
+        # The atlas is stored as raw RGBA data so that it can be mapped into memory and given straight to OpenGL.
+        cache_dir = os.path.join(".", "cache", "resource_pack")
+        manifest_hash = self._manifest_hash(cache_dir)
+        img_path = os.path.join(cache_dir, f"{manifest_hash}.rgba")
+        header_path = os.path.join(cache_dir, f"{manifest_hash}.json")
+        try:
+            with open(header_path) as f:
+                header = json.load(f)
+            width, height = header["size"]
+            layers = header["layers"]
+            mip_levels = header["mip_levels"]
+            image = numpy.memmap(
+                img_path, dtype=numpy.uint8, mode="r", shape=(width * height * 4,)
+            )
+            bounds = header["bounds"]
+        except Exception:
+            atlas: textureatlas.AtlasImage
+            atlas_iter = textureatlas.create_atlas_layers_iter(
+                self._resource_pack.textures, self._max_texture_size or None
             )
+            try:
+                while True:
+                    yield next(atlas_iter)
+            except StopIteration as e:
+                atlas = e.value
+            width, height = atlas.image.size
+            layers = atlas.layers
+            mip_levels = atlas.mip_levels
+            bounds = atlas.bounds
+            image = numpy.array(atlas.image.convert("RGBA")).astype(numpy.uint8).ravel()
+            try:
+                self._save_atlas(
+                    cache_dir,
+                    manifest_hash,
+                    image,
+                    width,
+                    height,
+                    layers,
+                    mip_levels,
+                    bounds,
+                )
+            except OSError:
+                log.warning("Failed caching the texture atlas", exc_info=True)
+                img_path = None
+
+        self._image_width, self._image_height = width, height
+        self._image_layers = layers
+        self._mip_levels = mip_levels
+        self._image = image
+        self._image_path = img_path
+        self._texture_bounds = bounds
+        self._atlas_hash = manifest_hash
+        # The block models are also loaded from the resource packs so the pack signatures are included.
+        self._pack_hash = hashlib.sha1(
+            repr(
+                (
+                    manifest_hash,
+                    [
+                        self._pack_signature(pack_path)
+                        for pack_path in self._resource_pack.pack_paths
+                    ],
+                    self._translator.platform,
+                    self._translator.version_number,
+                )
+            ).encode("utf-8")
+        ).hexdigest()
 
-            cache_dir = os.path.join(".", "cache", "resource_pack")
-            img_path = os.path.join(cache_dir, f"{cache_id}.png")
-            bounds_path = os.path.join(cache_dir, f"{cache_id}.json")
+    def _get_image(self) -> numpy.ndarray:
+        """Get the flat RGBA atlas, loading it from the cache if it has been released."""
+        if self._image is None:
             try:
-                with open(bounds_path) as f:
-                    cache_mod_time, bounds = json.load(f)
-                if mod_time != cache_mod_time:
-                    raise Exception(
-                        "The resource packs have changed since last merging."
-                    )
-                atlas = Image.open(img_path)
-            except:
-                atlas_iter = textureatlas.create_atlas_iter(
-                    self._resource_pack.textures
+                self._image = numpy.memmap(
+                    self._image_path,
+                    dtype=numpy.uint8,
+                    mode="r",
+                    shape=(self._image_width * self._image_height * 4,),
                 )
-                try:
-                    while True:
-                        yield next(atlas_iter)
-                except StopIteration as e:
-                    (
-                        atlas,
-                        bounds,
-                    ) = e.value
-                    os.makedirs(cache_dir, exist_ok=True)
-                    atlas.save(img_path)
-                    with open(bounds_path, "w") as f:
-                        json.dump((mod_time, bounds), f)
-
-            self._image_width, self._image_height = atlas.size
-            self._image = numpy.array(atlas).astype(numpy.uint8).ravel()
-            self._texture_bounds = bounds
+            except Exception:
+                log.warning("Failed loading the cached texture atlas", exc_info=True)
+                self._atlas_hash = None
+                for _ in self.setup():
+                    pass
+        return self._image
+
+    def _release_image(self):
+        """Release the CPU copy of the atlas once it has been loaded into OpenGL.
+        It is kept if it could not be cached because it cannot be loaded again."""
+        if self._image_path is not None:
+            self._image = None
+
+    def _log_memory(self):
+        """Log the memory used by the atlas."""
+        image_size = self._image_width * self._image_height * 4
+        # The mipmaps use a third of the size of the image.
+        gl_size = image_size * 4 // 3 if self._mip_levels else image_size
+        ram_size = 0 if self._image is None else image_size
+        log.info(
+            f"Texture atlas memory: {ram_size / 2**20:.1f}MiB in RAM, "
+            f"{len(self._gl_textures)} OpenGL copies of {gl_size / 2**20:.1f}MiB "
+            f"used by {sum(map(len, self._gl_texture_contexts.values()))} contexts"
+        )
+
+    def _save_atlas(
+        self,
+        cache_dir: str,
+        manifest_hash: str,
+        image: numpy.ndarray,
+        width: int,
+        height: int,
+        layers: int,
+        mip_levels: int,
+        bounds: Dict[str, Tuple[float, float, float, float]],
+    ):
+        """Write the atlas to the cache and remove the previous atlas for the same resource packs."""
+        os.makedirs(cache_dir, exist_ok=True)
+        for header_path in glob.glob(os.path.join(cache_dir, "*.json")):
+            if os.path.basename(header_path) == PACK_MANIFEST_NAME:
+                continue
+            try:
+                with open(header_path) as f:
+                    header = json.load(f)
+                if header["pack_paths"] == self._resource_pack.pack_paths:
+                    os.remove(header_path)
+                    os.remove(os.path.splitext(header_path)[0] + ".rgba")
+            except Exception:
+                continue
+        img_path = os.path.join(cache_dir, f"{manifest_hash}.rgba")
+        image.tofile(f"{img_path}.tmp")
+        os.replace(f"{img_path}.tmp", img_path)
+        # The header is written last because it marks the atlas as valid.
+        with open(os.path.join(cache_dir, f"{manifest_hash}.json"), "w") as f:
+            json.dump(
+                {
+                    "size": (width, height),
+                    "layers": layers,
+                    "mip_levels": mip_levels,
+                    "pack_paths": self._resource_pack.pack_paths,
+                    "bounds": bounds,
+                },
+                f,
+            )
 
     def _setup_texture(self, context_id: str):
         """Set up the texture for a given context"""
         gl_texture = self._gl_textures[context_id] = glGenTextures(
             1
         )  # Create the texture location
+        if self._image_layers:
+            self._setup_texture_array(gl_texture)
+            return
         glBindTexture(GL_TEXTURE_2D, gl_texture)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
@@ -155,25 +460,162 @@ class OpenGLResourcePack:
             0,
             GL_RGBA,
             GL_UNSIGNED_BYTE,
-            self._image,
+            self._get_image(),
         )
         glBindTexture(GL_TEXTURE_2D, 0)
         log.info("Finished setting up texture atlas in OpenGL")
 
+    def _setup_texture_array(self, gl_texture: int):
+        """Load the layers of the atlas into a texture array and generate the mipmaps of each layer."""
+        glBindTexture(GL_TEXTURE_2D_ARRAY, gl_texture)
+        glTexParameteri(
+            GL_TEXTURE_2D_ARRAY,
+            GL_TEXTURE_MIN_FILTER,
+            GL_NEAREST_MIPMAP_NEAREST if self._mip_levels else GL_NEAREST,
+        )
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        # Smaller mipmaps would mix neighbouring textures.
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MAX_LEVEL, self._mip_levels)
+        glTexImage3D(
+            GL_TEXTURE_2D_ARRAY,
+            0,
+            GL_RGBA8,
+            self._image_width,
+            self._image_height // self._image_layers,
+            self._image_layers,
+            0,
+            GL_RGBA,
+            GL_UNSIGNED_BYTE,
+            self._get_image(),
+        )
+        if self._mip_levels:
+            glGenerateMipmap(GL_TEXTURE_2D_ARRAY)
+        glBindTexture(GL_TEXTURE_2D_ARRAY, 0)
+        log.info(
+            f"Finished setting up texture array with {self._image_layers} layers in OpenGL"
+        )
+
     def get_block_model(self, universal_block: Block) -> BlockMesh:
         """Get the BlockMesh class for a given universal Block.
         The Block will be translated to the version format using the
         previously specified translator."""
-        if universal_block not in self._block_models:
-            version_block = self._translator.block.from_universal(
-                universal_block.base_block
-            )[0]
-            if universal_block.extra_blocks:
-                for block_ in universal_block.extra_blocks:
-                    version_block += self._translator.block.from_universal(block_)[0]
-
-            self._block_models[universal_block] = self._resource_pack.get_block_model(
-                version_block
-            )
+        return self.get_block_models((universal_block,))[0]
 
-        return self._block_models[universal_block]
+    def get_block_models(self, universal_blocks: Iterable[Block]) -> List[BlockMesh]:
+        """Get the BlockMesh class for each universal Block.
+        The blocks that have not been seen before are translated and loaded in one go.
+        The translations are cached on disk so that later sessions do not need to translate them again.
+
+        :param universal_blocks: The universal blocks to get the models of.
+        :return: A BlockMesh for each block in the same order.
+        """
+        universal_blocks = list(universal_blocks)
+        with self._block_model_lock:
+            missing = [
+                block
+                for block in dict.fromkeys(universal_blocks)
+                if block not in self._block_models
+            ]
+            if missing:
+                self._load_translations()
+                # The translator and model reader are not thread safe so the models are loaded serially.
+                for block in missing:
+                    self._block_models[block] = self._load_block_model(block)
+                self._save_translations()
+            return [self._block_models[block] for block in universal_blocks]
+
+    def _translate_block(self, universal_block: Block) -> Block:
+        """Translate a universal block to the version the resource pack is for."""
+        universal_key = _block_key(universal_block)
+        version_key = self._translations.get(universal_key)
+        if version_key is not None:
+            return _block_from_key(version_key)
+
+        version_block = self._translator.block.from_universal(
+            universal_block.base_block
+        )[0]
+        if universal_block.extra_blocks:
+            for block_ in universal_block.extra_blocks:
+                version_block += self._translator.block.from_universal(block_)[0]
+        if isinstance(version_block, Block):
+            self._translations[universal_key] = _block_key(version_block)
+            self._translations_changed = True
+        return version_block
+
+    def _load_block_model(self, universal_block: Block) -> BlockMesh:
+        """Translate a universal block and load its model from the resource pack."""
+        return self._resource_pack.get_block_model(
+            self._translate_block(universal_block)
+        )
+
+    def _translation_cache_path(self) -> str:
+        """The path of the translation cache for the translator."""
+        translator_hash = hashlib.sha1(
+            repr(
+                (
+                    TRANSLATION_CACHE_VERSION,
+                    PyMCTranslate.__version__,
+                    self._translator.platform,
+                    self._translator.version_number,
+                )
+            ).encode("utf-8")
+        ).hexdigest()
+        return os.path.join(".", "cache", "translation", f"{translator_hash}.json")
+
+    def _load_translations(self):
+        """Load the translation cache if it has not been loaded."""
+        if self._translations is None:
+            try:
+                with open(self._translation_cache_path()) as f:
+                    self._translations = json.load(f)
+            except FileNotFoundError:
+                self._translations = {}
+            except Exception:
+                log.warning("Failed loading the translation cache", exc_info=True)
+                self._translations = {}
+
+    def _save_translations(self):
+        """Write the translation cache if new blocks have been translated."""
+        if self._translations_changed:
+            self._translations_changed = False
+            cache_path = self._translation_cache_path()
+            try:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                with open(f"{cache_path}.tmp", "w") as f:
+                    json.dump(self._translations, f)
+                os.replace(f"{cache_path}.tmp", cache_path)
+            except OSError:
+                log.warning("Failed caching the block translations", exc_info=True)
+
+
+# The resource packs that are in use. Worlds that use the same resource packs share one atlas.
+_resource_packs: "weakref.WeakValueDictionary[Tuple, OpenGLResourcePack]" = (
+    weakref.WeakValueDictionary()
+)
+_resource_pack_lock = threading.Lock()
+
+
+def get_opengl_resource_pack(
+    resource_pack: BaseResourcePackManager,
+    translator: PyMCTranslate.Version,
+    max_texture_size: int = 0,
+) -> OpenGLResourcePack:
+    """Get the OpenGLResourcePack for a resource pack.
+    If another world is using the same resource packs its OpenGLResourcePack is returned so the atlas is only loaded once.
+    The arguments are the same as OpenGLResourcePack.
+    """
+    key = (
+        tuple(resource_pack.pack_paths),
+        translator.platform,
+        translator.version_number,
+        max_texture_size,
+    )
+    with _resource_pack_lock:
+        opengl_resource_pack = _resource_packs.get(key)
+        if opengl_resource_pack is None:
+            opengl_resource_pack = _resource_packs[key] = OpenGLResourcePack(
+                resource_pack, translator, max_texture_size
+            )
+        return opengl_resource_pack
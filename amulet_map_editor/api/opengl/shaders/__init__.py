@@ -15,27 +15,38 @@ import re
 
 shader_dir = os.path.join(os.path.dirname(__file__))
 _shaders: Dict[Tuple[str, str], Any] = {}
+# The programs that use the fragment shader of another program.
+_shared_fragment_shaders: Dict[str, str] = {
+    "render_chunk_compact_array": "render_chunk_array"
+}
 
 GL_VERSION_MATCH = re.compile(r"^(?P<major>\d+)\.(?P<minor>\d+)?")
 
 
+def get_gl_version() -> str:
+    """Get the version of the shaders to use with the current context.
+    This is "330" for OpenGL 3.3 and above otherwise "120"."""
+    gl_version_match = GL_VERSION_MATCH.match(
+        glGetString(GL_SHADING_LANGUAGE_VERSION).decode("utf-8")
+    )
+    if gl_version_match:
+        gl_version_tuple = tuple(int(v) for v in gl_version_match.groups())
+        if gl_version_tuple >= (3, 30):
+            return "330"  # opengl 3.3
+        else:
+            return "120"  # opengl 2.1
+    else:
+        # in theory this shouldn't happen if the version is correctly formatted.
+        return "330"
+
+
 def get_shader(
     context_identifier: str, shader_name: str
 ) -> OpenGL.GL.shaders.ShaderProgram:
     shader_key = (context_identifier, shader_name)
     if shader_key not in _shaders:
-        gl_version_match = GL_VERSION_MATCH.match(
-            glGetString(GL_SHADING_LANGUAGE_VERSION).decode("utf-8")
-        )
-        if gl_version_match:
-            gl_version_tuple = tuple(int(v) for v in gl_version_match.groups())
-            if gl_version_tuple >= (3, 30):
-                gl_version = "330"  # opengl 3.3
-            else:
-                gl_version = "120"  # opengl 2.1
-        else:
-            # in theory this shouldn't happen if the version is correctly formatted.
-            gl_version = "330"
+        gl_version = get_gl_version()
+        fragment_name = _shared_fragment_shaders.get(shader_name, shader_name)
 
         def compile_shader():
             return OpenGL.GL.shaders.compileProgram(
@@ -44,7 +55,7 @@ def get_shader(
                     GL_VERTEX_SHADER,
                 ),
                 _load_shader(
-                    os.path.join(shader_dir, f"{shader_name}_{gl_version}.frag"),
+                    os.path.join(shader_dir, f"{fragment_name}_{gl_version}.frag"),
                     GL_FRAGMENT_SHADER,
                 ),
             )
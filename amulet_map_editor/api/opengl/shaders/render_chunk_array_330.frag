@@ -0,0 +1,28 @@
+# version 330
+in vec2 fTexCoord;
+flat in vec4 fTexOffset;
+flat in float fLayer;
+in vec3 fTint;
+
+out vec4 outColor;
+
+uniform sampler2DArray image;
+
+void main(){
+    // The gradients are found before the texture coordinates are wrapped
+    // so that the mipmap level does not change at the edge of the texture.
+    vec2 texSize = fTexOffset.zw - fTexOffset.xy;
+    vec4 texColor = textureGrad(
+    	image,
+    	vec3(
+			mix(fTexOffset.xy, fTexOffset.zw, mod(fTexCoord, 1.0)),
+			fLayer
+		),
+		dFdx(fTexCoord) * texSize,
+		dFdy(fTexCoord) * texSize
+	);
+	if(texColor.a < 0.02)
+        discard;
+    texColor.xyz = texColor.xyz * fTint * 0.85;
+	outColor = texColor;
+}
@@ -0,0 +1,21 @@
+# version 330
+layout(location = 0) in vec3 positions;
+layout(location = 1) in vec2 vTexCoord;
+layout(location = 2) in vec4 vTexOffset;
+layout(location = 3) in vec3 vTint;
+
+out vec2 fTexCoord;
+flat out vec4 fTexOffset;
+flat out float fLayer;
+out vec3 fTint;
+
+uniform mat4 transformation_matrix;
+
+void main(){
+    gl_Position = transformation_matrix * vec4(positions, 1.0);
+    fTexCoord = vTexCoord;
+    // The layer of the texture is stored in the integer part of the x bounds.
+    fLayer = floor(vTexOffset.x);
+    fTexOffset = vTexOffset - vec4(fLayer, 0.0, fLayer, 0.0);
+    fTint = vTint;
+}
@@ -0,0 +1,39 @@
+# version 120
+varying vec2 fTexCoord;
+varying float fTextureIndex;
+varying float fTintIndex;
+varying float fShade;
+
+uniform sampler2D image;
+uniform sampler2D texture_palette;
+uniform sampler2D tint_palette;
+
+// These must match chunk_tri_mesh.py
+const float PALETTE_WIDTH = 256.0;
+const float TINT_SCALE = 2.0;
+
+// Vertex texture lookups are not guaranteed in OpenGL 2.1 so the palettes are read here.
+// The index is the same for every vertex of a face so rounding removes any interpolation error.
+vec4 palette_lookup(sampler2D palette, float index){
+    index = floor(index + 0.5);
+    return texture2D(
+        palette,
+        vec2(mod(index, PALETTE_WIDTH) + 0.5, floor(index / PALETTE_WIDTH) + 0.5) / PALETTE_WIDTH
+    );
+}
+
+void main(){
+    vec4 fTexOffset = palette_lookup(texture_palette, fTextureIndex);
+    vec3 fTint = palette_lookup(tint_palette, fTintIndex).rgb * TINT_SCALE * fShade;
+    vec4 texColor = texture2D(
+    	image,
+    	vec2(
+			mix(fTexOffset.x, fTexOffset.z, mod(fTexCoord.x, 1.0)),
+			mix(fTexOffset.y, fTexOffset.w, mod(fTexCoord.y, 1.0))
+		)
+	);
+	if(texColor.a < 0.02)
+        discard;
+    texColor.xyz = texColor.xyz * fTint * 0.85;
+	gl_FragColor = texColor;
+}
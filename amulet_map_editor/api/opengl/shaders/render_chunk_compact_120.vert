@@ -0,0 +1,30 @@
+# version 120
+#extension GL_ARB_explicit_attrib_location : enable
+
+layout(location = 0) in vec3 positions;
+layout(location = 1) in vec2 vTexCoord;
+layout(location = 2) in float vTextureIndex;
+layout(location = 3) in float vTintIndex;
+
+varying vec2 fTexCoord;
+varying float fTextureIndex;
+varying float fTintIndex;
+varying float fShade;
+
+uniform mat4 transformation_matrix;
+
+// These must match chunk_tri_mesh.py
+const float POSITION_SCALE = 16.0;
+const float UV_SCALE = 64.0;
+
+void main(){
+    vec3 position = positions / POSITION_SCALE;
+    gl_Position = transformation_matrix * vec4(position, 1.0);
+    fTexCoord = vTexCoord / UV_SCALE;
+    fTextureIndex = vTextureIndex;
+    fTintIndex = vTintIndex;
+    float shade = mod(position.y / 32.0, 2.0);
+    if(shade > 1.0)
+        shade = 2.0 - shade;
+    fShade = 0.9 + 0.2 * shade;
+}
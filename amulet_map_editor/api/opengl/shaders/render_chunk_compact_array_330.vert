@@ -0,0 +1,40 @@
+# version 330
+layout(location = 0) in vec3 positions;
+layout(location = 1) in vec2 vTexCoord;
+layout(location = 2) in float vTextureIndex;
+layout(location = 3) in float vTintIndex;
+layout(location = 4) in float vLayer;
+
+out vec2 fTexCoord;
+flat out vec4 fTexOffset;
+flat out float fLayer;
+out vec3 fTint;
+
+uniform mat4 transformation_matrix;
+uniform sampler2D texture_palette;
+uniform sampler2D tint_palette;
+
+// These must match chunk_tri_mesh.py
+const float POSITION_SCALE = 16.0;
+const float UV_SCALE = 64.0;
+const float PALETTE_WIDTH = 256.0;
+const float TINT_SCALE = 2.0;
+
+vec4 palette_lookup(sampler2D palette, float index){
+    return texture(
+        palette,
+        vec2(mod(index, PALETTE_WIDTH) + 0.5, floor(index / PALETTE_WIDTH) + 0.5) / PALETTE_WIDTH
+    );
+}
+
+void main(){
+    vec3 position = positions / POSITION_SCALE;
+    gl_Position = transformation_matrix * vec4(position, 1.0);
+    fTexCoord = vTexCoord / UV_SCALE;
+    fTexOffset = palette_lookup(texture_palette, vTextureIndex);
+    fLayer = vLayer;
+    float shade = mod(position.y / 32.0, 2.0);
+    if(shade > 1.0)
+        shade = 2.0 - shade;
+    fTint = palette_lookup(tint_palette, vTintIndex).rgb * TINT_SCALE * (0.9 + 0.2 * shade);
+}
@@ -0,0 +1,38 @@
+# version 330
+// The vertices of a unit cube. The texture coordinates are the position on the u and v axis.
+layout(location = 0) in vec3 vUnitPosition;
+layout(location = 1) in vec3 vUAxis;
+layout(location = 2) in vec3 vVAxis;
+// One of each per box.
+layout(location = 3) in vec3 vBoxMin;
+layout(location = 4) in vec3 vBoxMax;
+layout(location = 5) in float vHidden;
+
+out vec2 fTexCoord;
+flat out vec4 fTexOffset;
+flat out float fLayer;
+out vec3 fTint;
+
+uniform mat4 transformation_matrix;
+uniform vec4 texture_bounds;
+uniform vec3 tint;
+
+// This must match render_selection_instances.py
+const float BOX_PADDING = 0.005;
+
+void main(){
+    vec3 position = mix(vBoxMin - BOX_PADDING, vBoxMax + BOX_PADDING, vUnitPosition);
+    if(vHidden != 0.0)
+        // The box is drawn separately. Put it outside the clip volume.
+        gl_Position = vec4(2.0, 2.0, 2.0, 1.0);
+    else
+        gl_Position = transformation_matrix * vec4(position, 1.0);
+    // The texture coordinates are relative to the chunk the box starts in.
+    vec3 chunk = floor(vBoxMin / 16.0) * 16.0;
+    vec3 local = mix(vBoxMin - chunk - BOX_PADDING, vBoxMax - chunk + BOX_PADDING, vUnitPosition);
+    fTexCoord = vec2(dot(local, vUAxis), dot(local, vVAxis)) / 16.0;
+    // The layer of the texture is stored in the integer part of the x bounds.
+    fLayer = floor(texture_bounds.x);
+    fTexOffset = texture_bounds - vec4(fLayer, 0.0, fLayer, 0.0);
+    fTint = tint;
+}
@@ -24,13 +24,21 @@
 
 from PIL import Image
 import math
-from typing import Dict, Tuple, List, Optional, Generator
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Tuple, List, Optional, Generator, NamedTuple
 from amulet_map_editor import log
 
 DESCRIPTION = """Packs many smaller images into one larger image, a Texture
 Atlas. A companion file (.map), is created that defines where each texture is
 mapped in the atlas."""
 
+# The size of the layers when the textures do not fit in one atlas.
+# The layers are larger if the largest texture does not fit in this size
+# and smaller if the maximum texture size is smaller than this.
+# Larger layers waste more memory in the last layer.
+LAYER_SIZE = 4096
+
 
 class AtlasTooSmall(Exception):
     pass
@@ -152,6 +160,81 @@ class PackRegion(object):
         return self._sub1.pack(packable, border) or self._sub2.pack(packable, border)
 
 
+class SkylinePacker(object):
+    """Packs two-dimensional Packable objects into a region of a fixed width.
+    The top edge of the packed objects (the skyline) is stored as a list of segments
+    and each object is placed where its top edge will be lowest.
+    The height of the region grows as needed so it is found in one pass."""
+
+    def __init__(self, width: int, border: int = 0, max_height: int = None):
+        self._width = width
+        self._border = border
+        self._max_height = max_height
+        # The x, y and width of each segment of the skyline in order of x.
+        self._skyline: List[List[int]] = [[0, 0, width]]
+
+    @property
+    def width(self) -> int:
+        return self._width
+
+    @property
+    def height(self) -> int:
+        """The height of the packed region."""
+        return max(y for _, y, _ in self._skyline)
+
+    def pack(self, packable: Packable):
+        """Pack a Packable into the lowest free space."""
+        width = packable.width + self._border * 2
+        height = packable.height + self._border * 2
+        if width > self._width:
+            raise AtlasTooSmall(f"Packable of width {packable.width} is too wide")
+        skyline = self._skyline
+
+        # find the segment to start at that gives the lowest top edge
+        best_top = best_index = best_y = None
+        for index, (x, _, _) in enumerate(skyline):
+            if x + width > self._width:
+                break
+            # the packable rests on the highest segment under it
+            y = 0
+            end_index = index
+            while skyline[end_index][0] < x + width:
+                y = max(y, skyline[end_index][1])
+                end_index += 1
+                if end_index == len(skyline):
+                    break
+            if best_top is None or y + height < best_top:
+                best_top, best_index, best_y = y + height, index, y
+
+        if self._max_height is not None and best_top > self._max_height:
+            raise AtlasTooSmall(f"Packable of height {packable.height} does not fit")
+
+        x = skyline[best_index][0]
+        packable.x = x + self._border
+        packable.y = best_y + self._border
+
+        # replace the part of the skyline under the packable
+        end = x + width
+        index = best_index
+        while index < len(skyline) and skyline[index][0] < end:
+            segment_end = skyline[index][0] + skyline[index][2]
+            if segment_end <= end:
+                del skyline[index]
+            else:
+                skyline[index][0] = end
+                skyline[index][2] = segment_end - end
+                break
+        skyline.insert(best_index, [x, best_top, width])
+
+        # merge neighbouring segments at the same height
+        for index in (best_index, best_index - 1):
+            if (
+                0 <= index < len(skyline) - 1
+                and skyline[index][1] == skyline[index + 1][1]
+            ):
+                skyline[index][2] += skyline.pop(index + 1)[2]
+
+
 class Frame(Packable):
     """An image file that can be packed into a PackRegion."""
 
@@ -216,6 +299,10 @@ class TextureAtlas(PackRegion):
             if not super(TextureAtlas, self).pack(frame, self._border):
                 raise AtlasTooSmall("Failed to pack frame %s" % frame.filename)
 
+    def add_packed(self, texture: Texture):
+        """Add a Texture whose frames have already been positioned."""
+        self._textures.append(texture)
+
     def to_dict(self) -> Dict[str, Tuple[int, int, int, int]]:
         return {
             tex.name: (
@@ -264,67 +351,213 @@ def create_atlas(
         return e.value
 
 
-def create_atlas_iter(
-    texture_tuple: Tuple[str, ...]
-) -> Generator[
-    float,
-    None,
-    Tuple[Image.Image, Dict[str, Tuple[float, float, float, float]]],
-]:
-    log.info("Creating texture atlas")
-    # Parse texture names
-    textures = []
-    for texture_index, texture in enumerate(texture_tuple):
-        if not texture_index % 100:
-            yield texture_index / (len(texture_tuple) * 2)
-        # Look for a texture name
-        name, frames = texture, [texture]
-
-        # Build frame objects
-        frames = [Frame(f) for f in frames]
+def load_frames_iter(
+    texture_tuple: Tuple[str, ...], workers: int = None
+) -> Generator[float, None, List[Frame]]:
+    """Load the image of every texture using a pool of threads.
 
-        # Add frames to texture object list
-        textures.append(Texture(name, frames))
+    :param texture_tuple: The paths of the textures to load.
+    :param workers: The number of threads to use. Defaults to the number of CPUs.
+    :return: A Frame for each texture in the same order.
+    """
+    workers = workers or min(8, os.cpu_count() or 1)
+    frames = []
+    with ThreadPoolExecutor(workers, thread_name_prefix="TextureLoader") as executor:
+        for texture_index, frame in enumerate(executor.map(Frame, texture_tuple)):
+            if not texture_index % 100:
+                yield texture_index / len(texture_tuple)
+            frames.append(frame)
+    return frames
 
-    # Sort textures by perimeter size in non-increasing order
-    textures = sorted(textures, key=lambda i: i.frames[0].perimeter, reverse=True)
 
-    height = 0
+def _load_textures_iter(
+    texture_tuple: Tuple[str, ...]
+) -> Generator[float, None, List[Texture]]:
+    """Load the textures sorted by height and then width in non-increasing order.
+    Packing the tallest textures first leaves a flatter skyline and keeps textures of the same size together.
+    """
+    frames_iter = load_frames_iter(texture_tuple)
+    try:
+        while True:
+            yield next(frames_iter)
+    except StopIteration as e:
+        frames = e.value
+    textures = [
+        Texture(texture, [frame]) for texture, frame in zip(texture_tuple, frames)
+    ]
+    return sorted(
+        textures,
+        key=lambda i: (i.frames[0].height, i.frames[0].width),
+        reverse=True,
+    )
+
+
+def _pack_atlas_iter(
+    textures: List[Texture], max_size: int = None
+) -> Generator[float, None, TextureAtlas]:
+    """Pack the textures into one atlas.
+    Raises AtlasTooSmall if the atlas would be larger than max_size."""
     width = 0
     pixels = 0
     for t in textures:
         for f in t.frames:
-            height = max(f.height, height)
             width = max(f.width, width)
             pixels += f.height * f.width
 
-    size = max(height, width, 1 << (math.ceil(pixels**0.5) - 1).bit_length())
-
-    atlas_created = False
-    atlas = None
-    while not atlas_created:
-        try:
-            # Create the atlas and pack textures in
-            log.info(f"Trying to pack textures into image of size {size}x{size}")
-            atlas = TextureAtlas(size, size)
-
-            for texture_index, texture in enumerate(textures):
-                if not texture_index % 30:
-                    yield 0.5 + texture_index / (len(textures) / 2)
-                atlas.pack(texture)
-            atlas_created = True
-        except AtlasTooSmall:
-            log.info(f"Image was too small. Trying with a larger area")
-            size *= 2
+    # The smallest power of two that would fit the textures in a square
+    width = max(width, 1 << (math.ceil(pixels**0.5) - 1).bit_length())
+    if max_size and width > max_size:
+        raise AtlasTooSmall(f"The atlas would be wider than {max_size}")
 
-    log.info(f"Successfully packed textures into an image of size {size}x{size}")
+    packer = SkylinePacker(width, max_height=max_size or None)
+    for texture_index, texture in enumerate(textures):
+        if not texture_index % 30:
+            yield texture_index / len(textures)
+        for frame in texture.frames:
+            packer.pack(frame)
+    height = max(packer.height, 1)
+
+    log.info(f"Packed textures into an image of size {width}x{height}")
+    atlas = TextureAtlas(width, height)
+    for texture in textures:
+        atlas.add_packed(texture)
+    return atlas
+
+
+def _pack_layers_iter(
+    textures: List[Texture], layer_size: int
+) -> Generator[float, None, List[TextureAtlas]]:
+    """Pack the textures into as many square atlases of size layer_size as needed.
+    The textures are packed in order so each layer holds textures of one or a few neighbouring sizes.
+    """
+    packer = None
+    layers: List[TextureAtlas] = []
+    for texture_index, texture in enumerate(textures):
+        if not texture_index % 30:
+            yield texture_index / len(textures)
+        for _ in range(2):
+            if packer is None:
+                packer = SkylinePacker(layer_size, max_height=layer_size)
+                layers.append(TextureAtlas(layer_size, layer_size))
+            try:
+                for frame in texture.frames:
+                    packer.pack(frame)
+            except AtlasTooSmall:
+                # start a new layer
+                packer = None
+            else:
+                layers[-1].add_packed(texture)
+                break
+        else:
+            raise AtlasTooSmall(
+                f"Texture {texture.name} is larger than {layer_size}x{layer_size}"
+            )
 
-    texture_atlas = atlas.generate("RGBA")
+    log.info(
+        f"Packed textures into {len(layers)} layers of size {layer_size}x{layer_size}"
+    )
+    return layers
+
+
+def _mip_levels(layers: List[TextureAtlas]) -> int:
+    """The number of mipmap levels that can be generated without mixing neighbouring textures.
+    Each texel of mipmap level n covers 2^n by 2^n texels so the position and size of every
+    frame must be a multiple of 2^n."""
+    levels = (layers[0].width - 1).bit_length() if layers else 0
+    for layer in layers:
+        for texture in layer.textures:
+            for frame in texture.frames:
+                alignment = frame.x | frame.y | frame.width | frame.height
+                levels = min(levels, (alignment & -alignment).bit_length() - 1)
+    return levels
+
+
+class AtlasImage(NamedTuple):
+    """A texture atlas created by create_atlas_layers_iter."""
+
+    # The atlas image. If layers is not 0 this is the layers stacked vertically.
+    image: Image.Image
+    # The bounds of each texture. The layer of each texture is added to the x values.
+    bounds: Dict[str, Tuple[float, float, float, float]]
+    # The number of layers or 0 if the atlas is a single image.
+    layers: int
+    # The number of mipmap levels that can be generated from each layer.
+    mip_levels: int
+
+
+def create_atlas_layers_iter(
+    texture_tuple: Tuple[str, ...], max_size: int = None
+) -> Generator[float, None, AtlasImage]:
+    """Create a texture atlas that is no larger than max_size.
+    If the textures do not fit in one atlas they are split over layers that can be loaded into a texture array.
+
+    :param texture_tuple: The paths of the textures to load.
+    :param max_size: The largest width and height of the atlas. There is no limit if this is None.
+    :return: The atlas image and texture bounds.
+    """
+    log.info("Creating texture atlas")
+    textures_iter = _load_textures_iter(texture_tuple)
+    try:
+        while True:
+            yield next(textures_iter) / 2
+    except StopIteration as e:
+        textures = e.value
 
-    texture_bounds = atlas.to_dict()
+    pack_iter = _pack_atlas_iter(textures, max_size)
+    try:
+        while True:
+            yield 0.5 + next(pack_iter) / 4
+    except StopIteration as e:
+        layers = [e.value]
+        layer_count = 0
+    except AtlasTooSmall:
+        largest = max(max(f.width, f.height) for t in textures for f in t.frames)
+        # the layers must fit the largest texture and the maximum texture size
+        layer_size = min(max_size, max(LAYER_SIZE, 1 << (largest - 1).bit_length()))
+        pack_iter = _pack_layers_iter(textures, layer_size)
+        try:
+            while True:
+                yield 0.5 + next(pack_iter) / 4
+        except StopIteration as e:
+            layers = e.value
+            layer_count = len(layers)
+
+    width = layers[0].width
+    height = layers[0].height
+    texture_atlas = Image.new("RGBA", (width, height * len(layers)))
+    texture_bounds = {}
+    for layer_index, atlas in enumerate(layers):
+        texture_atlas.paste(atlas.generate("RGBA"), (0, layer_index * height))
+        for texture_path, (x, y, x2, y2) in atlas.to_dict().items():
+            texture_bounds[texture_path] = (
+                x + layer_index,
+                y,
+                x2 + layer_index,
+                y2,
+            )
     texture_bounds = {
         texture_path: texture_bounds[texture_path] for texture_path in texture_tuple
     }
 
     log.info("Finished creating texture atlas")
-    return texture_atlas, texture_bounds
+    return AtlasImage(
+        texture_atlas,
+        texture_bounds,
+        layer_count,
+        _mip_levels(layers) if layer_count else 0,
+    )
+
+
+def create_atlas_iter(
+    texture_tuple: Tuple[str, ...]
+) -> Generator[
+    float,
+    None,
+    Tuple[Image.Image, Dict[str, Tuple[float, float, float, float]]],
+]:
+    atlas_iter = create_atlas_layers_iter(texture_tuple)
+    try:
+        while True:
+            yield next(atlas_iter)
+    except StopIteration as e:
+        return e.value.image, e.value.bounds
@@ -0,0 +1,110 @@
+"""Record how long the application takes to import modules and initialise.
+
+Run the application with the amulet-trace argument to enable tracing.
+The trace is written to ./logs/startup_trace.json in the Chrome trace event format
+which can be opened with chrome://tracing or https://ui.perfetto.dev
+
+This module must only use the standard library so that it can be imported before everything else.
+"""
+
+import sys
+import os
+import time
+import json
+import threading
+import builtins
+import atexit
+from contextlib import contextmanager
+
+enabled = "amulet-trace" in sys.argv
+trace_path = os.path.join(".", "logs", "startup_trace.json")
+
+_start_time = time.perf_counter()
+_events = []
+_lock = threading.Lock()
+_import = builtins.__import__
+
+
+def _time_us(t: float) -> float:
+    """Convert a perf_counter time to microseconds since the trace started."""
+    return (t - _start_time) * 1_000_000
+
+
+def _add_event(name: str, category: str, start: float, end: float):
+    with _lock:
+        _events.append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": _time_us(start),
+                "dur": _time_us(end) - _time_us(start),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            }
+        )
+
+
+@contextmanager
+def phase(name: str):
+    """Record the time taken by a with block if tracing is enabled.
+
+    :param name: The name of the phase.
+    """
+    if enabled:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            _add_event(name, "phase", start, time.perf_counter())
+    else:
+        yield
+
+
+def mark(name: str):
+    """Record an instant, such as the main window being shown, if tracing is enabled.
+
+    :param name: The name of the instant.
+    """
+    if enabled:
+        with _lock:
+            _events.append(
+                {
+                    "name": name,
+                    "cat": "mark",
+                    "ph": "i",
+                    "s": "g",
+                    "ts": _time_us(time.perf_counter()),
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                }
+            )
+
+
+def write():
+    """Write the events recorded so far to the trace file if tracing is enabled."""
+    if enabled:
+        with _lock:
+            events = list(_events)
+        os.makedirs(os.path.dirname(trace_path), exist_ok=True)
+        with open(trace_path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def _traced_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """Record the time taken by import statements that load new modules."""
+    module_count = len(sys.modules)
+    start = time.perf_counter()
+    module = _import(name, globals, locals, fromlist, level)
+    if len(sys.modules) != module_count:
+        if level and globals:
+            # resolve the name of relative imports
+            package = (globals.get("__package__") or "").rsplit(".", level - 1)[0]
+            name = f"{package}.{name}" if name else package
+        _add_event(f"import {name}", "import", start, time.perf_counter())
+    return module
+
+
+if enabled:
+    builtins.__import__ = _traced_import
+    atexit.register(write)
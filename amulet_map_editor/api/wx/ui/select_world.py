@@ -10,6 +10,7 @@ from amulet import load_format
 from amulet.api.errors import FormatError
 
 from amulet_map_editor import lang, CONFIG
+from amulet_map_editor.api import startup_trace
 from amulet_map_editor.api.wx.ui import simple
 from amulet_map_editor.api.wx.util.ui_preferences import preserve_ui_preferences
 from amulet_map_editor.api.framework import app
@@ -215,16 +216,17 @@ class ScrollableWorldsUI(simple.SimpleScrollablePanel):
         for val in self.dirs.values():
             val.Destroy()
         self.dirs.clear()
-        for group_name, directory in minecraft_world_paths.items():
-            if os.path.isdir(directory):
-                world_list = CollapsibleWorldListUI(
-                    self,
-                    glob.glob(os.path.join(glob.escape(directory), "*")),
-                    group_name,
-                    self.open_world_callback,
-                )
-                self.add_object(world_list, 0, wx.EXPAND)
-                self.dirs[directory] = world_list
+        with startup_trace.phase("scan world list"):
+            for group_name, directory in minecraft_world_paths.items():
+                if os.path.isdir(directory):
+                    world_list = CollapsibleWorldListUI(
+                        self,
+                        glob.glob(os.path.join(glob.escape(directory), "*")),
+                        group_name,
+                        self.open_world_callback,
+                    )
+                    self.add_object(world_list, 0, wx.EXPAND)
+                    self.dirs[directory] = world_list
 
     def OnChildFocus(self, event):
         event.Skip()
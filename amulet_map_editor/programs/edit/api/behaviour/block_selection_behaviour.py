@@ -22,6 +22,7 @@ from amulet_map_editor.api.opengl.mesh.selection import (
 )
 
 from .pointer_behaviour import PointerBehaviour
+from ..selection_index import SelectionIndex
 from ..key_config import (
     ACT_BOX_CLICK,
     ACT_BOX_CLICK_ADD,
@@ -98,6 +99,8 @@ class BlockSelectionBehaviour(PointerBehaviour):
         self._pointer_mask: NPArray2x3 = numpy.zeros((2, 3), dtype=bool)
         self._resizing = False  # is a box being resized
         self._pointer_distance2 = 0  # the pointer distance used when resizing
+        # an index of self.selection_group to find the box the pointer is over
+        self._selection_index = SelectionIndex()
 
     def _create_active_selection(self):
         """Create the active selection if it does not exist."""
@@ -486,7 +489,8 @@ class BlockSelectionBehaviour(PointerBehaviour):
         self, camera: PointCoordinates, look_vector: NPVector3
     ) -> Tuple[SelectionGroup, Optional[int], float]:
         selection_group = self.selection_group
-        box_index, max_distance = selection_group.closest_vector_intersection(
+        self._selection_index.update(selection_group)
+        box_index, max_distance = self._selection_index.closest_vector_intersection(
             camera, look_vector
         )
         return selection_group, box_index, max_distance
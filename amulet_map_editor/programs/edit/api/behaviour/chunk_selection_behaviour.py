@@ -4,6 +4,7 @@ import time
 
 from amulet.api.selection import SelectionGroup, SelectionBox
 from .pointer_behaviour import PointerBehaviour
+from ..selection_index import SelectionIndex
 from amulet_map_editor.api.opengl.mesh.selection import (
     RenderSelectionGroup,
     RenderSelection,
@@ -41,6 +42,8 @@ class ChunkSelectionBehaviour(PointerBehaviour):
         self._editing = False
         self._press_time = 0
         self._start_box = numpy.zeros((2, 3))
+        # an index of self._selection to find the box the pointer is over
+        self._selection_index = SelectionIndex()
 
     def bind_events(self):
         super().bind_events()
@@ -53,21 +56,21 @@ class ChunkSelectionBehaviour(PointerBehaviour):
         self.canvas.selection.selection_group = self._selection.selection_group
 
     def _chunkify_selection(self):
-        selections = []
-        for box in self.canvas.selection.selection_group.selection_boxes:
-            min_point = (
-                numpy.floor(box.min_array / self.canvas.world.sub_chunk_size)
-                * self.canvas.world.sub_chunk_size
-            )
-            max_point = (
-                numpy.ceil(box.max_array / self.canvas.world.sub_chunk_size)
-                * self.canvas.world.sub_chunk_size
+        sub_chunk_size = self.canvas.world.sub_chunk_size
+        bounds = self.canvas.world.bounds(self.canvas.dimension)
+        box_bounds = self.canvas.selection.selection_index.bounds
+        chunk_bounds = box_bounds.copy()
+        chunk_bounds[:, 0] = numpy.floor_divide(box_bounds[:, 0], sub_chunk_size)
+        chunk_bounds[:, 1] = -numpy.floor_divide(-box_bounds[:, 1], sub_chunk_size)
+        chunk_bounds *= sub_chunk_size
+        chunk_bounds[:, 0, 1] = bounds.min[1]
+        chunk_bounds[:, 1, 1] = bounds.max[1]
+        if numpy.array_equal(chunk_bounds, box_bounds):
+            selection_group = self.canvas.selection.selection_group
+        else:
+            selection_group = SelectionGroup(
+                [SelectionBox(*box) for box in chunk_bounds]
             )
-            bounds = self.canvas.world.bounds(self.canvas.dimension)
-            min_point[1] = bounds.min[1]
-            max_point[1] = bounds.max[1]
-            selections.append(SelectionBox(min_point, max_point))
-        selection_group = SelectionGroup(selections)
         if selection_group != self.canvas.selection.selection_group:
             # if the above code modified the selection
             self.canvas.selection.selection_group = selection_group
@@ -131,10 +134,8 @@ class ChunkSelectionBehaviour(PointerBehaviour):
         else:
             camera_location = self.canvas.camera.location
             look_vector = self.look_vector()
-            (
-                box,
-                max_distance,
-            ) = self._selection.selection_group.closest_vector_intersection(
+            self._selection_index.update(self._selection.selection_group)
+            box, max_distance = self._selection_index.closest_vector_intersection(
                 camera_location, look_vector
             )
             location, hit = self.closest_block_3d(min(max_distance, 100))
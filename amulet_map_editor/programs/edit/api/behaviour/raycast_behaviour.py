@@ -1,10 +1,12 @@
-from typing import TYPE_CHECKING, Optional, Tuple, Generator, List
+from typing import TYPE_CHECKING, Optional, Tuple, Generator
 import numpy
 import math
+import weakref
 
 from amulet.api.chunk import Chunk
 from amulet.api.block import UniversalAirLikeBlocks
 from amulet.api.errors import ChunkLoadError
+from amulet.api.registry import BlockManager
 
 from amulet_map_editor.api.opengl.matrix import rotation_matrix_xy
 
@@ -12,9 +14,60 @@ from amulet.api.data_types import PointCoordinatesNDArray
 
 from .base_behaviour import BaseBehaviour
 
+try:
+    from .raycast_cy import raycast, voxel_traverse
+except:
+    raise Exception(
+        "Could not import cython raycaster. The cython code must be compiled first."
+    )
+
 if TYPE_CHECKING:
     from amulet_map_editor.programs.edit.api.canvas import EditCanvas
 
+# Is each block in a block palette solid (not air like). Extended as blocks are added to the palette.
+# {palette: bool array}
+_solid_luts = weakref.WeakKeyDictionary()
+# The solidity bitmap of each sub-chunk of a chunk that has been ray cast through
+# and the changed time of the chunk when they were created. None if the sub-chunk has no solid blocks.
+# {chunk: (changed_time, {cy: Optional[bitmap]})}
+_chunk_bitmaps = weakref.WeakKeyDictionary()
+
+
+def _solid_lut(palette: BlockManager) -> numpy.ndarray:
+    """Get an array that is True for each block in the palette that is not air like."""
+    lut = _solid_luts.get(palette, numpy.zeros(0, dtype=bool))
+    if len(lut) < len(palette):
+        new_blocks = [
+            palette[block_id] not in UniversalAirLikeBlocks
+            for block_id in range(len(lut), len(palette))
+        ]
+        lut = numpy.concatenate([lut, numpy.array(new_blocks, dtype=bool)])
+        _solid_luts[palette] = lut
+    return lut
+
+
+def _sub_chunk_bitmap(chunk: Chunk, cy: int) -> Optional[numpy.ndarray]:
+    """Get the solidity bitmap of a sub-chunk.
+    The bitmaps are cached until the chunk changes.
+
+    :param chunk: The chunk to get the bitmap from.
+    :param cy: The sub-chunk index.
+    :return: A 16x16x16 uint8 array that is 1 where the block is solid or None if the sub-chunk has no solid blocks.
+    """
+    changed_time, bitmaps = _chunk_bitmaps.get(chunk, (None, None))
+    if bitmaps is None or changed_time != chunk.changed_time:
+        bitmaps = {}
+        _chunk_bitmaps[chunk] = (chunk.changed_time, bitmaps)
+    if cy not in bitmaps:
+        bitmap = None
+        if chunk.blocks.has_sub_chunk(cy):
+            sub_chunk = chunk.blocks.get_sub_chunk(cy)
+            solid = _solid_lut(chunk.block_palette)[sub_chunk]
+            if solid.any():
+                bitmap = numpy.ascontiguousarray(solid).view(numpy.uint8)
+        bitmaps[cy] = bitmap
+    return bitmaps[cy]
+
 
 class RaycastBehaviour(BaseBehaviour):
     """Adds the base behaviour for behaviours that needs to do ray casting."""
@@ -65,35 +118,19 @@ class RaycastBehaviour(BaseBehaviour):
         :param max_distance: The distance to search up to.
         :return: Tuple[The block coordinate, was a non-air block found in the range]
         """
-        cx: Optional[int] = None
-        cz: Optional[int] = None
-        chunk: Optional[Chunk] = None
-        in_air = False
-
-        location = numpy.array([0, 0, 0], dtype=numpy.int32)
-        for location in self.collision_locations(max_distance):
-            x, y, z = location
-            cx_ = x >> 4
-            cz_ = z >> 4
-            if cx is None or cx != cx_ or cz != cz_:
-                cx = cx_
-                cz = cz_
-                try:
-                    chunk = self.canvas.world.get_chunk(cx, cz, self.canvas.dimension)
-                except ChunkLoadError:
-                    chunk = None
-
-            if (
-                chunk is not None
-                and chunk.block_palette[chunk.blocks[x % 16, y, z % 16]]
-                not in UniversalAirLikeBlocks
-            ):
-                # the block is not air
-                if in_air:  # if we have previously found an air block
-                    return location, True
-            elif not in_air:
-                in_air = True
-        return location, False
+        world = self.canvas.world
+        dimension = self.canvas.dimension
+
+        def get_bitmap(cx: int, cy: int, cz: int) -> Optional[numpy.ndarray]:
+            try:
+                chunk = world.get_chunk(cx, cz, dimension)
+            except ChunkLoadError:
+                return None
+            return _sub_chunk_bitmap(chunk, cy)
+
+        return raycast(
+            self.canvas.camera.location, self.look_vector(), max_distance, get_bitmap
+        )
 
     def get_2d_mouse_location(self) -> Tuple[float, float]:
         """Get the x and z location of the cursor when in 2D mode."""
@@ -194,47 +231,4 @@ class RaycastBehaviour(BaseBehaviour):
             look_vector = self.look_vector()
         if start_location is None:
             start_location = self.canvas.camera.location
-        dx, dy, dz = look_vector
-
-        vectors = numpy.array(
-            [look_vector / abs(dx), look_vector / abs(dy), look_vector / abs(dz)]
-        )
-
-        locations: List[numpy.ndarray] = []
-        # the location within the block
-        start: numpy.ndarray = numpy.array(start_location, numpy.float32) % 1
-
-        for axis in range(3):
-            vector = vectors[axis]
-            vector_size = numpy.sum(vector**2) ** 0.5
-            # move the start position to the block edge behind the vector
-            if vector[axis] > 0:
-                initial_offset = -vector * start[axis]
-            else:
-                initial_offset = -vector * (1 - start[axis])
-
-            block_count = (
-                max_distance + numpy.sum(initial_offset**2) ** 0.5 - 0.001
-            ) // vector_size
-
-            if block_count:
-                blocks = numpy.arange(block_count + 1).reshape(-1, 1)
-                offsets = blocks * vector + initial_offset
-                locations_ = numpy.floor(offsets + start).astype(int)
-                if vector[axis] < 0:
-                    locations_[:, axis] -= 1
-
-                locations.append(locations_)
-
-        if locations:
-            collision_locations = numpy.floor(start_location).astype(int) + numpy.array(
-                sorted(
-                    numpy.concatenate(locations),
-                    key=lambda loc: sum(abs(loc_) for loc_ in loc),
-                )
-            )
-        else:
-            collision_locations = start.astype(int).reshape(1, 3)
-
-        for location in collision_locations:
-            yield location
+        yield from voxel_traverse(start_location, look_vector, max_distance)
@@ -0,0 +1,181 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+
+import numpy
+cimport numpy
+
+from libc.math cimport floor, fabs, INFINITY
+
+numpy.import_array()
+
+# The size of the bitmaps returned by the get_bitmap function passed to raycast.
+cdef enum:
+    BITMAP_SIZE = 16
+
+
+cdef inline long _floor_div(long a, long b):
+    """Integer division rounding towards negative infinity."""
+    cdef long q = a / b
+    if (a % b != 0) and ((a < 0) != (b < 0)):
+        q -= 1
+    return q
+
+
+cdef struct DDA:
+    long x, y, z
+    long step_x, step_y, step_z
+    # the distance along the ray at which the next x, y and z block boundary is crossed
+    double next_x, next_y, next_z
+    # the distance along the ray between block boundaries on each axis
+    double delta_x, delta_y, delta_z
+    # the distance along the ray at which the current block was entered
+    double distance
+
+
+cdef inline void _axis_init(
+    double origin, double direction, long *block, long *step, double *next_, double *delta
+):
+    block[0] = <long> floor(origin)
+    if direction > 0:
+        step[0] = 1
+        delta[0] = 1 / direction
+        next_[0] = (block[0] + 1 - origin) / direction
+    elif direction < 0:
+        step[0] = -1
+        delta[0] = -1 / direction
+        next_[0] = (origin - block[0]) / -direction
+    else:
+        step[0] = 0
+        delta[0] = INFINITY
+        next_[0] = INFINITY
+
+
+cdef inline void _dda_init(DDA *dda, double[3] origin, double[3] direction):
+    _axis_init(origin[0], direction[0], &dda.x, &dda.step_x, &dda.next_x, &dda.delta_x)
+    _axis_init(origin[1], direction[1], &dda.y, &dda.step_y, &dda.next_y, &dda.delta_y)
+    _axis_init(origin[2], direction[2], &dda.z, &dda.step_z, &dda.next_z, &dda.delta_z)
+    dda.distance = 0
+
+
+cdef inline void _dda_step(DDA *dda):
+    """Move to the next block the ray passes through."""
+    if dda.next_x <= dda.next_y and dda.next_x <= dda.next_z:
+        dda.distance = dda.next_x
+        dda.x += dda.step_x
+        dda.next_x += dda.delta_x
+    elif dda.next_y <= dda.next_z:
+        dda.distance = dda.next_y
+        dda.y += dda.step_y
+        dda.next_y += dda.delta_y
+    else:
+        dda.distance = dda.next_z
+        dda.z += dda.step_z
+        dda.next_z += dda.delta_z
+
+
+cdef void _read_vector(object vector, double[3] out) except *:
+    cdef int i
+    for i in range(3):
+        out[i] = float(vector[i])
+
+
+cdef void _normalise(double[3] vector) except *:
+    cdef double length = (vector[0] ** 2 + vector[1] ** 2 + vector[2] ** 2) ** 0.5
+    if length == 0:
+        raise ValueError("The direction vector must not be zero.")
+    vector[0] /= length
+    vector[1] /= length
+    vector[2] /= length
+
+
+def voxel_traverse(start_location, look_vector, double max_distance):
+    """
+    Find the blocks a ray passes through in the order it passes through them.
+
+    :param start_location: The x, y, z location the ray starts from.
+    :param look_vector: The x, y, z direction of the ray.
+    :param max_distance: The distance along the ray to stop at.
+    :return: An Nx3 int64 numpy array of block locations. The first is the block containing the start location.
+    """
+    cdef double origin[3]
+    cdef double direction[3]
+    cdef DDA dda
+    _read_vector(start_location, origin)
+    _read_vector(look_vector, direction)
+    _normalise(direction)
+    _dda_init(&dda, origin, direction)
+
+    # each step moves at most 1 block on one axis so this is the most blocks the ray can pass through
+    cdef Py_ssize_t max_count = <Py_ssize_t> (
+        4 + fabs(direction[0] * max_distance)
+        + fabs(direction[1] * max_distance)
+        + fabs(direction[2] * max_distance)
+    )
+    cdef numpy.ndarray[numpy.int64_t, ndim=2] locations = numpy.empty((max_count, 3), dtype=numpy.int64)
+    cdef Py_ssize_t count = 0
+    while dda.distance <= max_distance and count < max_count:
+        locations[count, 0] = dda.x
+        locations[count, 1] = dda.y
+        locations[count, 2] = dda.z
+        count += 1
+        _dda_step(&dda)
+    return locations[:count]
+
+
+def raycast(start_location, look_vector, double max_distance, get_bitmap):
+    """
+    Find the first solid block along a ray after the ray has passed through a non-solid block.
+
+    :param start_location: The x, y, z location the ray starts from.
+    :param look_vector: The x, y, z direction of the ray.
+    :param max_distance: The distance along the ray to stop at.
+    :param get_bitmap: A function taking the x, y and z index of a 16x16x16 block region and returning
+        a C contiguous 16x16x16 uint8 array in x, y, z order that is non-zero where the block is solid
+        or None if the region contains no solid blocks. It is called once each time the ray enters a region.
+    :return: The x, y, z location and True if a block was found
+        otherwise the last location the ray passed through and False.
+    """
+    cdef double origin[3]
+    cdef double direction[3]
+    cdef DDA dda
+    _read_vector(start_location, origin)
+    _read_vector(look_vector, direction)
+    _normalise(direction)
+    _dda_init(&dda, origin, direction)
+
+    cdef const numpy.uint8_t[:, :, ::1] bitmap
+    cdef bint has_bitmap = False
+    cdef long region_x = 0, region_y = 0, region_z = 0
+    cdef long last_x = dda.x, last_y = dda.y, last_z = dda.z
+    cdef bint in_air = False
+    cdef bint solid
+    cdef bint first = True
+
+    while dda.distance <= max_distance:
+        if (
+            first
+            or _floor_div(dda.x, BITMAP_SIZE) != region_x
+            or _floor_div(dda.y, BITMAP_SIZE) != region_y
+            or _floor_div(dda.z, BITMAP_SIZE) != region_z
+        ):
+            first = False
+            region_x = _floor_div(dda.x, BITMAP_SIZE)
+            region_y = _floor_div(dda.y, BITMAP_SIZE)
+            region_z = _floor_div(dda.z, BITMAP_SIZE)
+            region = get_bitmap(region_x, region_y, region_z)
+            has_bitmap = region is not None
+            if has_bitmap:
+                bitmap = region
+
+        solid = has_bitmap and bitmap[
+            dda.x - region_x * BITMAP_SIZE,
+            dda.y - region_y * BITMAP_SIZE,
+            dda.z - region_z * BITMAP_SIZE,
+        ] != 0
+        last_x, last_y, last_z = dda.x, dda.y, dda.z
+        if solid:
+            if in_air:
+                return numpy.array([last_x, last_y, last_z], dtype=numpy.int64), True
+        else:
+            in_air = True
+        _dda_step(&dda)
+    return numpy.array([last_x, last_y, last_z], dtype=numpy.int64), False
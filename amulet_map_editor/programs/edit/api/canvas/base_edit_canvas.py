@@ -31,7 +31,9 @@ from amulet.api.data_types import OperationYieldType, Dimension
 
 from amulet_map_editor import experimental_bedrock_resources
 from amulet_map_editor.api.opengl.canvas import EventCanvas
-from amulet_map_editor.api.opengl.resource_pack.resource_pack import OpenGLResourcePack
+from amulet_map_editor.api.opengl.resource_pack.resource_pack import (
+    get_opengl_resource_pack,
+)
 from amulet_map_editor.programs.edit.api.selection import (
     SelectionManager,
     SelectionHistoryManager,
@@ -190,7 +192,9 @@ class BaseEditCanvas(EventCanvas):
         for i in resource_pack.reload():
             yield i / 4 + 0.5
 
-        opengl_resource_pack = OpenGLResourcePack(resource_pack, translator)
+        opengl_resource_pack = get_opengl_resource_pack(
+            resource_pack, translator, self.max_texture_size
+        )
 
         yield 0.75, lang.get("program_3d_edit.canvas.creating_texture_atlas")
         for i in opengl_resource_pack.setup():
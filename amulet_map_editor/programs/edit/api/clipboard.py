@@ -0,0 +1,104 @@
+from typing import TYPE_CHECKING, Dict, Set, Generator
+import numpy
+
+from amulet.api.level import ImmutableStructure
+from amulet.api.chunk import Chunk
+from amulet.api.errors import ChunkDoesNotExist
+from amulet.api.selection import SelectionGroup
+from amulet.api.data_types import Dimension, ChunkCoordinates
+
+from .operations.executor import chunk_box_count
+
+if TYPE_CHECKING:
+    from amulet.api.level import BaseLevel
+
+
+class ClipboardStructure(ImmutableStructure):
+    """A structure of a selection in a level that references the level's block data instead of copying it.
+
+    Only the sub-chunks and block entities in the height range of the selection are kept.
+    The sub-chunk arrays are the ones in the chunks the level loaded while the structure was created.
+    At the end of every operation the level unloads its chunks and reloads them from its history when they are next used
+    so later edits to the level are made to new arrays and the arrays referenced here do not change.
+    If the level is edited in the same operation the structure is created in :meth:`snapshot` must be called first.
+
+    The structure shares the block and biome palette of the level so the chunks do not need remapping.
+    """
+
+    def __init__(self, level: "BaseLevel", selection: SelectionGroup):
+        super().__init__()
+        self._selection = selection
+        self._block_palette = level.block_palette
+        self._biome_palette = level.biome_palette
+        self._chunk_map: Dict[ChunkCoordinates, Chunk] = {}
+
+    @classmethod
+    def from_level_iter(
+        cls, level: "BaseLevel", selection: SelectionGroup, dimension: Dimension
+    ) -> Generator[float, None, "ClipboardStructure"]:
+        """
+        Create a :class:`ClipboardStructure` referencing a selection in a level.
+
+        Also yields the progress from 0-1.
+
+        :param level: The level to reference.
+        :param selection: The selection to reference.
+        :param dimension: The dimension to reference.
+        :return: The created instance of :class:`ClipboardStructure`
+        """
+        self = cls(level, selection)
+        count = chunk_box_count(selection, level.sub_chunk_size)
+        for index, (chunk, _) in enumerate(level.get_chunk_boxes(dimension, selection)):
+            self._chunk_map[(chunk.cx, chunk.cz)] = self._trim_chunk(chunk, False)
+            yield min(1.0, (index + 1) / count)
+        return self
+
+    def _trim_chunk(self, chunk: Chunk, copy: bool) -> Chunk:
+        """Create a chunk containing the sub-chunks and block entities of a chunk in the height range of the selection.
+
+        :param chunk: The chunk to take the data from.
+        :param copy: Should the sub-chunk arrays be copied. If False they are shared with the chunk.
+        :return: The new chunk.
+        """
+        min_y = self._selection.min_y
+        max_y = self._selection.max_y
+        trimmed = Chunk(chunk.cx, chunk.cz)
+        # use the same palettes so that the blocks do not get remapped
+        trimmed.block_palette = chunk.block_palette
+        trimmed.biome_palette = chunk.biome_palette
+        for cy in chunk.blocks.sub_chunks:
+            if min_y >> 4 <= cy <= (max_y - 1) >> 4:
+                sub_chunk = chunk.blocks.get_sub_chunk(cy)
+                trimmed.blocks.add_sub_chunk(
+                    cy, numpy.copy(sub_chunk) if copy else sub_chunk
+                )
+        trimmed.block_entities = [
+            block_entity
+            for (_, y, _), block_entity in chunk.block_entities.items()
+            if min_y <= y < max_y
+        ]
+        return trimmed
+
+    def snapshot(self):
+        """Copy the referenced sub-chunks so that the level can be edited in the same operation."""
+        for location, chunk in self._chunk_map.items():
+            self._chunk_map[location] = self._trim_chunk(chunk, True)
+
+    def all_chunk_coords(self, dimension: Dimension) -> Set[ChunkCoordinates]:
+        return set(self._chunk_map)
+
+    def has_chunk(self, cx: int, cz: int, dimension: Dimension) -> bool:
+        return (cx, cz) in self._chunk_map
+
+    def get_chunk(self, cx: int, cz: int, dimension: Dimension) -> Chunk:
+        if (cx, cz) in self._chunk_map:
+            return self._chunk_map[(cx, cz)]
+        raise ChunkDoesNotExist
+
+    def put_chunk(self, chunk: Chunk, dimension: Dimension):
+        chunk.block_palette = self.block_palette
+        chunk.biome_palette = self.biome_palette
+        self._chunk_map[(chunk.cx, chunk.cz)] = chunk
+
+    def delete_chunk(self, cx: int, cz: int, dimension: Dimension):
+        self._chunk_map.pop((cx, cz), None)
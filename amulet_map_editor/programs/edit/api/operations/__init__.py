@@ -2,3 +2,5 @@ from .base import OperationUI, OperationUIType, DefaultOperationUI
 from .ui.fixed_pipeline import FixedFunctionUI
 from .errors import OperationError, OperationSuccessful, OperationSilentAbort
 from .ui.simple_operation_panel import SimpleOperationPanel
+from .executor import run_chunk_batches, chunk_box_count
+from .paste import paste_iter
@@ -0,0 +1,108 @@
+from typing import TYPE_CHECKING, Callable, Any, Tuple, Deque, Set
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+import os
+import numpy
+
+from amulet.api.chunk import Chunk
+from amulet.api.selection import SelectionGroup, SelectionBox
+from amulet.api.data_types import Dimension, OperationReturnType
+
+if TYPE_CHECKING:
+    from amulet.api.level import BaseLevel
+
+Slices = Tuple[slice, slice, slice]
+
+
+def chunk_box_count(selection: SelectionGroup, sub_chunk_size: int = 16) -> int:
+    """The number of chunks each box in the selection intersects.
+    This is the most (chunk, box) pairs get_chunk_slice_box can yield and is computed without iterating the selection.
+    """
+    return max(
+        1,
+        sum(box.chunk_count(sub_chunk_size) for box in selection.selection_boxes),
+    )
+
+
+def _prepare_blocks(chunk: Chunk, slices: Slices, box: SelectionBox) -> tuple:
+    # chunk.blocks[slices] is a view of the chunk's storage so the kernel is given a copy
+    return (numpy.array(chunk.blocks[slices]),)
+
+
+def _commit_blocks(chunk: Chunk, slices: Slices, blocks: Any):
+    if blocks is not None:
+        chunk.blocks[slices] = blocks
+        chunk.changed = True
+
+
+def run_chunk_batches(
+    world: "BaseLevel",
+    dimension: Dimension,
+    selection: SelectionGroup,
+    kernel: Callable[..., Any],
+    prepare: Callable[[Chunk, Slices, SelectionBox], tuple] = _prepare_blocks,
+    commit: Callable[[Chunk, Slices, Any], None] = _commit_blocks,
+    create_missing_chunks: bool = False,
+    batch_size: int = 16,
+    workers: int = None,
+) -> OperationReturnType:
+    """Run an operation on every chunk in a selection with the per-chunk work split over a pool of threads.
+
+    The world is not thread safe so only the kernel runs in the pool.
+    The chunks are loaded and prepared up to two batches ahead of the batch being committed
+    so that loading the chunks overlaps with running the kernels.
+    The results are committed in the order get_chunk_slice_box yields the chunks.
+
+    :param world: The world to run the operation in.
+    :param dimension: The dimension to run the operation in.
+    :param selection: The selection to run the operation on.
+    :param kernel: Takes the values returned by prepare and returns the result to commit.
+        This runs in a worker thread so it must not access the world.
+    :param prepare: Get the kernel inputs for a chunk and slices. This may access the world.
+        Any chunk data given to the kernel must be a copy because the kernel cannot read the chunk.
+        Defaults to a copy of the blocks in the slices.
+    :param commit: Store the result of the kernel in the chunk. This may access the world.
+        Defaults to setting the blocks in the slices if the result is not None.
+    :param create_missing_chunks: Should chunks that do not exist be created.
+    :param batch_size: The number of chunks to commit at once. Progress is reported after each batch.
+    :param workers: The number of threads to use. Defaults to the number of CPUs.
+    :return: A generator yielding the progress from 0 to 1.
+    """
+    workers = workers or min(8, os.cpu_count() or 1)
+    iter_count = chunk_box_count(selection, world.sub_chunk_size)
+    count = 0
+    # The chunks that have been prepared but not committed.
+    pending: Deque[Tuple[Chunk, Slices, Future]] = deque()
+    pending_chunks: Set[Tuple[int, int]] = set()
+
+    def commit_pending(commit_count: int):
+        for _ in range(commit_count):
+            chunk, slices, future = pending.popleft()
+            commit(chunk, slices, future.result())
+        pending_chunks.clear()
+        pending_chunks.update((chunk.cx, chunk.cz) for chunk, _, _ in pending)
+
+    with ThreadPoolExecutor(workers, thread_name_prefix="ChunkOperation") as executor:
+        for chunk, slices, box in world.get_chunk_slice_box(
+            dimension, selection, create_missing_chunks
+        ):
+            if (chunk.cx, chunk.cz) in pending_chunks:
+                # The chunk is in more than one box.
+                # The earlier boxes must be committed before the data for this one is read.
+                count += len(pending)
+                commit_pending(len(pending))
+                yield min(1.0, count / iter_count)
+            pending.append(
+                (chunk, slices, executor.submit(kernel, *prepare(chunk, slices, box)))
+            )
+            pending_chunks.add((chunk.cx, chunk.cz))
+            if len(pending) >= 2 * batch_size:
+                count += batch_size
+                commit_pending(batch_size)
+                yield min(1.0, count / iter_count)
+
+        while pending:
+            commit_count = min(batch_size, len(pending))
+            count += commit_count
+            commit_pending(commit_count)
+            yield min(1.0, count / iter_count)
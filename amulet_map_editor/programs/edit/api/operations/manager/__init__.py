@@ -3,4 +3,9 @@ from .operation_manager import (
     UIOperationManager,
     BaseOperationManager,
 )
-from .loader import BaseOperationLoader, OperationLoader, UIOperationLoader
+from .loader import (
+    BaseOperationLoader,
+    OperationLoader,
+    UIOperationLoader,
+    LazyOperationLoader,
+)
@@ -1,3 +1,4 @@
 from .base_operation_loader import BaseOperationLoader
 from .operation_loader import OperationLoader
 from .ui_operation_loader import UIOperationLoader
+from .lazy_operation_loader import LazyOperationLoader
@@ -0,0 +1,48 @@
+from typing import Callable
+
+from .base_operation_loader import BaseOperationLoader
+
+
+class LazyOperationLoader:
+    """A placeholder for an operation whose module has not been imported yet.
+    The name is read from the operation index so the operation can be listed without importing it.
+    The module is imported and the real operation loader created the first time it is called.
+    """
+
+    def __init__(
+        self, identifier: str, name: str, load: Callable[[str], BaseOperationLoader]
+    ):
+        """
+        Set up the LazyOperationLoader.
+        :param identifier: The identifier of the operation. <module name>[index]
+        :param name: The name of the operation.
+        :param load: A function to import the module and get the loader for an identifier.
+        """
+        self._identifier = identifier
+        self._name = name
+        self._load = load
+
+    def load(self) -> BaseOperationLoader:
+        """Import the module and get the real operation loader."""
+        return self._load(self._identifier)
+
+    def __call__(self, *args, **kwargs):
+        """Load and run the actual operation."""
+        return self.load()(*args, **kwargs)
+
+    @property
+    def is_valid(self) -> bool:
+        """Only valid operations are stored in the index."""
+        return True
+
+    @property
+    def identifier(self) -> str:
+        """The identifier for this operation.
+        This is formed of the path and optionally a number if there are multiple operations in the file.
+        """
+        return self._identifier
+
+    @property
+    def name(self) -> str:
+        """The name of the operation."""
+        return self._name
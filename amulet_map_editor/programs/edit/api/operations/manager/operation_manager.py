@@ -1,19 +1,32 @@
 import sys
-from typing import Tuple, Dict, Type
+from typing import Tuple, Dict, Type, Union, List, Optional
 from types import ModuleType
 import os
 import traceback
 import pkgutil
 import importlib
+import functools
+import hashlib
+import json
 
 from .loader import (
     BaseOperationLoader,
     OperationLoader,
     UIOperationLoader,
+    LazyOperationLoader,
 )
-from .util import STOCK_PLUGINS_DIR, STOCK_PLUGINS_NAME, CUSTOM_PLUGINS_DIR
+from .util import (
+    STOCK_PLUGINS_DIR,
+    STOCK_PLUGINS_NAME,
+    CUSTOM_PLUGINS_DIR,
+    OPERATION_INDEX_DIR,
+)
+
+from amulet_map_editor import log, __version__
+from amulet_map_editor.api import startup_trace
 
-from amulet_map_editor import log
+# Increment this when the format of the operation index changes.
+OPERATION_INDEX_VERSION = 1
 
 
 class BaseOperationManager:
@@ -27,11 +40,21 @@ class BaseOperationManager:
         # The loaded operations. Stored under their identifier.
         assert issubclass(self.OperationClass, BaseOperationLoader)
         self._group_name = group_name
-        self._operations: Dict[str, BaseOperationLoader] = {}
+        self._operations: Dict[
+            str, Union[BaseOperationLoader, LazyOperationLoader]
+        ] = {}
+        # The signature and operations of each module so that they can be listed without importing them.
+        # {module_name: {"signature": str, "operations": [[identifier, name], ...]}}
+        self._index: Dict[str, dict] = self._read_index()
         self.reload()
 
     @property
-    def operations(self) -> Tuple[BaseOperationLoader, ...]:
+    def operations(
+        self,
+    ) -> Tuple[Union[BaseOperationLoader, LazyOperationLoader], ...]:
+        """The operations in the group.
+        Operations in modules that have not changed since they were indexed are not imported until they are called.
+        """
         return tuple(self._operations.values())
 
     def get_operation(self, operation_id: str):
@@ -43,32 +66,43 @@ class BaseOperationManager:
     def reload(self):
         """Unload the old operations and reload them all.
         If new operations are created, load them.
-        If old operations were removed, remove them."""
+        If old operations were removed, remove them.
+        Modules that have not changed since they were indexed are not imported."""
         self._operations.clear()
-        self._load_internal_submodules(
-            os.path.join(STOCK_PLUGINS_DIR, self._group_name),
-            ".".join([STOCK_PLUGINS_NAME, self._group_name]),
-        )
-        self._load_external_submodules(
-            os.path.join(CUSTOM_PLUGINS_DIR, self._group_name)
-        )
-
-    def _load_internal_submodules(self, package_path: str, package_name: str):
+        index = {}
+        with startup_trace.phase(f"discover {self._group_name} plugins"):
+            self._load_internal_submodules(
+                os.path.join(STOCK_PLUGINS_DIR, self._group_name),
+                ".".join([STOCK_PLUGINS_NAME, self._group_name]),
+                index,
+            )
+            self._load_external_submodules(
+                os.path.join(CUSTOM_PLUGINS_DIR, self._group_name), index
+            )
+            if index != self._index:
+                self._index = index
+                self._write_index()
+
+    def _load_internal_submodules(
+        self, package_path: str, package_name: str, index: Dict[str, dict]
+    ):
         """
         Load submodules from within a known package.
 
         :param package_path: The file path of the package to load submodules from.
         :param package_name: The python path of the package to load submodules from.
+        :param index: The operation index to add the modules to.
         """
-        self._load_submodules(package_path, f"{package_name}.")
+        self._load_submodules(package_path, index, f"{package_name}.")
 
-    def _load_external_submodules(self, path: str):
+    def _load_external_submodules(self, path: str, index: Dict[str, dict]):
         """
         Load submodules from an external package.
 
         Note that the path will be added to the system path.
 
         :param path: The path to the directory to find modules in.
+        :param index: The operation index to add the modules to.
         """
         # clean the path
         path = os.path.abspath(path)
@@ -80,72 +114,209 @@ class BaseOperationManager:
             # The path modules are loaded from should be on the system path
             sys.path.append(path)
 
-        self._load_submodules(path)
+        self._load_submodules(path, index)
 
-    def _load_submodules(self, path: str, package: str = ""):
+    def _load_submodules(self, path: str, index: Dict[str, dict], package: str = ""):
         """
         Load all operations in a path.
         You should not use this directly.
         Use _load_internal_submodules or _load_external_submodules
 
         :param path: The path to load modules from.
+        :param index: The operation index to add the modules to.
         :param package: The package name prefix
         """
         # clean the path
         path = os.path.abspath(path)
 
-        for _, module_name, _ in pkgutil.iter_modules([path]):
-            module_name = f"{package}{module_name}"
-            try:
+        for module_info in pkgutil.iter_modules([path]):
+            module_name = f"{package}{module_info.name}"
+            signature = self._module_signature(module_info)
+            entry = self._index.get(module_name)
+            if (
+                signature is not None
+                and entry is not None
+                and entry["signature"] == signature
+            ):
+                # The module has not changed so the operations can be listed without importing it.
+                load = functools.partial(self._load_lazy_operation, path, module_name)
+                for identifier, name in entry["operations"]:
+                    self._operations[identifier] = LazyOperationLoader(
+                        identifier, name, load
+                    )
+                index[module_name] = entry
+            else:
+                mod = self._import_module(path, module_name)
+                if mod is not None:
+                    operations = self._load_module(module_name, mod)
+                    if signature is not None:
+                        index[module_name] = {
+                            "signature": signature,
+                            "operations": [
+                                [op.identifier, op.name] for op in operations
+                            ],
+                        }
+
+    def _import_module(self, path: str, module_name: str) -> Optional[ModuleType]:
+        """
+        Import or reload a module.
+
+        :param path: The path the module should be loaded from.
+        :param module_name: The python path of the module.
+        :return: The module or None if it could not be imported.
+        """
+        try:
+            if module_name in sys.modules:
+                mod = importlib.reload(sys.modules[module_name])
+            else:
                 mod = importlib.import_module(module_name)
-                mod = importlib.reload(mod)
-            except ImportError:
-                log.warning(
-                    f"Failed to import {module_name}.\n{traceback.format_exc()}"
+        except ImportError:
+            log.warning(f"Failed to import {module_name}.\n{traceback.format_exc()}")
+        except SyntaxError:
+            log.warning(
+                f"There was a syntax error in {module_name}.\n{traceback.format_exc()}"
+            )
+        else:
+            if (
+                os.path.dirname(
+                    mod.__path__[0] if hasattr(mod, "__path__") else mod.__file__
                 )
-            except SyntaxError:
+                == path
+            ):
+                # If the loaded module is actually in the path it was loaded from.
+                # There may be cases where the name is shadowed by another module.
+                return mod
+            else:
                 log.warning(
-                    f"There was a syntax error in {module_name}.\n{traceback.format_exc()}"
+                    f"Module {module_name} shadows another module. Try using a different module name."
                 )
-            else:
-                if (
-                    os.path.dirname(
-                        mod.__path__[0] if hasattr(mod, "__path__") else mod.__file__
-                    )
-                    == path
-                ):
-                    # If the loaded module is actually in the path it was loaded from.
-                    # There may be cases where the name is shadowed by another module.
-                    self._load_module(module_name, mod)
-                else:
-                    log.warning(
-                        f"Module {module_name} shadows another module. Try using a different module name."
-                    )
+        return None
+
+    def _load_lazy_operation(
+        self, path: str, module_name: str, identifier: str
+    ) -> BaseOperationLoader:
+        """Import the module of an operation that was listed from the index and load its operations.
+
+        :param path: The path the module should be loaded from.
+        :param module_name: The python path of the module.
+        :param identifier: The identifier of the operation to get.
+        :return: The loaded operation.
+        """
+        operation = self._operations.get(identifier)
+        if isinstance(operation, BaseOperationLoader):
+            # Another operation in the module has already loaded it.
+            return operation
+        mod = self._import_module(path, module_name)
+        if mod is not None:
+            for operation in self._load_module(module_name, mod):
+                if operation.identifier == identifier:
+                    return operation
+        raise Exception(f"Could not load operation {identifier}")
+
+    @staticmethod
+    def _module_signature(module_info: pkgutil.ModuleInfo) -> Optional[str]:
+        """A hash of the path, size and modification time of the files in a module.
+        This changes if the module may have changed.
+        This is None if the module files cannot be found, for example in a frozen build,
+        in which case the module cannot be indexed and must be imported."""
+        spec = module_info.module_finder.find_spec(module_info.name)
+        if spec is None or spec.origin is None:
+            return None
+        if module_info.ispkg:
+            paths = sorted(
+                os.path.join(root, file_name)
+                for root, dirs, files in os.walk(os.path.dirname(spec.origin))
+                if "__pycache__" not in root
+                for file_name in files
+            )
+        else:
+            paths = [spec.origin]
+        signature = hashlib.sha1()
+        found = False
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            found = True
+            signature.update(
+                repr((path, stat.st_size, stat.st_mtime_ns)).encode("utf-8")
+            )
+        return signature.hexdigest() if found else None
 
-    def _load_module(self, obj_path: str, mod: ModuleType):
+    def _index_path(self) -> str:
+        """The path of the operation index for the group."""
+        return os.path.join(OPERATION_INDEX_DIR, f"{self._group_name}.json")
+
+    def _read_index(self) -> Dict[str, dict]:
+        """Read the operation index from the cache."""
+        try:
+            with open(self._index_path()) as f:
+                index = json.load(f)
+            # The stock operations may be different in other versions of the program.
+            if index["version"] == [OPERATION_INDEX_VERSION, __version__]:
+                return index["modules"]
+        except FileNotFoundError:
+            pass
+        except Exception:
+            log.warning("Failed reading the operation index", exc_info=True)
+        return {}
+
+    def _write_index(self):
+        """Write the operation index to the cache."""
+        index_path = self._index_path()
+        try:
+            os.makedirs(OPERATION_INDEX_DIR, exist_ok=True)
+            with open(f"{index_path}.tmp", "w") as f:
+                json.dump(
+                    {
+                        "version": [OPERATION_INDEX_VERSION, __version__],
+                        "modules": self._index,
+                    },
+                    f,
+                )
+            os.replace(f"{index_path}.tmp", index_path)
+        except OSError:
+            log.warning("Failed writing the operation index", exc_info=True)
+
+    def _load_module(self, obj_path: str, mod: ModuleType) -> List[BaseOperationLoader]:
+        """Load the operations exported by a module.
+
+        :param obj_path: The python path of the module.
+        :param mod: The module to load the operations from.
+        :return: The valid operations.
+        """
+        operations = []
         if hasattr(mod, "export"):
             export = mod.export
             if isinstance(export, dict):
-                self._load_operation(obj_path, export)
+                operations.append(self._load_operation(obj_path, export))
             elif isinstance(export, (list, tuple)):
-                for i, export_dict in export:
-                    self._load_operation(f"{obj_path}[{i}]", export_dict)
+                for i, export_dict in enumerate(export):
+                    operations.append(
+                        self._load_operation(f"{obj_path}[{i}]", export_dict)
+                    )
             else:
                 log.error(f"The format of export in {obj_path} is invalid.")
         else:
             log.error(f"export is not present in {obj_path}")
+        return [op for op in operations if op is not None]
 
-    def _load_operation(self, identifier: str, export_dict: dict):
+    def _load_operation(
+        self, identifier: str, export_dict: dict
+    ) -> Optional[BaseOperationLoader]:
         """Create an instance of a subclass of BaseOperationLoader to load the operation.
         When finished and the class is valid store it in self._operations
 
         :param identifier: A unique identifier for this operation. <path>[0]
         :param export_dict: The dictionary defining the operation.
-        :return:
+        :return: The operation or None if it is not valid.
         """
         op = self.OperationClass(identifier, export_dict)
         if op.is_valid:
             self._operations[op.identifier] = op
+            return op
+        return None
 
 
 class OperationManager(BaseOperationManager):
@@ -0,0 +1,491 @@
+from typing import TYPE_CHECKING, Dict, Tuple, List, Optional, NamedTuple, Any
+from collections import OrderedDict
+import itertools
+import numpy
+
+from amulet.api.block import Block, UniversalAirBlock, UniversalAirLikeBlocks
+from amulet.api.chunk import Chunk
+from amulet.api.errors import ChunkDoesNotExist, ChunkLoadError
+from amulet.api.selection import SelectionGroup, SelectionBox
+from amulet.api.level.base_level.clone import is_sub_block
+from amulet.api.data_types import (
+    Dimension,
+    BlockCoordinates,
+    FloatTriplet,
+    ChunkCoordinates,
+    OperationReturnType,
+)
+from amulet.utils.matrix import transform_matrix, displacement_matrix
+
+from .executor import run_chunk_batches, Slices
+
+if TYPE_CHECKING:
+    from amulet.api.level import BaseLevel
+
+# The number of source chunks to keep a reference to.
+# Neighbouring destination chunks mostly read from the same source chunks.
+SOURCE_CHUNK_CACHE_SIZE = 256
+
+# The x, y, z index of the 8 corners of a box in an Nx2x3 bounds array.
+_CORNERS = numpy.array(list(itertools.product((0, 1), repeat=3)))
+# The x, y, z location of every block in a sub-chunk in the order sub_chunk.ravel() uses.
+_SUB_CHUNK_POINTS = numpy.transpose(
+    numpy.mgrid[0:16, 0:16, 0:16], (1, 2, 3, 0)
+).reshape(-1, 3)
+
+
+def _transform_points(points: numpy.ndarray, matrix: numpy.ndarray) -> numpy.ndarray:
+    """Transform an Nx3 array of points by a 4x4 matrix."""
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def _transform_bounds(bounds: numpy.ndarray, matrix: numpy.ndarray) -> numpy.ndarray:
+    """Transform an Nx2x3 array of boxes and get the axis aligned box containing each transformed box."""
+    corners = _transform_points(
+        bounds[:, _CORNERS, numpy.arange(3)].reshape(-1, 3), matrix
+    ).reshape(-1, 8, 3)
+    return numpy.stack([corners.min(axis=1), corners.max(axis=1)], axis=1)
+
+
+def _intersects(bounds: numpy.ndarray, box_bounds: numpy.ndarray) -> numpy.ndarray:
+    """Which of the boxes in an Nx2x3 array intersect any of the boxes in an Mx2x3 array."""
+    return numpy.any(
+        numpy.all(bounds[:, None, 0] < box_bounds[None, :, 1], axis=2)
+        & numpy.all(box_bounds[None, :, 0] < bounds[:, None, 1], axis=2),
+        axis=1,
+    )
+
+
+class _ChunkSource(NamedTuple):
+    """The data a destination chunk is resampled from."""
+
+    cx: int
+    cz: int
+    cys: numpy.ndarray  # the destination sub-chunks to resample
+    y_range: Tuple[int, int]  # the destination blocks in this y range are resampled
+    src_boxes: numpy.ndarray  # the source boxes the destination chunk samples from
+    min_sub_chunk: numpy.ndarray  # the range of source sub-chunks that may be sampled
+    max_sub_chunk: numpy.ndarray
+    sub_chunk_locations: numpy.ndarray  # the location of each source sub-chunk
+    sub_chunks: List[numpy.ndarray]
+    block_entity_locations: numpy.ndarray
+    block_entities: List[Any]
+    lut: numpy.ndarray
+    paste_lut: numpy.ndarray
+
+
+class _Paste:
+    """Paste a structure by sampling the source block for every block in each destination chunk.
+
+    The destination chunks are found from the transform before any blocks are read.
+    Each destination chunk is resampled independently so the chunks can be processed in parallel.
+    Only prepare and commit access the levels. The kernel only uses the arrays it is given.
+    """
+
+    def __init__(
+        self,
+        dst: "BaseLevel",
+        src: "BaseLevel",
+        src_dimension: Dimension,
+        src_selection: SelectionGroup,
+        transform: numpy.ndarray,
+        transform_blocks: bool,
+        skip_blocks: Tuple[Block, ...],
+    ):
+        self._dst = dst
+        self._src = src
+        self._src_dimension = src_dimension
+        self._src_bounds = numpy.array(
+            [box.bounds for box in src_selection.selection_boxes], dtype=numpy.float64
+        ).reshape((-1, 2, 3))
+        self._transform = transform
+        self._transform_blocks = transform_blocks
+        # The destination block centres are transformed by this to find the source location.
+        self._inverse = numpy.linalg.inv(
+            numpy.matmul(displacement_matrix(-0.5, -0.5, -0.5), transform)
+        )
+        self._skip_blocks = skip_blocks
+
+        # The destination block id of each source block id.
+        self._lut = numpy.zeros(0, dtype=numpy.uint32)
+        # Should each source block id be pasted. The copy air, water and lava options are applied with this.
+        self._paste_lut = numpy.zeros(0, dtype=bool)
+        # Locations the source does not have data for are pasted as air.
+        self._air_id = dst.block_palette.get_add_block(UniversalAirBlock)
+        self._paste_air = not is_sub_block(skip_blocks, UniversalAirBlock)
+
+        self._source_chunks: "OrderedDict[ChunkCoordinates, Optional[Chunk]]" = (
+            OrderedDict()
+        )
+        self._footprint = self._find_footprint()
+
+    @property
+    def selection(self) -> SelectionGroup:
+        """The chunk columns in the destination that blocks may be pasted into."""
+        return SelectionGroup(
+            [
+                SelectionBox(
+                    (cx * 16, cys[0] * 16, cz * 16),
+                    ((cx + 1) * 16, (cys[-1] + 1) * 16, (cz + 1) * 16),
+                )
+                for (cx, cz), cys in self._footprint.items()
+            ]
+        )
+
+    def _find_footprint(self) -> Dict[ChunkCoordinates, numpy.ndarray]:
+        """Find the destination sub-chunks that any source block may be pasted into.
+
+        :return: A dictionary mapping the destination chunk coordinates to the sorted sub-chunk y indexes.
+        """
+        sub_chunks = [numpy.zeros((0, 3), dtype=numpy.int64)]
+        for box_bounds in self._src_bounds:
+            dst_bounds = _transform_bounds(box_bounds[None], self._transform)[0]
+            min_sub_chunk = numpy.floor(dst_bounds[0] / 16).astype(numpy.int64)
+            max_sub_chunk = numpy.floor(dst_bounds[1] / 16).astype(numpy.int64) + 1
+            grid = numpy.transpose(
+                numpy.mgrid[
+                    min_sub_chunk[0] : max_sub_chunk[0],
+                    min_sub_chunk[1] : max_sub_chunk[1],
+                    min_sub_chunk[2] : max_sub_chunk[2],
+                ],
+                (1, 2, 3, 0),
+            ).reshape(-1, 3)
+            # the area each destination sub-chunk samples from
+            src_bounds = _transform_bounds(
+                numpy.stack([grid * 16, grid * 16 + 16], axis=1), self._inverse
+            )
+            sub_chunks.append(grid[_intersects(src_bounds, box_bounds[None])])
+        sub_chunks = numpy.unique(numpy.concatenate(sub_chunks), axis=0)
+        # group the sub-chunks by chunk
+        order = numpy.lexsort((sub_chunks[:, 1], sub_chunks[:, 2], sub_chunks[:, 0]))
+        sub_chunks = sub_chunks[order]
+        chunk_starts = numpy.flatnonzero(
+            numpy.any(numpy.diff(sub_chunks[:, ::2], axis=0, prepend=-1) != 0, axis=1)
+            | (numpy.arange(len(sub_chunks)) == 0)
+        )
+        return {
+            (int(cys[0, 0]), int(cys[0, 2])): cys[:, 1]
+            for cys in numpy.split(sub_chunks, chunk_starts[1:])
+            if len(cys)
+        }
+
+    def _update_luts(self):
+        """Add the source blocks added since the last call to the lookup tables."""
+        src_palette = self._src.block_palette
+        if len(src_palette) <= len(self._lut):
+            return
+        blocks = [
+            src_palette[block_id]
+            for block_id in range(len(self._lut), len(src_palette))
+        ]
+        if self._transform_blocks:
+            transformed_blocks = [
+                self._src.translation_manager.transform_universal_block(
+                    block, self._transform
+                )
+                for block in blocks
+            ]
+        else:
+            transformed_blocks = blocks
+        self._lut = numpy.append(
+            self._lut,
+            numpy.array(
+                [
+                    self._dst.block_palette.get_add_block(block)
+                    for block in transformed_blocks
+                ],
+                dtype=numpy.uint32,
+            ),
+        )
+        self._paste_lut = numpy.append(
+            self._paste_lut,
+            numpy.array(
+                [not is_sub_block(self._skip_blocks, block) for block in blocks],
+                dtype=bool,
+            ),
+        )
+
+    def _get_source_chunk(self, cx: int, cz: int) -> Optional[Chunk]:
+        """Get a chunk from the source. None if the chunk does not exist or could not be loaded."""
+        if (cx, cz) in self._source_chunks:
+            self._source_chunks.move_to_end((cx, cz))
+        else:
+            try:
+                chunk = self._src.get_chunk(cx, cz, self._src_dimension)
+            except (ChunkDoesNotExist, ChunkLoadError):
+                chunk = None
+            self._source_chunks[(cx, cz)] = chunk
+            if len(self._source_chunks) > SOURCE_CHUNK_CACHE_SIZE:
+                self._source_chunks.popitem(False)
+        return self._source_chunks[(cx, cz)]
+
+    def prepare(self, chunk: Chunk, slices: Slices, box: SelectionBox) -> tuple:
+        """Read the source sub-chunks and block entities the destination chunk samples from."""
+        cys = self._footprint[(chunk.cx, chunk.cz)]
+        cys = cys[(box.min_y >> 4 <= cys) & (cys <= (box.max_y - 1) >> 4)]
+        if not len(cys):
+            return (None,)
+        dst_bounds = numpy.array(
+            [
+                [chunk.cx * 16, max(box.min_y, cys[0] * 16), chunk.cz * 16],
+                [
+                    chunk.cx * 16 + 16,
+                    min(box.max_y, cys[-1] * 16 + 16),
+                    chunk.cz * 16 + 16,
+                ],
+            ]
+        )
+        src_bounds = _transform_bounds(dst_bounds[None], self._inverse)[0]
+        box_mask = _intersects(self._src_bounds, src_bounds[None])
+        src_boxes = self._src_bounds[box_mask]
+        if not len(src_boxes):
+            return (None,)
+        # clip to the source boxes
+        src_bounds = numpy.stack(
+            [
+                numpy.maximum(src_bounds[0], src_boxes[:, 0].min(axis=0)),
+                numpy.minimum(src_bounds[1], src_boxes[:, 1].max(axis=0)),
+            ]
+        )
+        min_sub_chunk = numpy.floor(src_bounds[0] / 16).astype(numpy.int64)
+        max_sub_chunk = numpy.floor(src_bounds[1] / 16).astype(numpy.int64) + 1
+
+        self._update_luts()
+        sub_chunk_locations = []
+        sub_chunks = []
+        block_entity_locations = []
+        block_entities = []
+        for cx, cz in itertools.product(
+            range(min_sub_chunk[0], max_sub_chunk[0]),
+            range(min_sub_chunk[2], max_sub_chunk[2]),
+        ):
+            src_chunk = self._get_source_chunk(cx, cz)
+            if src_chunk is None:
+                continue
+            for cy in range(min_sub_chunk[1], max_sub_chunk[1]):
+                if src_chunk.blocks.has_sub_chunk(cy):
+                    sub_chunk_locations.append((cx, cy, cz))
+                    sub_chunks.append(src_chunk.blocks.get_sub_chunk(cy))
+            for location, block_entity in src_chunk.block_entities.items():
+                # locations without block data are pasted as air so the block entity is not copied
+                if src_chunk.blocks.has_sub_chunk(location[1] >> 4):
+                    block_entity_locations.append(location)
+                    block_entities.append(block_entity)
+
+        return (
+            _ChunkSource(
+                chunk.cx,
+                chunk.cz,
+                cys,
+                (box.min_y, box.max_y),
+                src_boxes,
+                min_sub_chunk,
+                max_sub_chunk,
+                numpy.array(sub_chunk_locations, dtype=numpy.int64).reshape(-1, 3),
+                sub_chunks,
+                numpy.array(block_entity_locations, dtype=numpy.int64).reshape(-1, 3),
+                block_entities,
+                self._lut,
+                self._paste_lut,
+            ),
+        )
+
+    def kernel(self, source: Optional[_ChunkSource]):
+        """Find the blocks to paste into one destination chunk.
+
+        :param source: The data returned by prepare.
+        :return: A list of the sub-chunk y index, a 16x16x16 bool array of the blocks to set
+            and the destination block ids to set them to
+            and a list of the destination location and source block entity to copy.
+            None if nothing is pasted into the chunk.
+        """
+        if source is None:
+            return None
+        # The index of each source sub-chunk in the sub-chunk range. -1 if it does not exist.
+        table = numpy.full(
+            tuple((source.max_sub_chunk - source.min_sub_chunk).tolist()),
+            -1,
+            dtype=numpy.int64,
+        )
+        if source.sub_chunks:
+            table[tuple((source.sub_chunk_locations - source.min_sub_chunk).T)] = (
+                numpy.arange(len(source.sub_chunks))
+            )
+            src_ids = numpy.stack(source.sub_chunks)
+            dst_ids = source.lut[src_ids]
+            paste = source.paste_lut[src_ids]
+
+        # The source block entities keyed by their index in the sampled area.
+        block_entity_min = source.min_sub_chunk * 16
+        block_entity_shape = tuple(
+            ((source.max_sub_chunk - source.min_sub_chunk) * 16).tolist()
+        )
+        in_range = numpy.flatnonzero(
+            numpy.all(
+                (block_entity_min <= source.block_entity_locations)
+                & (
+                    source.block_entity_locations
+                    < block_entity_min + block_entity_shape
+                ),
+                axis=1,
+            )
+        )
+        block_entities = dict(
+            zip(
+                numpy.ravel_multi_index(
+                    tuple(
+                        (source.block_entity_locations[in_range] - block_entity_min).T
+                    ),
+                    block_entity_shape,
+                ).tolist(),
+                [source.block_entities[index] for index in in_range.tolist()],
+            )
+        )
+        block_entity_keys = numpy.array(list(block_entities), dtype=numpy.int64)
+
+        sub_chunk_changes = []
+        block_entity_changes = []
+        for cy in source.cys.tolist():
+            dst_points = _SUB_CHUNK_POINTS + (source.cx * 16, cy * 16, source.cz * 16)
+            src_points = _transform_points(dst_points, self._inverse)
+            mask = (source.y_range[0] <= dst_points[:, 1]) & (
+                dst_points[:, 1] < source.y_range[1]
+            )
+            in_box = numpy.zeros(len(src_points), dtype=bool)
+            for box_min, box_max in source.src_boxes:
+                in_box |= numpy.all(
+                    (box_min <= src_points) & (src_points < box_max), axis=1
+                )
+            mask &= in_box
+            if not numpy.any(mask):
+                continue
+            src_points = numpy.floor(src_points[mask]).astype(numpy.int64)
+            sub_chunk_index = table[tuple(((src_points >> 4) - source.min_sub_chunk).T)]
+            found = sub_chunk_index != -1
+            ids = numpy.full(len(src_points), self._air_id, dtype=numpy.uint32)
+            paste_block = numpy.full(len(src_points), self._paste_air, dtype=bool)
+            if numpy.any(found):
+                src_index = (sub_chunk_index[found],) + tuple(
+                    (src_points[found] & 15).T
+                )
+                ids[found] = dst_ids[src_index]
+                paste_block[found] = paste[src_index]
+            if not numpy.any(paste_block):
+                continue
+            mask[mask] = paste_block
+            sub_chunk_changes.append((cy, mask.reshape(16, 16, 16), ids[paste_block]))
+
+            if block_entities:
+                keys = numpy.ravel_multi_index(
+                    tuple((src_points[paste_block] - block_entity_min).T),
+                    block_entity_shape,
+                )
+                has_block_entity = numpy.isin(keys, block_entity_keys)
+                for key, location in zip(
+                    keys[has_block_entity].tolist(),
+                    dst_points[mask][has_block_entity].tolist(),
+                ):
+                    block_entity_changes.append((tuple(location), block_entities[key]))
+
+        if not sub_chunk_changes:
+            return None
+        return sub_chunk_changes, block_entity_changes
+
+    @staticmethod
+    def commit(chunk: Chunk, slices: Slices, changes):
+        """Write the pasted blocks and block entities into the destination chunk."""
+        if changes is None:
+            return
+        sub_chunk_changes, block_entity_changes = changes
+        masks = {}
+        for cy, mask, ids in sub_chunk_changes:
+            chunk.blocks.get_sub_chunk(cy)[mask] = ids
+            masks[cy] = mask
+        # remove the block entities that have been overwritten
+        for location in list(chunk.block_entities.keys()):
+            x, y, z = location
+            mask = masks.get(y >> 4)
+            if mask is not None and mask[x & 15, y & 15, z & 15]:
+                del chunk.block_entities[location]
+        for location, block_entity in block_entity_changes:
+            chunk.block_entities[location] = block_entity.new_at_location(*location)
+        chunk.changed = True
+
+
+def paste_iter(
+    dst: "BaseLevel",
+    dst_dimension: Dimension,
+    src: "BaseLevel",
+    src_dimension: Dimension,
+    location: BlockCoordinates,
+    scale: FloatTriplet,
+    rotation: FloatTriplet,
+    copy_air=True,
+    copy_water=True,
+    copy_lava=True,
+    workers: int = None,
+) -> OperationReturnType:
+    """Paste a structure into a level.
+    This has the same arguments as amulet.operations.paste.paste_iter.
+
+    The destination chunks the structure covers are found from the transform.
+    The source block for every block in each destination chunk is then found with numpy
+    so that each destination chunk can be resampled in parallel.
+
+    :param dst: The level to paste into.
+    :param dst_dimension: The dimension to paste into.
+    :param src: The structure to paste.
+    :param src_dimension: The dimension of the structure to paste.
+    :param location: The location where the centre of the structure will be in the level.
+    :param scale: The scale in the x, y and z axis. These can be negative to mirror.
+    :param rotation: The rotation in degrees around each of the axis.
+    :param copy_air: Should air in the structure be pasted.
+    :param copy_water: Should water in the structure be pasted.
+    :param copy_lava: Should lava in the structure be pasted.
+    :param workers: The number of threads to use. Defaults to the number of CPUs.
+    :return: A generator yielding the progress from 0 to 1.
+    """
+    src_selection = src.bounds(src_dimension).merge_boxes()
+    if not src_selection:
+        return
+    location = tuple(location)
+    rotation_point = ((src_selection.max_array + src_selection.min_array) // 2).astype(
+        int
+    )
+    transformed = any(rotation) or any(s != 1 for s in scale)
+
+    if src is dst and src_dimension == dst_dimension:
+        # The source would be modified while it is being read.
+        if tuple(rotation_point) == location and not transformed:
+            return
+        src = yield from src.extract_structure_iter(src_selection, src_dimension)
+        src_dimension = src.dimensions[0]
+
+    transform = numpy.matmul(
+        transform_matrix(scale, tuple(numpy.radians(rotation)), location),
+        displacement_matrix(*-rotation_point),
+    )
+    skip_blocks = (
+        tuple(UniversalAirLikeBlocks) * bool(not copy_air)
+        + (Block("universal_minecraft", "water"),) * bool(not copy_water)
+        + (Block("universal_minecraft", "lava"),) * bool(not copy_lava)
+    )
+    paste = _Paste(
+        dst,
+        src,
+        src_dimension,
+        src_selection,
+        transform,
+        transformed,
+        skip_blocks,
+    )
+    yield from run_chunk_batches(
+        dst,
+        dst_dimension,
+        paste.selection,
+        paste.kernel,
+        paste.prepare,
+        paste.commit,
+        create_missing_chunks=True,
+        workers=workers,
+    )
@@ -1,8 +1,8 @@
 import wx
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Set
 
 from amulet.api.selection import SelectionGroup
-from amulet.api.data_types import Dimension, OperationReturnType
+from amulet.api.data_types import Dimension, OperationReturnType, ChunkCoordinates
 
 from amulet_map_editor.programs.edit.api.operations import DefaultOperationUI
 
@@ -38,6 +38,18 @@ class SimpleOperationPanel(wx.Panel, DefaultOperationUI):
             )
         )
 
+    def _chunk_locations(self, selection: SelectionGroup) -> Set[ChunkCoordinates]:
+        """Get the chunks a selection intersects.
+        If it is the canvas selection this is looked up in the selection index.
+
+        :param selection: The selection passed to the operation.
+        :return: The chunk coordinates.
+        """
+        selection_index = self.canvas.selection.selection_index
+        if selection is selection_index.selection_group:
+            return selection_index.chunk_locations()
+        return selection.chunk_locations()
+
     def _operation(
         self, world: "BaseLevel", dimension: Dimension, selection: SelectionGroup
     ) -> OperationReturnType:
@@ -1,4 +1,5 @@
 from typing import TYPE_CHECKING
+import os
 import wx
 from OpenGL.GL import (
     glClear,
@@ -34,6 +35,9 @@ class Renderer(EditCanvasContainer):
 
     __slots__ = (
         "_render_distance",
+        "_mesh_workers",
+        "_compact_vertices",
+        "_mesh_cache",
         "_chunk_generator",
         "_opengl_resource_pack",
         "_render_world",
@@ -53,6 +57,10 @@ class Renderer(EditCanvasContainer):
     ):
         super().__init__(canvas)
         self._render_distance = 5
+        # leave a core free for the UI and chunk loading threads
+        self._mesh_workers = max(1, min(8, (os.cpu_count() or 1) - 1))
+        self._compact_vertices = False
+        self._mesh_cache = False
 
         self._chunk_generator = ChunkGenerator()
         self._opengl_resource_pack = opengl_resource_pack
@@ -64,6 +72,7 @@ class Renderer(EditCanvasContainer):
             draw_floor=True,
             draw_ceil=True,
         )
+        self._render_world.mesh_workers = self._mesh_workers
         self._chunk_generator.register(self._render_world)
 
         self._fake_levels: LevelGroup = LevelGroup(
@@ -114,6 +123,7 @@ class Renderer(EditCanvasContainer):
         self.render_world.close()
         self.fake_levels.clear()
         self.sky_box.unload()
+        self.opengl_resource_pack.unload(self.canvas.context_identifier)
 
     def disable_threads(self):
         """Stop the generation of new chunk geometry.
@@ -203,6 +213,39 @@ class Renderer(EditCanvasContainer):
         self.render_world.render_distance = render_distance
         # self.fake_levels.render_distance = render_distance  # TODO
 
+    @property
+    def mesh_workers(self) -> int:
+        """The number of threads used to build the chunk geometry of the level."""
+        return self._mesh_workers
+
+    @mesh_workers.setter
+    def mesh_workers(self, mesh_workers: int):
+        """Set the number of threads used to build the chunk geometry of the level."""
+        self._mesh_workers = mesh_workers
+        self.render_world.mesh_workers = mesh_workers
+
+    @property
+    def compact_vertices(self) -> bool:
+        """Is the chunk geometry of the level stored in the compact vertex format."""
+        return self._compact_vertices
+
+    @compact_vertices.setter
+    def compact_vertices(self, compact_vertices: bool):
+        """Set if the chunk geometry of the level is stored in the compact vertex format."""
+        self._compact_vertices = compact_vertices
+        self.render_world.compact_vertices = compact_vertices
+
+    @property
+    def mesh_cache(self) -> bool:
+        """Is the chunk geometry of the level cached on disk."""
+        return self._mesh_cache
+
+    @mesh_cache.setter
+    def mesh_cache(self, mesh_cache: bool):
+        """Set if the chunk geometry of the level is cached on disk."""
+        self._mesh_cache = mesh_cache
+        self.render_world.mesh_cache = mesh_cache
+
     def _on_camera_moved(self, evt: CameraMovedEvent):
         """The camera has moved. Update each class's camera state."""
         location = evt.camera_location
@@ -6,6 +6,7 @@ from amulet.api.history.history_manager import ObjectHistoryManager
 from amulet.api.history import Changeable
 
 from amulet_map_editor import log
+from .selection_index import SelectionIndex
 
 if TYPE_CHECKING:
     from amulet_map_editor.programs.edit.api.canvas import EditCanvas
@@ -31,6 +32,7 @@ class SelectionManager(Changeable):
         super().__init__()
         self._selection_corners: Tuple[BoxType, ...] = ()
         self._selection_group: SelectionGroup = SelectionGroup()
+        self._selection_index = SelectionIndex()
         self._canvas = weakref.ref(canvas)
 
         self._timer = wx.Timer(canvas)
@@ -111,6 +113,7 @@ class SelectionManager(Changeable):
         self._selection_group = SelectionGroup(
             [SelectionBox(*box) for box in self._selection_corners]
         )
+        self._selection_index.update(self._selection_group)
         wx.PostEvent(self._canvas(), SelectionChangeEvent())
 
     @property
@@ -131,6 +134,14 @@ class SelectionManager(Changeable):
         self.set_selection_group(selection_group)
         self._start_undo_point()
 
+    @property
+    def selection_index(self) -> SelectionIndex:
+        """Get a spatial index of the selection to find the boxes a ray hits.
+        This is updated when the selection is changed.
+        :return: `SelectionIndex`
+        """
+        return self._selection_index
+
     def set_selection_group(self, selection_group: SelectionGroup):
         """Set the selection from a `SelectionGroup` class
         Note this method will not trigger the history logic.
@@ -144,6 +155,7 @@ class SelectionManager(Changeable):
             (box.min, box.max) for box in selection_group.selection_boxes
         ]
         self._selection_group = selection_group
+        self._selection_index.update(self._selection_group)
         wx.PostEvent(self._canvas(), SelectionChangeEvent())
 
 
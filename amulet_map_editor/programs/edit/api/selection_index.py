@@ -0,0 +1,291 @@
+from typing import Tuple, Optional, Dict, Set, List, Sequence
+from collections import Counter
+import itertools
+import numpy
+
+from amulet.api.selection import SelectionGroup, SelectionBox
+from amulet.api.data_types import (
+    PointCoordinatesAny,
+    ChunkCoordinates,
+)
+
+# The maximum number of boxes in a leaf node of the hierarchy.
+LEAF_SIZE = 16
+# The number of boxes that can be added or removed before the hierarchy is rebuilt.
+# Added boxes are tested linearly until then and removed boxes are skipped.
+MIN_REBUILD_COUNT = 32
+
+
+def _boxes_bounds(boxes: Sequence[SelectionBox]) -> numpy.ndarray:
+    """Get an Nx2x3 array of the min and max point of each box."""
+    return numpy.array([box.bounds for box in boxes], dtype=numpy.int64).reshape(
+        (-1, 2, 3)
+    )
+
+
+def _box_chunks(bounds: numpy.ndarray, sub_chunk_size: int) -> Set[ChunkCoordinates]:
+    """The chunks a box intersects. This matches SelectionBox.chunk_locations."""
+    (min_x, _, min_z), (max_x, _, max_z) = bounds.tolist()
+    return set(
+        itertools.product(
+            range(min_x // sub_chunk_size, (max_x - 1) // sub_chunk_size + 1),
+            range(min_z // sub_chunk_size, (max_z - 1) // sub_chunk_size + 1),
+        )
+    )
+
+
+class SelectionIndex:
+    """A bounding volume hierarchy over the boxes in a selection group.
+    This finds the box a ray hits without testing every box.
+    The results match the equivalent SelectionGroup methods.
+
+    The index can be updated with a new selection group.
+    If only a few boxes have changed the hierarchy is not rebuilt.
+    """
+
+    def __init__(self, selection_group: SelectionGroup = None):
+        self._selection_group = SelectionGroup()
+        # The min and max point of each box in selection group order.
+        self._bounds = numpy.zeros((0, 2, 3), dtype=numpy.int64)
+
+        # The hierarchy is stored in arrays.
+        # The min and max point of each node.
+        self._node_bounds = numpy.zeros((0, 2, 3), dtype=numpy.float64)
+        # The child nodes of each node. -1 if the node is a leaf.
+        self._node_children = numpy.zeros((0, 2), dtype=numpy.int64)
+        # The slice of the slot arrays in each leaf node.
+        self._node_slots = numpy.zeros((0, 2), dtype=numpy.int64)
+        # The bounds of the box in each slot and the index of the box in the selection group.
+        # The index is -1 if the box has been removed since the hierarchy was built.
+        self._slot_bounds = numpy.zeros((0, 2, 3), dtype=numpy.float64)
+        self._slot_index = numpy.zeros(0, dtype=numpy.int64)
+        self._removed_count = 0
+
+        # The boxes added since the hierarchy was built.
+        self._extra_bounds = numpy.zeros((0, 2, 3), dtype=numpy.float64)
+        self._extra_index = numpy.zeros(0, dtype=numpy.int64)
+
+        # The number of boxes in each chunk for each sub-chunk size chunk_locations has been called with.
+        self._chunk_counts: Dict[int, Counter] = {}
+
+        if selection_group is not None:
+            self.update(selection_group)
+
+    def __len__(self):
+        return len(self._bounds)
+
+    @property
+    def selection_group(self) -> SelectionGroup:
+        """The selection group the index was last updated with."""
+        return self._selection_group
+
+    @property
+    def bounds(self) -> numpy.ndarray:
+        """An Nx2x3 int array of the min and max point of each box in the selection group."""
+        return self._bounds.copy()
+
+    def update(self, selection_group: SelectionGroup):
+        """Update the index to match a selection group.
+        The boxes that are in the same order at the start and end of the old and new selection are reused.
+
+        :param selection_group: The new selection group.
+        """
+        if selection_group is self._selection_group:
+            return
+        old_boxes = self._selection_group.selection_boxes
+        new_boxes = selection_group.selection_boxes
+        old_bounds = self._bounds
+
+        # Find the boxes that have not changed at the start and end.
+        # Boxes are often reused between selection groups so check that first.
+        count = min(len(old_boxes), len(new_boxes))
+        start = 0
+        while start < count and old_boxes[start] is new_boxes[start]:
+            start += 1
+        end = 0
+        while end < count - start and old_boxes[-1 - end] is new_boxes[-1 - end]:
+            end += 1
+        new_bounds = numpy.concatenate(
+            [
+                old_bounds[:start],
+                _boxes_bounds(new_boxes[start : len(new_boxes) - end]),
+                old_bounds[len(old_boxes) - end :],
+            ]
+        )
+        # then compare the bounds of the other boxes
+        old_end = len(old_boxes) - end
+        new_end = len(new_boxes) - end
+        count = min(old_end, new_end) - start
+        same = numpy.all(
+            old_bounds[start : start + count] == new_bounds[start : start + count],
+            axis=(1, 2),
+        )
+        same_count = len(same) if same.all() else int(numpy.argmin(same))
+        start += same_count
+        count -= same_count
+        same = numpy.all(
+            old_bounds[old_end - count : old_end]
+            == new_bounds[new_end - count : new_end],
+            axis=(1, 2),
+        )[::-1]
+        same_count = len(same) if same.all() else int(numpy.argmin(same))
+        old_end -= same_count
+        new_end -= same_count
+        self._selection_group = selection_group
+        self._bounds = new_bounds
+
+        for sub_chunk_size, chunk_counts in self._chunk_counts.items():
+            for bounds in old_bounds[start:old_end]:
+                chunk_counts.subtract(_box_chunks(bounds, sub_chunk_size))
+            for bounds in new_bounds[start:new_end]:
+                chunk_counts.update(_box_chunks(bounds, sub_chunk_size))
+            for chunk in [chunk for chunk, count in chunk_counts.items() if count <= 0]:
+                del chunk_counts[chunk]
+
+        removed_count = old_end - start
+        added_count = new_end - start
+        change_count = (
+            self._removed_count + removed_count + len(self._extra_index) + added_count
+        )
+        if change_count > max(MIN_REBUILD_COUNT, len(new_bounds) // 4):
+            self._build()
+        else:
+            self._removed_count += removed_count
+            # remove the changed boxes and move the index of the boxes after them
+            removed = (start <= self._slot_index) & (self._slot_index < old_end)
+            self._slot_index[removed] = -1
+            self._slot_index[self._slot_index >= old_end] += added_count - removed_count
+            keep = (self._extra_index < start) | (old_end <= self._extra_index)
+            self._extra_bounds = self._extra_bounds[keep]
+            self._extra_index = self._extra_index[keep]
+            self._extra_index[self._extra_index >= old_end] += (
+                added_count - removed_count
+            )
+            # the new boxes are tested linearly until the next rebuild
+            self._extra_bounds = numpy.concatenate(
+                [self._extra_bounds, new_bounds[start:new_end]]
+            )
+            self._extra_index = numpy.concatenate(
+                [self._extra_index, numpy.arange(start, new_end)]
+            )
+
+    def _build(self):
+        """Rebuild the hierarchy from self._bounds"""
+        bounds = self._bounds.astype(numpy.float64)
+        centres = bounds.sum(axis=1)
+        order = numpy.arange(len(bounds))
+        node_bounds: List[numpy.ndarray] = []
+        node_children: List[Tuple[int, int]] = []
+        node_slots: List[Tuple[int, int]] = []
+        # The slice of order in each node. The root node contains every box.
+        stack = [(0, len(bounds), -1, 0)] if len(bounds) else []
+        while stack:
+            start, end, parent, child = stack.pop()
+            node_index = len(node_bounds)
+            if parent >= 0:
+                node_children[parent][child] = node_index
+            slot_indexes = order[start:end]
+            node_bounds.append(
+                numpy.array(
+                    [
+                        bounds[slot_indexes, 0].min(axis=0),
+                        bounds[slot_indexes, 1].max(axis=0),
+                    ]
+                )
+            )
+            if end - start <= LEAF_SIZE:
+                node_children.append([-1, -1])
+                node_slots.append((start, end))
+            else:
+                # split at the median of the axis the box centres are most spread over
+                node_children.append([-1, -1])
+                node_slots.append((0, 0))
+                slot_centres = centres[slot_indexes]
+                axis = numpy.argmax(numpy.ptp(slot_centres, axis=0))
+                middle = (end - start) // 2
+                order[start:end] = slot_indexes[
+                    numpy.argpartition(slot_centres[:, axis], middle)
+                ]
+                stack.append((start + middle, end, node_index, 1))
+                stack.append((start, start + middle, node_index, 0))
+
+        self._node_bounds = numpy.array(node_bounds, dtype=numpy.float64).reshape(
+            (-1, 2, 3)
+        )
+        self._node_children = numpy.array(node_children, dtype=numpy.int64).reshape(
+            (-1, 2)
+        )
+        self._node_slots = numpy.array(node_slots, dtype=numpy.int64).reshape((-1, 2))
+        self._slot_bounds = bounds[order]
+        self._slot_index = order
+        self._removed_count = 0
+        self._extra_bounds = numpy.zeros((0, 2, 3), dtype=numpy.float64)
+        self._extra_index = numpy.zeros(0, dtype=numpy.int64)
+
+    def _leaf_slots(self, leaves: numpy.ndarray) -> numpy.ndarray:
+        """The slots in the leaf nodes excluding the slots of the boxes that have been removed."""
+        starts, ends = self._node_slots[leaves].T
+        counts = ends - starts
+        slots = numpy.arange(counts.sum()) + numpy.repeat(
+            starts - numpy.cumsum(counts) + counts, counts
+        )
+        return slots[self._slot_index[slots] != -1]
+
+    def closest_vector_intersection(
+        self, origin: PointCoordinatesAny, vector: PointCoordinatesAny
+    ) -> Tuple[Optional[int], float]:
+        """
+        Returns the index for the closest box in the look vector and the multiplier of the look vector to get there.
+        This matches SelectionGroup.closest_vector_intersection.
+
+        :param origin: The origin tuple of the vector
+        :param vector: The vector magnitude in x, y and z
+        :return: Index for the closest box and the multiplier of the vector to get there. None, inf if no intersection.
+        """
+        origin = numpy.array(origin, dtype=numpy.float64)
+        vector = numpy.array(vector, dtype=numpy.float64)
+        vector[abs(vector) < 0.000001] = 0.000001
+
+        def intersections(bounds: numpy.ndarray, entry: bool) -> numpy.ndarray:
+            """The multiplier of the vector to each box. inf if the vector does not hit the box.
+            This is the same logic as SelectionBox.intersects_vector.
+            If entry is True this is the smallest multiplier a box within the bounds can be hit at."""
+            t = numpy.sort((bounds - origin) / vector, axis=1)
+            t_min = t[:, 0].max(axis=1)
+            t_max = t[:, 1].min(axis=1)
+            if entry:
+                distance = numpy.maximum(t_min, 0)
+            else:
+                distance = numpy.where(t_min >= 0, t_min, t_max)
+            return numpy.where((t_min > t_max) | (t_max < 0), numpy.inf, distance)
+
+        distances = [intersections(self._extra_bounds, False)]
+        indexes = [self._extra_index]
+        best = distances[0].min(initial=numpy.inf)
+        nodes = numpy.arange(min(1, len(self._node_bounds)))
+        while len(nodes):
+            # skip the nodes that cannot contain a box closer than the closest box found so far
+            nodes = nodes[intersections(self._node_bounds[nodes], True) <= best]
+            is_leaf = self._node_children[nodes, 0] == -1
+            slots = self._leaf_slots(nodes[is_leaf])
+            distances.append(intersections(self._slot_bounds[slots], False))
+            indexes.append(self._slot_index[slots])
+            best = distances[-1].min(initial=best)
+            nodes = self._node_children[nodes[~is_leaf]].ravel()
+
+        if best == numpy.inf:
+            return None, float("inf")
+        distances = numpy.concatenate(distances)
+        indexes = numpy.concatenate(indexes)
+        # the first box in the selection group is used if more than one is the same distance
+        return int(indexes[distances == best].min()), float(best)
+
+    def chunk_locations(self, sub_chunk_size: int = 16) -> Set[ChunkCoordinates]:
+        """The chunks that intersect any box. This matches SelectionGroup.chunk_locations.
+        The result is kept up to date as the index is updated."""
+        if sub_chunk_size not in self._chunk_counts:
+            chunk_counts = Counter()
+            for bounds in self._bounds:
+                chunk_counts.update(_box_chunks(bounds, sub_chunk_size))
+            self._chunk_counts[sub_chunk_size] = chunk_counts
+        return set(self._chunk_counts[sub_chunk_size])
@@ -1,5 +1,6 @@
 from typing import TYPE_CHECKING, Optional, Generator
 import webbrowser
+import os
 import logging
 from threading import Thread
 import traceback
@@ -129,6 +130,15 @@ class EditExtension(wx.Panel, BaseProgram):
             self._canvas.camera.rotate_speed = edit_config.get("options", {}).get(
                 "camera_sensitivity", 2.0
             )
+            self._canvas.renderer.mesh_workers = edit_config.get("options", {}).get(
+                "mesh_workers", self._canvas.renderer.mesh_workers
+            )
+            self._canvas.renderer.compact_vertices = edit_config.get("options", {}).get(
+                "compact_vertices", self._canvas.renderer.compact_vertices
+            )
+            self._canvas.renderer.mesh_cache = edit_config.get("options", {}).get(
+                "mesh_cache", self._canvas.renderer.mesh_cache
+            )
 
             self._temp_msg = None
             self._temp_loading_bar = None
@@ -298,9 +308,12 @@ class EditExtension(wx.Panel, BaseProgram):
             fov = self._canvas.camera.perspective_fov
             render_distance = self._canvas.renderer.render_distance
             camera_sensitivity = self._canvas.camera.rotate_speed
+            mesh_workers = self._canvas.renderer.mesh_workers
+            compact_vertices = self._canvas.renderer.compact_vertices
+            mesh_cache = self._canvas.renderer.mesh_cache
             dialog = SimpleDialog(self, "Options")
 
-            sizer = wx.FlexGridSizer(3, 2, 0, 0)
+            sizer = wx.FlexGridSizer(6, 2, 0, 0)
             dialog.sizer.Add(sizer, flag=wx.ALL, border=5)
             fov_ui = wx.SpinCtrlDouble(dialog, min=0, max=180, initial=fov)
 
@@ -357,6 +370,67 @@ class EditExtension(wx.Panel, BaseProgram):
                 border=5,
             )
 
+            mesh_workers_ui = wx.SpinCtrl(
+                dialog, min=1, max=max(1, os.cpu_count() or 1), initial=mesh_workers
+            )
+
+            def set_mesh_workers(evt):
+                self._canvas.renderer.mesh_workers = mesh_workers_ui.GetValue()
+
+            mesh_workers_ui.Bind(wx.EVT_SPINCTRL, set_mesh_workers)
+            sizer.Add(
+                wx.StaticText(
+                    dialog, label=lang.get("program_3d_edit.options.mesh_workers")
+                ),
+                flag=wx.LEFT | wx.TOP | wx.ALIGN_CENTER_VERTICAL | wx.EXPAND,
+                border=5,
+            )
+            sizer.Add(
+                mesh_workers_ui,
+                flag=wx.LEFT | wx.TOP | wx.ALIGN_CENTER_VERTICAL | wx.EXPAND,
+                border=5,
+            )
+
+            compact_vertices_ui = wx.CheckBox(dialog)
+            compact_vertices_ui.SetValue(compact_vertices)
+
+            def set_compact_vertices(evt):
+                self._canvas.renderer.compact_vertices = compact_vertices_ui.GetValue()
+
+            compact_vertices_ui.Bind(wx.EVT_CHECKBOX, set_compact_vertices)
+            sizer.Add(
+                wx.StaticText(
+                    dialog, label=lang.get("program_3d_edit.options.compact_vertices")
+                ),
+                flag=wx.LEFT | wx.TOP | wx.ALIGN_CENTER_VERTICAL | wx.EXPAND,
+                border=5,
+            )
+            sizer.Add(
+                compact_vertices_ui,
+                flag=wx.LEFT | wx.TOP | wx.ALIGN_CENTER_VERTICAL | wx.EXPAND,
+                border=5,
+            )
+
+            mesh_cache_ui = wx.CheckBox(dialog)
+            mesh_cache_ui.SetValue(mesh_cache)
+
+            def set_mesh_cache(evt):
+                self._canvas.renderer.mesh_cache = mesh_cache_ui.GetValue()
+
+            mesh_cache_ui.Bind(wx.EVT_CHECKBOX, set_mesh_cache)
+            sizer.Add(
+                wx.StaticText(
+                    dialog, label=lang.get("program_3d_edit.options.mesh_cache")
+                ),
+                flag=wx.LEFT | wx.TOP | wx.ALIGN_CENTER_VERTICAL | wx.EXPAND,
+                border=5,
+            )
+            sizer.Add(
+                mesh_cache_ui,
+                flag=wx.LEFT | wx.TOP | wx.ALIGN_CENTER_VERTICAL | wx.EXPAND,
+                border=5,
+            )
+
             dialog.Fit()
 
             response = dialog.ShowModal()
@@ -370,11 +444,19 @@ class EditExtension(wx.Panel, BaseProgram):
                 edit_config["options"][
                     "camera_sensitivity"
                 ] = camera_sensitivity_ui.GetValue()
+                edit_config["options"]["mesh_workers"] = mesh_workers_ui.GetValue()
+                edit_config["options"][
+                    "compact_vertices"
+                ] = compact_vertices_ui.GetValue()
+                edit_config["options"]["mesh_cache"] = mesh_cache_ui.GetValue()
                 config.put(EDIT_CONFIG_ID, edit_config)
             elif response == wx.ID_CANCEL:
                 self._canvas.camera.perspective_fov = fov
                 self._canvas.renderer.render_distance = render_distance
                 self._canvas.camera.rotate_speed = camera_sensitivity
+                self._canvas.renderer.mesh_workers = mesh_workers
+                self._canvas.renderer.compact_vertices = compact_vertices
+                self._canvas.renderer.mesh_cache = mesh_cache
 
     @staticmethod
     def _help_controls():
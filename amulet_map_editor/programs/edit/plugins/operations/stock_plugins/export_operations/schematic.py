@@ -97,9 +97,10 @@ class ExportSchematic(SimpleOperationPanel):
             wrapper.create_and_open(platform, (1, 12, 2), selection, True)
             wrapper.translation_manager = world.translation_manager
             wrapper_dimension = wrapper.dimensions[0]
-            chunk_count = len(list(selection.chunk_locations()))
+            chunk_locations = self._chunk_locations(selection)
+            chunk_count = len(chunk_locations)
             yield 0, f"Exporting {os.path.basename(path)}"
-            for chunk_index, (cx, cz) in enumerate(selection.chunk_locations()):
+            for chunk_index, (cx, cz) in enumerate(chunk_locations):
                 try:
                     chunk = world.get_chunk(cx, cz, dimension)
                     wrapper.commit_chunk(chunk, wrapper_dimension)
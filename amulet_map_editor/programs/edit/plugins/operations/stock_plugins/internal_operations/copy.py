@@ -7,6 +7,7 @@ from amulet_map_editor.programs.edit.api.operations import (
     OperationSilentAbort,
     OperationError,
 )
+from amulet_map_editor.programs.edit.api.clipboard import ClipboardStructure
 from amulet.api.data_types import OperationReturnType
 
 if TYPE_CHECKING:
@@ -18,7 +19,10 @@ def copy(
 ) -> OperationReturnType:
     if selection:
         yield 0, "Copying"
-        structure = yield from world.extract_structure_iter(selection, dimension)
+        # The world unloads its chunks when the operation finishes so the structure can reference them.
+        structure = yield from ClipboardStructure.from_level_iter(
+            world, selection, dimension
+        )
         structure_cache.add_structure(structure, structure.dimensions[0])
         raise OperationSilentAbort
     else:
@@ -7,6 +7,7 @@ from amulet_map_editor.programs.edit.plugins.operations.stock_plugins.internal_o
     delete,
 )
 from amulet_map_editor.programs.edit.api.operations import OperationError
+from amulet_map_editor.programs.edit.api.clipboard import ClipboardStructure
 
 if TYPE_CHECKING:
     from amulet.api.level import BaseLevel
@@ -16,7 +17,11 @@ def cut(
     world: "BaseLevel", dimension: Dimension, selection: SelectionGroup
 ) -> OperationReturnType:
     if selection:
-        structure = world.extract_structure(selection, dimension)
+        structure = yield from ClipboardStructure.from_level_iter(
+            world, selection, dimension
+        )
+        # The chunks are deleted from in this operation so the blocks must be copied first.
+        structure.snapshot()
         structure_cache.add_structure(structure, structure.dimensions[0])
         yield from delete(
             world,
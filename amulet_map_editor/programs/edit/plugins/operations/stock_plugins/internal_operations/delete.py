@@ -6,6 +6,8 @@ from amulet.api.selection import SelectionGroup
 from amulet.api.block import UniversalAirBlock
 from amulet.api.data_types import Dimension, OperationReturnType
 
+from amulet_map_editor.programs.edit.api.operations.executor import chunk_box_count
+
 if TYPE_CHECKING:
     from amulet.api.level import BaseLevel
 
@@ -15,11 +17,10 @@ def delete(
 ) -> OperationReturnType:
     internal_id = world.block_palette.get_add_block(UniversalAirBlock)
 
-    iter_count = len(list(world.get_coord_box(dimension, selection, False)))
-    count = 0
-
-    for chunk, slices, _ in world.get_chunk_slice_box(dimension, selection, False):
+    iter_count = chunk_box_count(selection, world.sub_chunk_size)
+    for count, (chunk, slices, _) in enumerate(
+        world.get_chunk_slice_box(dimension, selection, False)
+    ):
         chunk.blocks[slices] = internal_id
         chunk.changed = True
-        count += 1
-        yield count / iter_count
+        yield min(1.0, (count + 1) / iter_count)
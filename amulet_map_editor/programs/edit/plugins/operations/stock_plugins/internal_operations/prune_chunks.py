@@ -1,5 +1,6 @@
+from typing import Set
 from amulet.api.level import BaseLevel
-from amulet.api.data_types import Dimension
+from amulet.api.data_types import Dimension, ChunkCoordinates
 from amulet.api.selection import SelectionGroup
 from amulet.api.chunk import Chunk
 
@@ -9,8 +10,20 @@ def prune_chunks(
     dimension: Dimension,
     selection: SelectionGroup,
     load_original: bool = True,
+    chunk_locations: Set[ChunkCoordinates] = None,
 ):
-    chunks = world.all_chunk_coords(dimension).difference(selection.chunk_locations())
+    """Delete all the chunks outside the selection.
+
+    :param world: The world to delete the chunks from.
+    :param dimension: The dimension to delete the chunks from.
+    :param selection: The chunks in this selection are kept.
+    :param load_original: Should the original chunk be loaded if the deletion is undone.
+    :param chunk_locations: The chunks in the selection if they are already known.
+    :return: A generator yielding the progress from 0 to 1.
+    """
+    if chunk_locations is None:
+        chunk_locations = selection.chunk_locations()
+    chunks = world.all_chunk_coords(dimension).difference(chunk_locations)
     iter_count = len(chunks)
     for count, (cx, cz) in enumerate(chunks):
         world.delete_chunk(cx, cz, dimension)
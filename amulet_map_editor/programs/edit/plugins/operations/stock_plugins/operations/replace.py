@@ -1,19 +1,100 @@
-from typing import TYPE_CHECKING, Tuple
+from typing import TYPE_CHECKING, Tuple, Dict
 import wx
 import numpy
 
 from amulet.api.block import Block
+from amulet.api.data_types import PlatformType, VersionNumberAny
 
 from amulet_map_editor.api.wx.ui.base_select import EVT_PICK
 from amulet_map_editor.api.wx.ui.block_select import BlockDefine
 from amulet_map_editor.api.wx.ui.simple import SimpleScrollablePanel
-from amulet_map_editor.programs.edit.api.operations import DefaultOperationUI
+from amulet_map_editor.programs.edit.api.operations import (
+    DefaultOperationUI,
+    run_chunk_batches,
+)
 
 if TYPE_CHECKING:
     from amulet.api.level import BaseLevel
     from amulet_map_editor.programs.edit.api.canvas import EditCanvas
 
 
+class BlockMatcher:
+    """Find the blocks in a world's block palette that match a version block definition.
+    Each palette entry is translated once and the result is stored in a lookup table indexed by the palette index.
+    The lookup table is extended when blocks are added to the palette."""
+
+    def __init__(
+        self,
+        world: "BaseLevel",
+        platform: PlatformType,
+        version: VersionNumberAny,
+        force_blockstate: bool,
+        namespace: str,
+        base_name: str,
+        properties: Dict[str, str],
+    ):
+        """
+        Set up the matcher.
+
+        :param world: The world whose block palette the lookup table is for.
+        :param platform: The platform of the block definition.
+        :param version: The version of the block definition.
+        :param force_blockstate: Should the blocks be translated to the blockstate format.
+        :param namespace: The namespace the block must have.
+        :param base_name: The base name the block must have.
+        :param properties: The SNBT value each property must have or "*" to match any value.
+        """
+        self._block_palette = world.block_palette
+        self._translator = world.translation_manager.get_version(
+            platform, version
+        ).block
+        self._force_blockstate = force_blockstate
+        self._namespace = namespace
+        self._base_name = base_name
+        self._wildcard_properties = {
+            prop for prop, val in properties.items() if val == "*"
+        }
+        self._properties = {prop: val for prop, val in properties.items() if val != "*"}
+        self._lut = numpy.zeros(0, dtype=bool)
+
+    def _matches(self, universal_block: Block) -> bool:
+        """Does a universal block match the block definition."""
+        version_block = self._translator.from_universal(
+            universal_block, force_blockstate=self._force_blockstate
+        )[0]
+        return (
+            version_block.namespace == self._namespace
+            and version_block.base_name == self._base_name
+            and all(
+                prop in self._wildcard_properties
+                or self._properties.get(prop) == val.to_snbt()
+                for prop, val in version_block.properties.items()
+            )
+        )
+
+    @property
+    def lut(self) -> numpy.ndarray:
+        """A bool array that is True for the palette indexes of the blocks that match.
+        Index it with an array of palette indexes to find the matching blocks."""
+        start = len(self._lut)
+        end = len(self._block_palette)
+        if start < end:
+            self._lut = numpy.concatenate(
+                [
+                    self._lut,
+                    numpy.fromiter(
+                        (
+                            self._matches(self._block_palette[block_id])
+                            for block_id in range(start, end)
+                        ),
+                        dtype=bool,
+                        count=end - start,
+                    ),
+                ]
+            )
+        return self._lut
+
+
 class Replace(SimpleScrollablePanel, DefaultOperationUI):
     def __init__(
         self,
@@ -121,14 +202,8 @@ class Replace(SimpleScrollablePanel, DefaultOperationUI):
         selection = self.canvas.selection.selection_group
         dimension = self.canvas.dimension
 
-        (
-            original_platform,
-            original_version,
-            original_blockstate,
-            original_namespace,
-            original_base_name,
-            original_properties,
-        ) = (
+        matcher = BlockMatcher(
+            world,
             self._original_block.platform,
             self._original_block.version_number,
             self._original_block.force_blockstate,
@@ -140,43 +215,19 @@ class Replace(SimpleScrollablePanel, DefaultOperationUI):
 
         replacement_block_id = world.block_palette.get_add_block(replacement_block)
 
-        original_block_matches = []
-        universal_block_count = 0
-
-        iter_count = len(list(world.get_coord_box(dimension, selection)))
-        count = 0
-
-        for chunk, slices, _ in world.get_chunk_slice_box(dimension, selection):
-            if universal_block_count < len(world.block_palette):
-                for universal_block_id in range(
-                    universal_block_count, len(world.block_palette)
-                ):
-                    version_block = world.translation_manager.get_version(
-                        original_platform, original_version
-                    ).block.from_universal(
-                        world.block_palette[universal_block_id],
-                        force_blockstate=original_blockstate,
-                    )[
-                        0
-                    ]
-                    if (
-                        version_block.namespace == original_namespace
-                        and version_block.base_name == original_base_name
-                        and all(
-                            original_properties.get(prop) in ["*", val.to_snbt()]
-                            for prop, val in version_block.properties.items()
-                        )
-                    ):
-                        original_block_matches.append(universal_block_id)
-
-                universal_block_count = len(world.block_palette)
-            blocks = chunk.blocks[slices]
-            blocks[numpy.isin(blocks, original_block_matches)] = replacement_block_id
-            chunk.blocks[slices] = blocks
-            chunk.changed = True
-
-            count += 1
-            yield count / iter_count
+        def prepare(chunk, slices, box):
+            # the lookup table is extended here if the chunk added blocks to the palette
+            return numpy.array(chunk.blocks[slices]), matcher.lut
+
+        def replace(blocks: numpy.ndarray, lut: numpy.ndarray):
+            # blocks is a copy so it can be modified here. It is written to the chunk in the default commit.
+            matches = lut[blocks]
+            if matches.any():
+                blocks[matches] = replacement_block_id
+                return blocks
+            return None
+
+        yield from run_chunk_batches(world, dimension, selection, replace, prepare)
 
     def DoGetBestClientSize(self):
         sizer = self.GetSizer()
@@ -7,7 +7,10 @@ from amulet.utils import block_coords_to_chunk_coords
 from amulet.api.chunk.biomes import BiomesShape
 from amulet_map_editor.api.wx.ui.base_select import EVT_PICK
 from amulet_map_editor.api.wx.ui.biome_select import BiomeDefine
-from amulet_map_editor.programs.edit.api.operations import SimpleOperationPanel
+from amulet_map_editor.programs.edit.api.operations import (
+    SimpleOperationPanel,
+    chunk_box_count,
+)
 from amulet_map_editor.api.wx.ui.simple import SimpleChoiceAny
 
 if TYPE_CHECKING:
@@ -111,8 +114,12 @@ class SetBiome(SimpleOperationPanel):
         self, world: "BaseLevel", dimension: "Dimension", selection: "SelectionGroup"
     ) -> "OperationReturnType":
         mode = self._mode.GetCurrentObject()
+        if mode not in (BoxMode, ColumnMode):
+            raise ValueError(
+                f"mode {mode} is not a valid mode for the Set Biome operation."
+            )
 
-        iter_count = len(list(world.get_coord_box(dimension, selection, False)))
+        iter_count = chunk_box_count(selection, world.sub_chunk_size)
         for count, (chunk, slices, _) in enumerate(
             world.get_chunk_slice_box(dimension, selection, False)
         ):
@@ -130,8 +137,8 @@ class SetBiome(SimpleOperationPanel):
                 elif chunk.biomes.dimension == BiomesShape.Shape2D:
                     slices = (slices[0], slices[2])
                 else:
-                    continue
-            elif mode == ColumnMode:
+                    slices = None
+            else:
                 if chunk.biomes.dimension == BiomesShape.Shape3D:
                     slices = (
                         slice(slices[0].start // 4, math.ceil(slices[0].stop / 4)),
@@ -141,16 +148,12 @@ class SetBiome(SimpleOperationPanel):
                 elif chunk.biomes.dimension == BiomesShape.Shape2D:
                     slices = (slices[0], slices[2])
                 else:
-                    continue
-            else:
-                raise ValueError(
-                    f"mode {mode} is not a valid mode for the Set Biome operation."
-                )
-
-            chunk.biomes[slices] = new_biome
+                    slices = None
 
-            chunk.changed = True
-            yield (count + 1) / iter_count
+            if slices is not None:
+                chunk.biomes[slices] = new_biome
+                chunk.changed = True
+            yield min(1.0, (count + 1) / iter_count)
 
 
 export = {
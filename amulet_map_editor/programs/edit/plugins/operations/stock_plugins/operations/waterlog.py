@@ -5,7 +5,10 @@ import wx
 from amulet_map_editor.api.wx.ui.base_select import EVT_PICK
 from amulet_map_editor.api.wx.ui.simple import SimpleDialog
 from amulet_map_editor.api.wx.ui.block_select import BlockDefine
-from amulet_map_editor.programs.edit.api.operations import DefaultOperationUI
+from amulet_map_editor.programs.edit.api.operations import (
+    DefaultOperationUI,
+    run_chunk_batches,
+)
 from amulet_map_editor.api import image
 
 if TYPE_CHECKING:
@@ -149,12 +152,13 @@ class Waterlog(wx.Panel, DefaultOperationUI):
         world = self.world
         selection = self.canvas.selection.selection_group
         dimension = self.canvas.dimension
-        iter_count = len(list(world.get_coord_box(dimension, selection, True)))
-        count = 0
-        for chunk, slices, _ in world.get_chunk_slice_box(dimension, selection, True):
-            original_blocks = chunk.blocks[slices]
+
+        def find_blocks(original_blocks: numpy.ndarray):
             palette, blocks = numpy.unique(original_blocks, return_inverse=True)
-            blocks = blocks.reshape(original_blocks.shape)
+            return palette, blocks.reshape(original_blocks.shape)
+
+        def commit(chunk, slices, result):
+            palette, blocks = result
             if mode == "Overlay":
                 lut = numpy.array(
                     [
@@ -229,10 +233,16 @@ class Waterlog(wx.Panel, DefaultOperationUI):
                 raise Exception("hello")
 
             chunk.blocks[slices] = lut[blocks]
-
             chunk.changed = True
-            count += 1
-            yield count / iter_count
+
+        yield from run_chunk_batches(
+            world,
+            dimension,
+            selection,
+            find_blocks,
+            commit=commit,
+            create_missing_chunks=True,
+        )
 
 
 export = {
@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING, Dict, Tuple, Optional
+from typing import TYPE_CHECKING, Dict, Tuple, Optional, Iterable
 import wx
 from OpenGL.GL import (
     glClear,
@@ -14,9 +14,8 @@ from amulet_map_editor.api.opengl.camera import Projection, EVT_CAMERA_MOVED
 from amulet_map_editor.programs.edit.api.ui.tool import DefaultBaseToolUI
 from amulet_map_editor.programs.edit.api.behaviour import ChunkSelectionBehaviour
 from amulet.operations.delete_chunk import delete_chunk
-from amulet.api.data_types import Dimension
+from amulet.api.data_types import Dimension, ChunkCoordinates
 from amulet.api.level import BaseLevel
-from amulet.api.selection import SelectionGroup
 from amulet.api.chunk import Chunk
 from amulet_map_editor.programs.edit.plugins.operations.stock_plugins.internal_operations.prune_chunks import (
     prune_chunks,
@@ -211,9 +210,9 @@ class ChunkTool(wx.BoxSizer, DefaultBaseToolUI):
         def create_chunks(
             world: BaseLevel,
             dimension: Dimension,
-            selection: SelectionGroup,
+            chunk_locations: Iterable[ChunkCoordinates],
         ):
-            for cx, cz in selection.chunk_locations():
+            for cx, cz in chunk_locations:
                 if not world.has_chunk(cx, cz, dimension):
                     world.put_chunk(Chunk(cx, cz), dimension)
 
@@ -221,7 +220,9 @@ class ChunkTool(wx.BoxSizer, DefaultBaseToolUI):
             lambda: create_chunks(
                 self.canvas.world,
                 self.canvas.dimension,
-                self.canvas.selection.selection_group,
+                self.canvas.selection.selection_index.chunk_locations(
+                    self.canvas.world.sub_chunk_size
+                ),
             )
         )
 
@@ -246,6 +247,9 @@ class ChunkTool(wx.BoxSizer, DefaultBaseToolUI):
                     self.canvas.dimension,
                     self.canvas.selection.selection_group,
                     load_original,
+                    self.canvas.selection.selection_index.chunk_locations(
+                        self.canvas.world.sub_chunk_size
+                    ),
                 )
             )
 
@@ -9,7 +9,6 @@ import numpy
 import weakref
 
 from amulet.api.data_types import PointCoordinates
-from amulet.operations.paste import paste_iter
 from amulet.utils.matrix import (
     rotation_matrix_xyz,
     decompose_transformation_matrix,
@@ -24,7 +23,10 @@ from amulet_map_editor.api.opengl.mesh.level import RenderLevel
 from amulet_map_editor.programs.edit.api.key_config import (
     KeybindGroup,
 )
-from amulet_map_editor.programs.edit.api.operations import OperationSuccessful
+from amulet_map_editor.programs.edit.api.operations import (
+    OperationSuccessful,
+    paste_iter,
+)
 from amulet_map_editor.programs.edit.api.ui.nudge_button import NudgeButton
 from amulet_map_editor.programs.edit.api.ui.tool import DefaultBaseToolUI
 from amulet_map_editor.programs.edit.api.behaviour import StaticSelectionBehaviour
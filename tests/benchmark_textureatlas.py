@@ -0,0 +1,81 @@
+"""Benchmark building the texture atlas from the vanilla Java and Bedrock resource packs.
+
+This is not run as part of the tests because the resource packs need downloading.
+Run it from the root of the repository with
+    python tests/benchmark_textureatlas.py [repeats]
+"""
+
+import sys
+import time
+import logging
+from typing import Tuple, Callable
+
+from minecraft_model_reader.api.resource_pack.java.download_resources import (
+    get_java_vanilla_latest_iter,
+    get_java_vanilla_fix,
+)
+from minecraft_model_reader.api.resource_pack.bedrock.download_resources import (
+    get_bedrock_vanilla_latest_iter,
+    get_bedrock_vanilla_fix,
+)
+from minecraft_model_reader.api.resource_pack import load_resource_pack_manager
+
+from amulet_map_editor.api.opengl import textureatlas
+
+
+def _run(generator):
+    """Run a progress generator to completion and get its return value."""
+    try:
+        while True:
+            next(generator)
+    except StopIteration as e:
+        return e.value
+
+
+def load_textures(
+    get_vanilla_iter: Callable, get_vanilla_fix: Callable
+) -> Tuple[str, ...]:
+    packs = [_run(get_vanilla_iter()), get_vanilla_fix()]
+    resource_pack = load_resource_pack_manager(packs, load=False)
+    _run(resource_pack.reload())
+    return resource_pack.textures
+
+
+def benchmark(name: str, textures: Tuple[str, ...], repeats: int):
+    decode_times = []
+    atlas_times = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        _run(textureatlas.load_frames_iter(textures))
+        decode_times.append(time.perf_counter() - t)
+
+        t = time.perf_counter()
+        atlas, _ = textureatlas.create_atlas(textures)
+        atlas_times.append(time.perf_counter() - t)
+
+    width, height = atlas.size
+    print(
+        f"{name}: {len(textures)} textures, {width}x{height} atlas, "
+        f"decode {min(decode_times):.3f}s, "
+        f"decode + pack + draw {min(atlas_times):.3f}s "
+        f"(best of {repeats})"
+    )
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    logging.getLogger("amulet_map_editor").setLevel(logging.WARNING)
+    benchmark(
+        "Java",
+        load_textures(get_java_vanilla_latest_iter, get_java_vanilla_fix),
+        repeats,
+    )
+    benchmark(
+        "Bedrock",
+        load_textures(get_bedrock_vanilla_latest_iter, get_bedrock_vanilla_fix),
+        repeats,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import random
+import unittest
+
+from amulet_map_editor.api.opengl.mesh.level.allocator import FreeListAllocator
+
+
+class FreeListAllocatorTestCase(unittest.TestCase):
+    def test_allocate(self):
+        allocator = FreeListAllocator(100)
+        self.assertEqual(allocator.capacity, 100)
+        self.assertEqual(allocator.allocate(10), 0)
+        self.assertEqual(allocator.allocate(20), 10)
+        self.assertEqual(allocator.used, 30)
+        self.assertEqual(allocator.end, 30)
+        self.assertEqual(allocator.fragmentation, 0.0)
+        # too large for the remaining space
+        self.assertIsNone(allocator.allocate(71))
+        self.assertEqual(allocator.allocate(70), 30)
+        self.assertEqual(allocator.end, 100)
+        self.assertIsNone(allocator.allocate(1))
+
+    def test_empty(self):
+        allocator = FreeListAllocator(0)
+        self.assertEqual(allocator.end, 0)
+        self.assertEqual(allocator.fragmentation, 0.0)
+        self.assertIsNone(allocator.allocate(1))
+        self.assertEqual(allocator.allocate(0), 0)
+
+    def test_free(self):
+        allocator = FreeListAllocator(100)
+        a = allocator.allocate(10)
+        b = allocator.allocate(10)
+        c = allocator.allocate(10)
+        allocator.free(b, 10)
+        self.assertEqual(allocator.used, 20)
+        self.assertEqual(allocator.end, 30)
+        self.assertAlmostEqual(allocator.fragmentation, 1 / 3)
+        # the first free range that is large enough is reused
+        self.assertEqual(allocator.allocate(5), b)
+        allocator.free(b, 5)
+        # freeing the neighbours merges the ranges
+        allocator.free(a, 10)
+        allocator.free(c, 10)
+        self.assertEqual(allocator.used, 0)
+        self.assertEqual(allocator.end, 0)
+        self.assertEqual(allocator.allocate(100), 0)
+
+    def test_random(self):
+        """Compare with a list of which elements are used."""
+        rand = random.Random(0)
+        capacity = 1000
+        allocator = FreeListAllocator(capacity)
+        used = [False] * capacity
+        allocations = []
+        for _ in range(2000):
+            if allocations and rand.random() < 0.45:
+                offset, size = allocations.pop(rand.randrange(len(allocations)))
+                allocator.free(offset, size)
+                used[offset : offset + size] = [False] * size
+            else:
+                size = rand.randint(1, 50)
+                offset = allocator.allocate(size)
+                # the first free range that is large enough
+                expected = next(
+                    (
+                        start
+                        for start in range(capacity - size + 1)
+                        if not any(used[start : start + size])
+                        and (start == 0 or used[start - 1])
+                    ),
+                    None,
+                )
+                self.assertEqual(offset, expected)
+                if offset is not None:
+                    used[offset : offset + size] = [True] * size
+                    allocations.append((offset, size))
+            self.assertEqual(allocator.used, sum(used))
+            end = max((offset + size for offset, size in allocations), default=0)
+            self.assertEqual(allocator.end, end)
+
+
+if __name__ == "__main__":
+    unittest.main()
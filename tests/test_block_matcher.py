@@ -0,0 +1,85 @@
+import importlib.util
+import unittest
+import numpy
+
+from amulet.api.block import Block
+from amulet.api.level import ImmutableStructure
+from amulet_nbt import TAG_String
+
+# The operation UI imports wx so the matcher can only be tested if it is installed.
+HasWx = importlib.util.find_spec("wx") is not None
+if HasWx:
+    from amulet_map_editor.programs.edit.plugins.operations.stock_plugins.operations.replace import (
+        BlockMatcher,
+    )
+
+Version = ("java", (1, 16, 5))
+
+
+def universal_block(level: ImmutableStructure, block: Block) -> Block:
+    return level.translation_manager.get_version(*Version).block.to_universal(block)[0]
+
+
+def oak_log(axis: str) -> Block:
+    return Block("minecraft", "oak_log", {"axis": TAG_String(axis)})
+
+
+@unittest.skipUnless(HasWx, "The edit program requires wx.")
+class BlockMatcherTestCase(unittest.TestCase):
+    def _matcher(self, level: ImmutableStructure, properties) -> "BlockMatcher":
+        matcher = BlockMatcher(
+            level, *Version, True, "minecraft", "oak_log", properties
+        )
+        matcher.translate_count = 0
+        matches = matcher._matches
+
+        def count_matches(block: Block) -> bool:
+            matcher.translate_count += 1
+            return matches(block)
+
+        matcher._matches = count_matches
+        return matcher
+
+    def test_properties(self):
+        level = ImmutableStructure()
+        y, x, stone = [
+            level.block_palette.get_add_block(universal_block(level, block))
+            for block in (oak_log("y"), oak_log("x"), Block("minecraft", "stone"))
+        ]
+        lut = self._matcher(level, {"axis": '"y"'}).lut
+        self.assertEqual(
+            lut.tolist(), [i == y for i in range(len(level.block_palette))]
+        )
+        lut = self._matcher(level, {"axis": "*"}).lut
+        self.assertEqual(lut[[y, x, stone]].tolist(), [True, True, False])
+
+    def test_growth(self):
+        level = ImmutableStructure()
+        palette = level.block_palette
+        stone = palette.get_add_block(
+            universal_block(level, Block("minecraft", "stone"))
+        )
+        matcher = self._matcher(level, {"axis": "*"})
+        # the palette contains air and stone
+        palette_size = len(palette)
+        self.assertEqual(matcher.lut.tolist(), [False] * palette_size)
+        self.assertEqual(matcher.translate_count, palette_size)
+        # the table is not rebuilt if the palette has not changed
+        lut = matcher.lut
+        self.assertIs(matcher.lut, lut)
+        self.assertEqual(matcher.translate_count, palette_size)
+
+        # a chunk adds blocks to the palette during the operation
+        log = palette.get_add_block(universal_block(level, oak_log("z")))
+        self.assertEqual(matcher.lut.tolist(), [False] * palette_size + [True])
+        # only the new palette entry is translated
+        self.assertEqual(matcher.translate_count, palette_size + 1)
+
+        blocks = numpy.array([[stone, log], [log, log]])
+        numpy.testing.assert_array_equal(
+            matcher.lut[blocks], [[False, True], [True, True]]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import importlib.util
+import unittest
+import numpy
+
+from amulet.api.block import Block
+from amulet.api.block_entity import BlockEntity
+from amulet.api.chunk import Chunk
+from amulet.api.level import ImmutableStructure
+from amulet.api.selection import SelectionGroup, SelectionBox
+from amulet_nbt import TAG_Compound
+
+# The edit program imports wx so the clipboard can only be tested if it is installed.
+HasWx = importlib.util.find_spec("wx") is not None
+if HasWx:
+    from amulet_map_editor.programs.edit.api.clipboard import ClipboardStructure
+
+
+def create_level():
+    """Create a level with one chunk with three sub-chunks of stone and a block entity in each."""
+    level = ImmutableStructure()
+    dimension = level.dimensions[0]
+    stone = level.block_palette.get_add_block(Block("universal_minecraft", "stone"))
+    chunk = Chunk(0, 0)
+    chunk.block_palette = level.block_palette
+    for cy in range(3):
+        chunk.blocks.add_sub_chunk(
+            cy, numpy.full((16, 16, 16), stone, dtype=numpy.uint32)
+        )
+        chunk.block_entities.insert(
+            BlockEntity(
+                "universal_minecraft", "chest", 1, cy * 16 + 1, 1, TAG_Compound()
+            )
+        )
+    # put_chunk creates an undo point
+    level.put_chunk(chunk, dimension)
+    return level, dimension
+
+
+def edit_level(level: ImmutableStructure, dimension: str):
+    """Replace all the blocks in the level with gold and remove the block entities."""
+    gold = level.block_palette.get_add_block(Block("universal_minecraft", "gold_block"))
+    chunk = level.get_chunk(0, 0, dimension)
+    for cy in chunk.blocks.sub_chunks:
+        chunk.blocks.get_sub_chunk(cy)[:] = gold
+    chunk.block_entities = []
+    chunk.changed = True
+    level.create_undo_point()
+
+
+class LevelHistoryTestCase(unittest.TestCase):
+    """The clipboard references the chunks the level loaded during the operation.
+    This relies on the level unloading its chunks when an undo point is created or restored
+    so that later edits are made to new chunk objects."""
+
+    def test_create_undo_point(self):
+        level, dimension = create_level()
+        chunk = level.get_chunk(0, 0, dimension)
+        sub_chunk = chunk.blocks.get_sub_chunk(0)
+        original = numpy.copy(sub_chunk)
+        level.create_undo_point()
+        self.assertIsNot(chunk, level.get_chunk(0, 0, dimension))
+        edit_level(level, dimension)
+        numpy.testing.assert_array_equal(sub_chunk, original)
+        self.assertEqual(len(chunk.block_entities), 3)
+
+    def test_restore_last_undo_point(self):
+        level, dimension = create_level()
+        level.create_undo_point()
+        chunk = level.get_chunk(0, 0, dimension)
+        sub_chunk = chunk.blocks.get_sub_chunk(0)
+        original = numpy.copy(sub_chunk)
+        level.restore_last_undo_point()
+        self.assertIsNot(chunk, level.get_chunk(0, 0, dimension))
+        edit_level(level, dimension)
+        numpy.testing.assert_array_equal(sub_chunk, original)
+
+
+@unittest.skipUnless(HasWx, "The edit program requires wx.")
+class ClipboardStructureTestCase(unittest.TestCase):
+    def _copy(self, level, dimension, selection):
+        generator = ClipboardStructure.from_level_iter(level, selection, dimension)
+        try:
+            while True:
+                next(generator)
+        except StopIteration as e:
+            return e.value
+
+    def test_trim(self):
+        level, dimension = create_level()
+        selection = SelectionGroup(SelectionBox((0, 20, 0), (4, 30, 4)))
+        clipboard = self._copy(level, dimension, selection)
+        chunk = clipboard.get_chunk(0, 0, clipboard.dimensions[0])
+        self.assertEqual(set(chunk.blocks.sub_chunks), {1})
+        self.assertEqual(list(chunk.block_entities.keys()), [])
+        # the sub-chunk is shared with the level
+        self.assertIs(
+            chunk.blocks.get_sub_chunk(1),
+            level.get_chunk(0, 0, dimension).blocks.get_sub_chunk(1),
+        )
+
+    def test_copy_on_write(self):
+        level, dimension = create_level()
+        selection = SelectionGroup(SelectionBox((0, 0, 0), (16, 48, 16)))
+        stone = level.get_block(0, 0, 0, dimension)
+        clipboard = self._copy(level, dimension, selection)
+        # the operation finishes
+        level.create_undo_point()
+        edit_level(level, dimension)
+        self.assertEqual(level.get_block(0, 0, 0, dimension).base_name, "gold_block")
+        clipboard_dimension = clipboard.dimensions[0]
+        self.assertEqual(clipboard.get_block(0, 0, 0, clipboard_dimension), stone)
+        chunk = clipboard.get_chunk(0, 0, clipboard_dimension)
+        self.assertEqual(len(chunk.block_entities), 3)
+
+    def test_snapshot(self):
+        level, dimension = create_level()
+        selection = SelectionGroup(SelectionBox((0, 0, 0), (16, 16, 16)))
+        stone = level.get_block(0, 0, 0, dimension)
+        clipboard = self._copy(level, dimension, selection)
+        clipboard.snapshot()
+        # edit the chunk in the same operation
+        air = level.block_palette.get_add_block(Block("universal_minecraft", "air"))
+        level.get_chunk(0, 0, dimension).blocks.get_sub_chunk(0)[:] = air
+        self.assertEqual(clipboard.get_block(0, 0, 0, clipboard.dimensions[0]), stone)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import importlib.util
+import random
+import time
+import unittest
+import numpy
+
+from amulet.api.chunk import Chunk
+from amulet.api.level import ImmutableStructure
+from amulet.api.selection import SelectionGroup, SelectionBox
+
+# The edit program imports wx so the executor can only be tested if it is installed.
+HasWx = importlib.util.find_spec("wx") is not None
+if HasWx:
+    from amulet_map_editor.programs.edit.api.operations.executor import (
+        run_chunk_batches,
+        chunk_box_count,
+    )
+
+
+def run(generator) -> list:
+    """Run an operation generator and return the progress values."""
+    return list(generator)
+
+
+@unittest.skipUnless(HasWx, "The edit program requires wx.")
+class RunChunkBatchesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.level = ImmutableStructure()
+        self.dimension = self.level.dimensions[0]
+
+    def test_order(self):
+        selection = SelectionGroup(SelectionBox((0, 0, 0), (160, 16, 160)))
+        expected = [
+            (chunk.cx, chunk.cz, slices)
+            for chunk, slices, _ in self.level.get_chunk_slice_box(
+                self.dimension, selection, True
+            )
+        ]
+        rand = random.Random(0)
+        committed = []
+
+        def kernel(blocks):
+            # finish the kernels out of order
+            time.sleep(rand.random() / 1000)
+            return None
+
+        def commit(chunk, slices, result):
+            committed.append((chunk.cx, chunk.cz, slices))
+
+        run(
+            run_chunk_batches(
+                self.level,
+                self.dimension,
+                selection,
+                kernel,
+                commit=commit,
+                create_missing_chunks=True,
+                batch_size=4,
+                workers=4,
+            )
+        )
+        self.assertEqual(committed, expected)
+
+    def test_overlap(self):
+        for cx in range(3):
+            for cz in range(3):
+                self.level.put_chunk(Chunk(cx, cz), self.dimension)
+        # the boxes overlap so the middle chunks are in both boxes
+        selection = SelectionGroup(
+            [
+                SelectionBox((0, 0, 0), (48, 16, 48)),
+                SelectionBox((8, 0, 8), (40, 16, 40)),
+            ]
+        )
+
+        def kernel(blocks):
+            return blocks + 1
+
+        run(
+            run_chunk_batches(
+                self.level,
+                self.dimension,
+                selection,
+                kernel,
+                batch_size=16,
+                workers=4,
+            )
+        )
+        expected = numpy.ones((48, 16, 48), dtype=numpy.uint32)
+        expected[8:40, :, 8:40] = 2
+        for cx in range(3):
+            for cz in range(3):
+                chunk = self.level.get_chunk(cx, cz, self.dimension)
+                numpy.testing.assert_array_equal(
+                    chunk.blocks[:, 0:16, :],
+                    expected[cx * 16 : cx * 16 + 16, :, cz * 16 : cz * 16 + 16],
+                )
+                self.assertTrue(chunk.changed)
+
+    def test_progress(self):
+        selection = SelectionGroup(
+            [
+                SelectionBox((0, 0, 0), (100, 16, 100)),
+                SelectionBox((200, 0, 0), (210, 16, 10)),
+            ]
+        )
+        chunk_count = sum(
+            1 for _ in self.level.get_chunk_slice_box(self.dimension, selection, True)
+        )
+        self.assertEqual(chunk_box_count(selection), chunk_count)
+        for batch_size in (1, 5, 100):
+            with self.subTest(batch_size=batch_size):
+                progress = run(
+                    run_chunk_batches(
+                        self.level,
+                        self.dimension,
+                        selection,
+                        lambda blocks: None,
+                        create_missing_chunks=True,
+                        batch_size=batch_size,
+                        workers=2,
+                    )
+                )
+                self.assertEqual(len(progress), -(-chunk_count // batch_size))
+                self.assertEqual(progress, sorted(progress))
+                self.assertEqual(progress[-1], 1.0)
+
+    def test_empty(self):
+        progress = run(
+            run_chunk_batches(
+                self.level,
+                self.dimension,
+                SelectionGroup(SelectionBox((0, 0, 0), (16, 16, 16))),
+                lambda blocks: None,
+            )
+        )
+        # the chunk does not exist and is not created
+        self.assertEqual(progress, [])
+        self.assertFalse(self.level.has_chunk(0, 0, self.dimension))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import sys
+import subprocess
+import tempfile
+import unittest
+import amulet_map_editor
+
+# Wall clock times depend on the load of the machine so this test only runs if this environment variable is set.
+# Run it on a quiet machine to check that a change has not made startup slower.
+EnableVariable = "AMULET_TEST_IMPORT_TIME"
+# The maximum time in seconds that importing each module in a new interpreter may take.
+# These are a few times the normal import time so that slower machines do not fail.
+ImportBudgets = {
+    "amulet_map_editor": 0.5,
+    "amulet_map_editor.api.opengl.resource_pack": 2.0,
+    "amulet_map_editor.api.opengl.mesh.level": 2.5,
+    "amulet_map_editor.api.framework": 5.0,
+    "amulet_map_editor.programs.edit": 5.0,
+}
+# The number of times to import each module. The fastest time is used.
+Repeats = 3
+
+ImportScript = """
+import time
+start = time.perf_counter()
+try:
+    import {module}
+except ModuleNotFoundError as e:
+    # only a missing third party package is skipped. Any other import error fails the test.
+    if e.name is None or e.name.split(".")[0] == "amulet_map_editor":
+        raise
+    print("missing", e.name)
+else:
+    print(time.perf_counter() - start)
+"""
+
+
+@unittest.skipUnless(
+    os.environ.get(EnableVariable), f"Set {EnableVariable}=1 to check the import times."
+)
+class ImportTimeTestCase(unittest.TestCase):
+    def _import_time(self, module: str) -> float:
+        """Import a module in a new interpreter and return the time it took."""
+        env = os.environ.copy()
+        env["PYTHONPATH"] = os.pathsep.join(
+            [os.path.dirname(amulet_map_editor.__path__[0])]
+            + [p for p in [env.get("PYTHONPATH")] if p]
+        )
+        # run in a temporary directory so that the log and config files are not written here
+        with tempfile.TemporaryDirectory() as cwd:
+            result = subprocess.run(
+                [sys.executable, "-c", ImportScript.format(module=module)],
+                cwd=cwd,
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True,
+            )
+        self.assertEqual(
+            result.returncode, 0, f"Failed importing {module}\n{result.stderr}"
+        )
+        output = result.stdout.strip().splitlines()[-1]
+        if output.startswith("missing"):
+            self.skipTest(f"{module} requires {output.split(' ', 1)[1]}")
+        return float(output)
+
+    def test_import_time(self):
+        for module, budget in ImportBudgets.items():
+            with self.subTest(module=module):
+                import_time = min(self._import_time(module) for _ in range(Repeats))
+                self.assertLessEqual(
+                    import_time,
+                    budget,
+                    f"Importing {module} took {import_time:.2f}s. The budget is {budget:.2f}s.",
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+import importlib.util
+import random
+import unittest
+import numpy
+
+from amulet.api.block import Block
+from amulet.api.block_entity import BlockEntity
+from amulet.api.chunk import Chunk
+from amulet.api.level import ImmutableStructure
+from amulet.api.selection import SelectionGroup, SelectionBox
+from amulet.operations.paste import paste_iter as amulet_paste_iter
+from amulet_nbt import TAG_Compound
+
+# The edit program imports wx so the paste engine can only be tested if it is installed.
+HasWx = importlib.util.find_spec("wx") is not None
+if HasWx:
+    from amulet_map_editor.programs.edit.api.operations.paste import paste_iter
+
+Blocks = [
+    Block("universal_minecraft", "air"),
+    Block("universal_minecraft", "stone"),
+    Block("universal_minecraft", "gold_block"),
+    Block("universal_minecraft", "water"),
+    Block("universal_minecraft", "lava"),
+]
+# The area of the destination the structure is pasted into in each test.
+DestinationChunks = range(-2, 5)
+DestinationHeight = 64
+
+
+def run(generator):
+    """Run an operation generator."""
+    try:
+        while True:
+            next(generator)
+    except StopIteration as e:
+        return e.value
+
+
+def create_structure() -> ImmutableStructure:
+    """Create a structure of random blocks that spans more than one chunk."""
+    rand = random.Random(0)
+    level = ImmutableStructure()
+    dimension = level.dimensions[0]
+    block_ids = [level.block_palette.get_add_block(block) for block in Blocks]
+    for cx in range(2):
+        for cz in range(2):
+            chunk = Chunk(cx, cz)
+            chunk.block_palette = level.block_palette
+            chunk.blocks.add_sub_chunk(
+                0,
+                numpy.array(
+                    [rand.choice(block_ids) for _ in range(16**3)], dtype=numpy.uint32
+                ).reshape((16, 16, 16)),
+            )
+            level.put_chunk(chunk, dimension)
+    for x, y, z in ((3, 1, 4), (17, 5, 5), (10, 11, 18)):
+        level.set_version_block(
+            x,
+            y,
+            z,
+            dimension,
+            ("universal", (1, 0, 0)),
+            Blocks[2],
+            BlockEntity("universal_minecraft", "chest", x, y, z, TAG_Compound()),
+        )
+    return level.extract_structure(
+        SelectionGroup(SelectionBox((2, 0, 3), (21, 12, 19))), dimension
+    )
+
+
+def create_destination() -> ImmutableStructure:
+    """Create a level filled with dirt so that the skipped blocks can be seen."""
+    level = ImmutableStructure()
+    dimension = level.dimensions[0]
+    dirt = level.block_palette.get_add_block(Block("universal_minecraft", "dirt"))
+    for cx in DestinationChunks:
+        for cz in DestinationChunks:
+            chunk = Chunk(cx, cz)
+            chunk.block_palette = level.block_palette
+            for cy in range(DestinationHeight // 16):
+                chunk.blocks.add_sub_chunk(
+                    cy, numpy.full((16, 16, 16), dirt, dtype=numpy.uint32)
+                )
+            level.put_chunk(chunk, dimension)
+    return level
+
+
+def level_blocks(level: ImmutableStructure):
+    """Get the names of the blocks and the block entity locations in the destination area."""
+    dimension = level.dimensions[0]
+    palette = numpy.array(
+        [
+            level.block_palette[block_id].full_blockstate
+            for block_id in range(len(level.block_palette))
+        ],
+        dtype=object,
+    )
+    blocks = {}
+    block_entities = set()
+    for cx in DestinationChunks:
+        for cz in DestinationChunks:
+            chunk = level.get_chunk(cx, cz, dimension)
+            blocks[(cx, cz)] = palette[chunk.blocks[:, 0:DestinationHeight, :]]
+            block_entities.update(
+                (location, block_entity.base_name)
+                for location, block_entity in chunk.block_entities.items()
+            )
+    return blocks, block_entities
+
+
+@unittest.skipUnless(HasWx, "The edit program requires wx.")
+class PasteTestCase(unittest.TestCase):
+    def assert_paste_equal(
+        self, location, scale=(1, 1, 1), rotation=(0, 0, 0), **options
+    ):
+        structure = create_structure()
+        structure_dimension = structure.dimensions[0]
+        expected_level = create_destination()
+        run(
+            amulet_paste_iter(
+                expected_level,
+                expected_level.dimensions[0],
+                structure,
+                structure_dimension,
+                location,
+                scale,
+                rotation,
+                **options,
+            )
+        )
+        level = create_destination()
+        run(
+            paste_iter(
+                level,
+                level.dimensions[0],
+                structure,
+                structure_dimension,
+                location,
+                scale,
+                rotation,
+                workers=2,
+                **options,
+            )
+        )
+        expected_blocks, expected_block_entities = level_blocks(expected_level)
+        blocks, block_entities = level_blocks(level)
+        for chunk_coords, chunk_blocks in expected_blocks.items():
+            numpy.testing.assert_array_equal(
+                blocks[chunk_coords], chunk_blocks, f"chunk {chunk_coords}"
+            )
+        self.assertEqual(block_entities, expected_block_entities)
+        # something was pasted
+        self.assertTrue(block_entities)
+
+    def test_move(self):
+        # the structure is moved by whole chunks
+        self.assert_paste_equal((43, 6, 43))
+
+    def test_offset(self):
+        self.assert_paste_equal((20, 20, -5))
+
+    def test_copy_air(self):
+        self.assert_paste_equal((20, 20, -5), copy_air=False)
+
+    def test_copy_liquids(self):
+        self.assert_paste_equal((20, 20, -5), copy_water=False, copy_lava=False)
+
+    def test_mirror(self):
+        self.assert_paste_equal((20, 20, 30), scale=(-1, 1, 1))
+
+    def test_rotate(self):
+        self.assert_paste_equal((20, 20, 30), rotation=(0, 90, 0))
+
+    def test_scale(self):
+        self.assert_paste_equal((20, 30, 20), scale=(2, 1, 0.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import importlib.util
+import random
+import unittest
+import numpy
+
+# The edit program imports wx so the ray caster can only be tested if it is installed.
+# The cython extension must also be compiled.
+HasWx = importlib.util.find_spec("wx") is not None
+if HasWx:
+    from amulet_map_editor.programs.edit.api.behaviour.raycast_cy import (
+        raycast,
+        voxel_traverse,
+    )
+
+
+def sample_ray(origin, direction, max_distance: float, step: float = 0.0001):
+    """The blocks a ray passes through found by sampling points along it."""
+    direction = numpy.asarray(direction, dtype=numpy.float64)
+    direction = direction / numpy.linalg.norm(direction)
+    distances = numpy.arange(0, max_distance, step)
+    blocks = numpy.floor(numpy.asarray(origin) + distances[:, None] * direction).astype(
+        numpy.int64
+    )
+    keep = numpy.ones(len(blocks), dtype=bool)
+    keep[1:] = numpy.any(blocks[1:] != blocks[:-1], axis=1)
+    return blocks[keep]
+
+
+def random_ray(rand: random.Random):
+    origin = [rand.uniform(-40, 40) for _ in range(3)]
+    direction = [rand.uniform(-1, 1) for _ in range(3)]
+    if rand.random() < 0.2:
+        # axis aligned rays
+        direction[rand.randrange(3)] = 0
+    return origin, direction
+
+
+class SolidBlocks:
+    """A world made of a set of solid blocks that counts the bitmap requests."""
+
+    def __init__(self, blocks):
+        self.blocks = set(map(tuple, blocks))
+        self.bitmaps = {}
+        for x, y, z in self.blocks:
+            region = (x // 16, y // 16, z // 16)
+            if region not in self.bitmaps:
+                self.bitmaps[region] = numpy.zeros((16, 16, 16), dtype=numpy.uint8)
+            self.bitmaps[region][x % 16, y % 16, z % 16] = 1
+        self.requests = []
+
+    def get_bitmap(self, rx: int, ry: int, rz: int):
+        self.requests.append((rx, ry, rz))
+        return self.bitmaps.get((rx, ry, rz))
+
+
+@unittest.skipUnless(HasWx, "The edit program requires wx.")
+class VoxelTraverseTestCase(unittest.TestCase):
+    def test_random(self):
+        rand = random.Random(0)
+        max_distance = 30
+        for _ in range(100):
+            origin, direction = random_ray(rand)
+            blocks = voxel_traverse(origin, direction, max_distance)
+            with self.subTest(origin=origin, direction=direction):
+                self.assertEqual(blocks.dtype, numpy.int64)
+                # each block shares a face with the previous block
+                numpy.testing.assert_array_equal(
+                    numpy.abs(numpy.diff(blocks, axis=0)).sum(axis=1), 1
+                )
+                # ignore the blocks very close to the maximum distance
+                expected = sample_ray(origin, direction, max_distance - 0.01)
+                numpy.testing.assert_array_equal(blocks[: len(expected)], expected)
+                self.assertLessEqual(
+                    len(blocks), len(sample_ray(origin, direction, max_distance + 0.01))
+                )
+
+    def test_zero_vector(self):
+        with self.assertRaises(ValueError):
+            voxel_traverse((0, 0, 0), (0, 0, 0), 10)
+
+
+@unittest.skipUnless(HasWx, "The edit program requires wx.")
+class RaycastTestCase(unittest.TestCase):
+    def _expected(self, world: SolidBlocks, origin, direction, max_distance):
+        """Walk the blocks voxel_traverse returns."""
+        blocks = voxel_traverse(origin, direction, max_distance)
+        in_air = False
+        for block in blocks.tolist():
+            if tuple(block) in world.blocks:
+                if in_air:
+                    return block, True
+            else:
+                in_air = True
+        return blocks[-1].tolist(), False
+
+    def test_hit(self):
+        world = SolidBlocks([(5, 0, 0), (3, 0, 0)])
+        location, hit = raycast((0.5, 0.5, 0.5), (1, 0, 0), 10, world.get_bitmap)
+        self.assertTrue(hit)
+        self.assertEqual(location.tolist(), [3, 0, 0])
+
+    def test_start_in_block(self):
+        # the blocks the ray starts in are skipped until it leaves them
+        world = SolidBlocks([(0, 0, 0), (1, 0, 0), (3, 0, 0)])
+        location, hit = raycast((0.5, 0.5, 0.5), (1, 0, 0), 10, world.get_bitmap)
+        self.assertTrue(hit)
+        self.assertEqual(location.tolist(), [3, 0, 0])
+
+    def test_miss(self):
+        world = SolidBlocks([(0, 5, 0)])
+        location, hit = raycast((0.5, 0.5, 0.5), (1, 0, 0), 10, world.get_bitmap)
+        self.assertFalse(hit)
+        self.assertEqual(location.tolist(), [10, 0, 0])
+
+    def test_region_requests(self):
+        # the bitmap is requested once each time the ray enters a region
+        world = SolidBlocks([])
+        raycast((-0.5, 0.5, 0.5), (1, 0, 0), 40, world.get_bitmap)
+        self.assertEqual(world.requests, [(-1, 0, 0), (0, 0, 0), (1, 0, 0), (2, 0, 0)])
+
+    def test_random(self):
+        rand = random.Random(1)
+        world = SolidBlocks(
+            [[rand.randint(-40, 40) for _ in range(3)] for _ in range(3000)]
+        )
+        for _ in range(100):
+            origin, direction = random_ray(rand)
+            world.requests.clear()
+            location, hit = raycast(origin, direction, 50, world.get_bitmap)
+            with self.subTest(origin=origin, direction=direction):
+                expected, expected_hit = self._expected(world, origin, direction, 50)
+                self.assertEqual(location.tolist(), expected)
+                self.assertEqual(hit, expected_hit)
+                # each region is requested when the ray enters it
+                blocks = voxel_traverse(origin, direction, 50).tolist()
+                regions = [
+                    tuple(v // 16 for v in block)
+                    for block in blocks[: blocks.index(expected) + 1]
+                ]
+                self.assertEqual(
+                    world.requests,
+                    [
+                        region
+                        for index, region in enumerate(regions)
+                        if index == 0 or region != regions[index - 1]
+                    ],
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import importlib.util
+import random
+import unittest
+
+from amulet.api.selection import SelectionGroup, SelectionBox
+
+# The edit program imports wx so the selection index can only be tested if it is installed.
+HasWx = importlib.util.find_spec("wx") is not None
+if HasWx:
+    from amulet_map_editor.programs.edit.api.selection_index import (
+        SelectionIndex,
+        MIN_REBUILD_COUNT,
+    )
+
+
+def random_box(rand: random.Random) -> SelectionBox:
+    point = [rand.randint(-64, 64) for _ in range(3)]
+    size = [rand.randint(1, 20) for _ in range(3)]
+    return SelectionBox(point, [p + s for p, s in zip(point, size)])
+
+
+def random_ray(rand: random.Random):
+    origin = [rand.uniform(-100, 100) for _ in range(3)]
+    target = [rand.uniform(-64, 64) for _ in range(3)]
+    vector = [t - o for t, o in zip(target, origin)]
+    if rand.random() < 0.2:
+        # axis aligned rays
+        vector[rand.randrange(3)] = 0
+    return origin, vector
+
+
+@unittest.skipUnless(HasWx, "The edit program requires wx.")
+class SelectionIndexTestCase(unittest.TestCase):
+    def assert_matches(self, index: "SelectionIndex", selection: SelectionGroup):
+        rand = random.Random(len(selection))
+        self.assertEqual(len(index), len(selection))
+        self.assertEqual(
+            index.bounds.tolist(),
+            [[list(point) for point in box.bounds] for box in selection],
+        )
+        self.assertEqual(index.chunk_locations(), selection.chunk_locations())
+        self.assertEqual(index.chunk_locations(8), selection.chunk_locations(8))
+        for _ in range(50):
+            origin, vector = random_ray(rand)
+            box_index, distance = index.closest_vector_intersection(origin, vector)
+            (
+                expected_index,
+                expected_distance,
+            ) = selection.closest_vector_intersection(origin, vector)
+            self.assertEqual(box_index, expected_index, (origin, vector))
+            self.assertAlmostEqual(distance, expected_distance)
+
+    def test_empty(self):
+        index = SelectionIndex()
+        self.assertEqual(len(index), 0)
+        self.assertEqual(
+            index.closest_vector_intersection((0, 0, 0), (1, 1, 1)),
+            (None, float("inf")),
+        )
+        self.assertEqual(index.chunk_locations(), set())
+
+    def test_build(self):
+        rand = random.Random(0)
+        for box_count in (1, 10, 100, 500):
+            with self.subTest(box_count=box_count):
+                selection = SelectionGroup([random_box(rand) for _ in range(box_count)])
+                self.assert_matches(SelectionIndex(selection), selection)
+
+    def test_update(self):
+        rand = random.Random(1)
+        boxes = [random_box(rand) for _ in range(200)]
+        index = SelectionIndex(SelectionGroup(boxes))
+        # fill the chunk cache so that it has to be updated
+        index.chunk_locations()
+        for step in range(30):
+            boxes = list(boxes)
+            change = rand.randrange(4)
+            position = rand.randrange(len(boxes))
+            if change == 0:
+                boxes.insert(position, random_box(rand))
+            elif change == 1 and len(boxes) > 1:
+                del boxes[position]
+            elif change == 2:
+                boxes[position] = random_box(rand)
+            else:
+                # a large change that rebuilds the hierarchy
+                boxes[position:] = [
+                    random_box(rand) for _ in range(MIN_REBUILD_COUNT * 2)
+                ]
+            selection = SelectionGroup(boxes)
+            index.update(selection)
+            self.assertIs(index.selection_group, selection)
+            with self.subTest(step=step):
+                self.assert_matches(index, selection)
+
+    def test_update_same_bounds(self):
+        rand = random.Random(2)
+        boxes = [random_box(rand) for _ in range(50)]
+        index = SelectionIndex(SelectionGroup(boxes))
+        # new box objects with the same bounds
+        selection = SelectionGroup([SelectionBox(box.min, box.max) for box in boxes])
+        index.update(selection)
+        self.assert_matches(index, selection)
+
+
+if __name__ == "__main__":
+    unittest.main()